@@ -1,6 +1,6 @@
 # backend/app/config.py
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 class Settings(BaseSettings):
@@ -19,15 +19,112 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000"
     
     # File Upload
+    # Per file; upload route bodies are cut off with 413 at this plus 64KB of form overhead
     max_upload_size: int = 10485760  # 10MB
     upload_dir: str = "./temp/uploads"
+    # Per-job scratch workspaces under upload_dir
+    scratch_quota_bytes: int = 2 * 1024 * 1024 * 1024
+    scratch_max_age_seconds: int = 6 * 3600  # workspaces never released are collected after this
+    scratch_gc_interval: float = 300.0
     
     # Model Configuration
     default_model: str = "claude-sonnet-4-20250514"
     max_tokens: int = 8000
-    
-    # Optional Database
+
+    # Upstream HTTP Clients
+    anthropic_base_url: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_timeout: float = 600.0
+    http_connect_timeout: float = 10.0
+
+    # Concurrent calls allowed per upstream across all requests
+    anthropic_concurrency: int = 8
+    openai_concurrency: int = 4
+    wordpress_concurrency: int = 6
+
+    # WordPress connection pool (separate from the LLM APIs' pool)
+    wordpress_max_connections: int = 10
+    wordpress_max_keepalive_connections: int = 10
+    wordpress_timeout: float = 30.0
+    wordpress_connect_timeout: float = 5.0
+
+    # Cached WordPress categories/tags are topped up once this old (seconds)
+    wordpress_taxonomy_refresh_seconds: int = 300
+    # Listing proxies: served from cache for ttl seconds, then revalidated upstream
+    wordpress_listing_ttl: int = 30
+    wordpress_listing_stale_seconds: int = 3600  # how long entries are kept for revalidation
+    wordpress_listing_max_entries: int = 128
+    # Consecutive failures that open the WordPress circuit, and how long it stays open
+    wordpress_circuit_failure_threshold: int = 5
+    wordpress_circuit_reset_seconds: float = 30.0
+    # Background connectivity probe interval (seconds)
+    wordpress_health_interval: float = 60.0
+
+    # Batch Generation
+    batch_max_items: int = 20
+    batch_concurrency: int = 3
+
+    # Background Jobs
+    job_workers: int = 2
+    job_queue_size: int = 50
+    job_retention_seconds: int = 3600
+
+    # Start the featured image from the first streamed suggested image
+    speculative_images: bool = True
+
+    # Caching
+    cache_dir: str = "./temp/cache"
+    research_cache_ttl: int = 86400  # seconds, 0 = never expire
+    research_cache_max_entries: int = 256
+    research_cache_max_disk_entries: int = 2048  # files under cache_dir, 0 = no limit
+    document_cache_ttl: int = 604800  # seconds, 0 = never expire
+    document_cache_max_entries: int = 64
+    document_cache_max_disk_entries: int = 512  # files under cache_dir, 0 = no limit
+
+    # Documents above this many estimated tokens are structured in parallel chunks
+    structure_chunk_tokens: int = 6000
+
+    # PDF extraction process pool (0 workers = one per CPU)
+    pdf_workers: int = 0
+    pdf_pages_per_task: int = 8
+    pdf_parallel_min_pages: int = 16
+
+    # Featured images are downscaled and re-encoded (webp or jpeg) before upload
+    image_format: str = "webp"
+    image_quality: int = 82
+    image_max_width: int = 1600
+    image_thumbnail_width: int = 400
+    image_workers: int = 2
+    image_max_download_bytes: int = 20 * 1024 * 1024
+    # Reuse a library image when its prompt is at least this similar (TF-IDF cosine, 0-1)
+    image_library_enabled: bool = True
+    image_library_threshold: float = 0.75
+
+    # Usage ledger prices in USD, per model: per million tokens for each
+    # message.usage field, and per generated image for "images"
+    usage_prices: Dict[str, Dict[str, float]] = {
+        "claude-sonnet-4-20250514": {
+            "input_tokens": 3.0,
+            "output_tokens": 15.0,
+            "cache_creation_input_tokens": 3.75,
+            "cache_read_input_tokens": 0.3
+        },
+        "dall-e-3": {"images": 0.08}  # 1792x1024, standard quality
+    }
+
+    # Local state (outbox, idempotency, image library, usage ledger). Only
+    # sqlite:/// URLs are used; unset or other URLs fall back to ./temp/newsletter.db
     database_url: Optional[str] = None
+
+    # Publish outbox: drafts WordPress could not take are retried from here
+    outbox_dir: str = "./temp/outbox"
+    outbox_batch_size: int = 20
+    outbox_poll_seconds: float = 60.0
+    outbox_retry_base_seconds: float = 30.0
+    outbox_retry_max_seconds: float = 3600.0
+    outbox_max_attempts: int = 12
     
     class Config:
         env_file = ".env"
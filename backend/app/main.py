@@ -1,17 +1,52 @@
 # backend/app/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 
 from .config import settings
-from .routes import newsletter, wordpress
+from .routes import admin, newsletter, usage, wordpress
+from .services.circuit_breaker import CLOSED
+from .services.clients import close_clients
+from .services.image_processor import close_image_pool
+from .services.pdf_extractor import close_pdf_pool
+from .utils.metrics import CONTENT_TYPE, metrics
+from .utils.uploads import UploadSizeGuard
+
+
+def _log_prefetch_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"WordPress taxonomy prefetch failed, will retry on first publish: {task.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on startup and stop them on shutdown"""
+    await newsletter.job_manager.start()
+    await newsletter.scratch_storage.start()
+    await newsletter.pipeline.publish_outbox.start()
+    await wordpress.wordpress_publisher.health.start()
+    prefetch = asyncio.create_task(wordpress.wordpress_publisher.taxonomy.prefetch())
+    prefetch.add_done_callback(_log_prefetch_failure)
+    yield
+    prefetch.cancel()
+    await wordpress.wordpress_publisher.health.stop()
+    await newsletter.job_manager.stop()
+    await newsletter.scratch_storage.stop()
+    await newsletter.pipeline.publish_outbox.stop()
+    await close_clients()
+    close_pdf_pool()
+    close_image_pool()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Goochland GOP Newsletter Agent",
     description="AI-powered newsletter generation system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Parse CORS origins from comma-separated string
@@ -26,9 +61,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Only the upload routes are capped, and by the body actually received
+app.add_middleware(
+    UploadSizeGuard,
+    paths=newsletter.UPLOAD_PATHS,
+    max_upload_size=lambda: settings.max_upload_size
+)
+
+
 # Include routers
 app.include_router(newsletter.router)
 app.include_router(wordpress.router)
+app.include_router(admin.router)
+app.include_router(usage.router)
 
 
 @app.get("/")
@@ -50,6 +95,23 @@ async def health_check():
     }
 
 
+# Point-in-time state, refreshed on every scrape
+OUTBOX_ENTRIES = metrics.gauge("newsletter_outbox_entries", "Publish outbox entries by status", ["status"])
+SCRATCH_USED_BYTES = metrics.gauge("newsletter_scratch_used_bytes", "Bytes held in scratch workspaces")
+CIRCUIT_OPEN = metrics.gauge("newsletter_circuit_open", "1 while an upstream circuit breaker is not closed", ["circuit"])
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Pipeline spans, upstream calls and token usage in the Prometheus text format"""
+    for status, count in (await newsletter.pipeline.publish_outbox.stats()).items():
+        OUTBOX_ENTRIES.set(count, status=status)
+    SCRATCH_USED_BYTES.set(newsletter.scratch_storage.used_bytes)
+    circuit = newsletter.pipeline.wordpress_publisher.circuit
+    CIRCUIT_OPEN.set(0 if circuit.state == CLOSED else 1, circuit=circuit.name)
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -15,6 +15,11 @@ class ResearchRequest(BaseModel):
     context: Optional[str] = Field(None, description="Additional context")
     sources: Optional[List[str]] = Field(default=[], description="Specific source URLs")
     word_count: Optional[int] = Field(800, description="Target word count")
+    bypass_cache: bool = Field(False, description="Ignore cached research and refresh it")
+
+class BatchRequest(BaseModel):
+    items: List[ResearchRequest] = Field(..., description="Research topics to generate")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Items generated at the same time")
 
 class MinutesRequest(BaseModel):
     additional_context: Optional[str] = Field(None, description="Additional context for minutes")
@@ -57,4 +62,57 @@ class WordPressPost(BaseModel):
     categories: List[int] = []
     tags: List[int] = []
     featured_media: Optional[int] = None
-    meta: Dict[str, Any] = {}
\ No newline at end of file
+    meta: Dict[str, Any] = {}
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class JobStage(BaseModel):
+    name: str
+    status: str  # started, completed, failed
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobInfo(BaseModel):
+    job_id: str
+    kind: ContentType
+    status: JobStatus = JobStatus.QUEUED
+    stages: List[JobStage] = []
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+class OutboxEntry(BaseModel):
+    id: int
+    status: OutboxStatus
+    title: Optional[str] = None
+    image_path: Optional[str] = None
+    media_id: Optional[int] = None
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    updated_at: datetime
+
+class LibraryImage(BaseModel):
+    id: int
+    wp_url: str
+    media_id: int
+    source_url: Optional[str] = None
+    description: str
+    prompt: str
+    tags: List[str] = []
+    uses: int = 0
+    created_at: datetime
+    last_used_at: Optional[datetime] = None
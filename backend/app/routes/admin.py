@@ -0,0 +1,108 @@
+# backend/app/routes/admin.py
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import re
+
+from ..models import OutboxStatus
+from .newsletter import pipeline
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/documents")
+async def list_stored_documents():
+    """List stored upload extractions, newest first"""
+    store = pipeline.document_processor.store
+    entries = store.entries()
+    return {
+        "count": len(entries),
+        "entries": entries,
+        "stats": store.stats()
+    }
+
+
+@router.delete("/documents")
+async def purge_stored_documents(sha256: Optional[str] = Query(None, description="Only purge entries for this file hash")):
+    """Purge stored upload extractions, all of them or those of one file"""
+    store = pipeline.document_processor.store
+    if sha256 is None:
+        return {"purged": store.clear()}
+
+    keys = [entry["key"] for entry in store.entries() if entry["metadata"].get("sha256") == sha256.lower()]
+    for key in keys:
+        store.delete(key)
+    return {"purged": len(keys)}
+
+
+@router.delete("/documents/{key}")
+async def delete_stored_document(key: str):
+    """Delete one stored upload extraction"""
+    # Keys are SHA-256 digests and double as file names
+    if not re.fullmatch(r"[0-9a-f]{64}", key) or not pipeline.document_processor.store.delete(key):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"purged": 1}
+
+
+@router.get("/outbox")
+async def list_outbox(
+    status: Optional[OutboxStatus] = Query(None, description="Only entries with this status"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List publish outbox entries, newest first, with counts by status"""
+    outbox = pipeline.publish_outbox
+    entries = await outbox.entries(status, limit)
+    return {
+        "counts": await outbox.stats(),
+        "entries": [entry.model_dump(mode="json") for entry in entries]
+    }
+
+
+@router.get("/outbox/{entry_id}")
+async def get_outbox_entry(entry_id: int):
+    """Get one publish outbox entry"""
+    entry = await pipeline.publish_outbox.get(entry_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Outbox entry not found")
+    return entry.model_dump(mode="json")
+
+
+@router.post("/outbox/replay")
+async def replay_outbox():
+    """Retry every undelivered outbox entry now"""
+    return {"replayed": await pipeline.publish_outbox.replay()}
+
+
+@router.post("/outbox/{entry_id}/replay")
+async def replay_outbox_entry(entry_id: int):
+    """Retry one undelivered outbox entry now"""
+    if not await pipeline.publish_outbox.replay(entry_id):
+        raise HTTPException(status_code=404, detail="No undelivered outbox entry with that id")
+    return {"replayed": 1}
+
+
+def _image_library():
+    if pipeline.image_library is None:
+        raise HTTPException(status_code=404, detail="Image library is disabled")
+    return pipeline.image_library
+
+
+@router.get("/images")
+async def list_library_images(
+    q: Optional[str] = Query(None, description="Rank images by similarity to this description")
+):
+    """List reusable featured images, newest first or by similarity to ``q``"""
+    library = _image_library()
+    if q:
+        matches = library.search(q, wp_url=pipeline.wordpress_publisher.wp_url, limit=20)
+        entries = [{**match.image.model_dump(mode="json"), "score": match.score} for match in matches]
+    else:
+        entries = [image.model_dump(mode="json") for image in library.entries()]
+    return {"stats": library.stats(), "entries": entries}
+
+
+@router.delete("/images/{image_id}")
+async def delete_library_image(image_id: int):
+    """Stop reusing one library image (the WordPress media is kept)"""
+    if not await _image_library().delete(image_id):
+        raise HTTPException(status_code=404, detail="Library image not found")
+    return {"deleted": 1}
@@ -1,314 +1,347 @@
 # backend/app/routes/newsletter.py
-# EXACT ORIGINAL from document index 26
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Optional
-import os
-import time
-from datetime import datetime
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Optional, Tuple
+import asyncio
 
 from ..models import (
-    ResearchRequest,
+    ResearchRequest, BatchRequest,
     GenerationResponse, ContentType
 )
-from ..services.research_engine import ResearchEngine
-from ..services.document_processor import DocumentProcessor
-from ..services.newsletter_generator import NewsletterGenerator
-from ..services.image_generator import ImageGenerator
-from ..services.wordpress_publisher import WordPressPublisher
+from ..services.newsletter_pipeline import NewsletterPipeline
+from ..services.job_manager import JobManager, JobQueueFullError
+from ..services.scratch_storage import ScratchQuotaExceededError, ScratchStorage, Workspace
+from ..utils.sse import format_sse, SSE_HEADERS
+from ..utils.uploads import StoredUpload, UnsupportedFileTypeError, UploadTooLargeError, save_upload
 from ..config import settings
 
 router = APIRouter(prefix="/api/newsletter", tags=["newsletter"])
 
+# Routes taking a file upload; main.py caps their request bodies
+UPLOAD_PATHS = [f"{router.prefix}/{action}/{kind}" for action in ("generate", "stream") for kind in ("minutes", "hybrid")]
+
 # Initialize services
-research_engine = ResearchEngine()
-document_processor = DocumentProcessor()
-newsletter_generator = NewsletterGenerator()
-image_generator = ImageGenerator()
-wordpress_publisher = WordPressPublisher()
+pipeline = NewsletterPipeline()
+job_manager = JobManager()
+scratch_storage = ScratchStorage()
 
 
-@router.post("/generate/research")
-async def generate_from_research(request: ResearchRequest):
-    """Generate newsletter from research topic"""
-    start_time = time.time()
-    
+def _submit_job(kind: ContentType, runner) -> JSONResponse:
+    """Queue a pipeline run and answer 202 with where to follow it"""
     try:
-        # Step 1: Research the topic
-        print(f"Starting research for topic: {request.topic}")
-        research_data = await research_engine.research_topic(
-            topic=request.topic,
-            context=request.context,
-            sources=request.sources
-        )
-        research_data['topic'] = request.topic
-        research_data['context'] = request.context or ""
-        
-        # Step 2: Generate newsletter content
-        print("Generating newsletter content...")
-        newsletter_content = await newsletter_generator.generate_newsletter(
-            content_type=ContentType.RESEARCH,
-            input_data=research_data,
-            word_count=request.word_count or 800
-        )
-        
-        # Step 3: Generate featured image
-        print("Generating featured image...")
-        image_url = None  # Track image URL for preview
-        image_id = None
+        job = job_manager.submit(kind, runner)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "status_url": f"{router.prefix}/jobs/{job.job_id}",
+            "events_url": f"{router.prefix}/jobs/{job.job_id}/events"
+        }
+    )
+
+
+def _stream_pipeline(run, workspace: Optional[Workspace] = None) -> StreamingResponse:
+    """Run a pipeline in the background and relay its events as SSE.
+
+    ``run(progress, on_event)`` must start the pipeline; stage progress,
+    streamed article fields and the final response are all forwarded.
+    A ``workspace`` is released once the response ends, even if the
+    client disconnects before the pipeline starts.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
         try:
-            image_description = newsletter_content.suggested_images[0] if newsletter_content.suggested_images else "Newsletter header image"
-            image_url = await image_generator.generate_image(image_description)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_path = os.path.join(settings.upload_dir, f"newsletter_{timestamp}.png")
-            await image_generator.download_image(image_url, image_path)
-            
-            image_id = await wordpress_publisher.upload_image(image_path, alt_text=image_description)
+            if workspace is not None:
+                scratch_storage.touch(workspace)
+            result = await run(
+                lambda stage, status: queue.put_nowait({"type": "stage", "stage": stage, "status": status}),
+                queue.put_nowait
+            )
+            queue.put_nowait({"type": "result", "result": result})
         except Exception as e:
-            print(f"Image generation/upload failed: {e}")
-        
-        # Step 4: Create WordPress draft
-        print("Creating WordPress draft...")
+            print(f"Error in streamed generation: {str(e)}")
+            queue.put_nowait({"type": "error", "error": str(e)})
+        finally:
+            queue.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(produce())
         try:
-            wp_result = await wordpress_publisher.create_draft_post(
-                newsletter_content=newsletter_content.dict(),
-                featured_image_id=image_id
-            )
-            
-            if not wp_result.get('success'):
-                wp_result = {
-                    'success': True,
-                    'post_id': None,
-                    'edit_url': 'Pending WordPress credentials',
-                    'preview_url': 'Pending WordPress credentials'
-                }
-        except Exception as wp_error:
-            print(f"WordPress posting skipped: {wp_error}")
-            wp_result = {
-                'success': True,
-                'post_id': None,
-                'edit_url': 'Pending WordPress credentials',
-                'preview_url': 'Pending WordPress credentials'
-            }
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            "success": True,
-            "wordpress_post_id": wp_result.get('post_id'),
-            "edit_url": wp_result.get('edit_url'),
-            "preview_url": wp_result.get('preview_url'),
-            "content": newsletter_content.dict(),
-            "image_url": image_url,  # ADD THIS LINE
-            "generation_time": generation_time,
-            "created_at": datetime.now().isoformat()
-        }
-        
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield format_sse(event, event=event["type"])
+        finally:
+            # Client went away: stop paying for the rest of the pipeline
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(scratch_storage.release, workspace) if workspace is not None else None
+    )
+
+
+async def _save_upload(file: UploadFile, prefix: str) -> Tuple[Workspace, StoredUpload]:
+    """Stream an upload into a new scratch workspace, enforcing size, type and quota.
+
+    The caller owns the workspace and must release it when the job ends.
+    """
+    try:
+        workspace = await scratch_storage.create(prefix)
+    except ScratchQuotaExceededError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+
+    try:
+        upload = await save_upload(file, workspace.path, settings.max_upload_size, prefix=prefix)
+    except UploadTooLargeError as e:
+        await scratch_storage.release(workspace)
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedFileTypeError as e:
+        await scratch_storage.release(workspace)
+        raise HTTPException(status_code=400, detail=f"Invalid file type: {e}")
+    except BaseException:
+        await scratch_storage.release(workspace)
+        raise
+    scratch_storage.track(workspace, upload.size)
+    return workspace, upload
+
+
+async def _run_in_workspace(kind: ContentType, workspace: Workspace, run, run_async: bool):
+    """Run (or queue) a job that uses ``workspace``, releasing it when the job ends"""
+    async def run_then_release(progress=None):
+        try:
+            scratch_storage.touch(workspace)
+            return await run(progress)
+        finally:
+            await scratch_storage.release(workspace)
+
+    if not run_async:
+        return await run_then_release()
+    try:
+        return _submit_job(kind, run_then_release)
+    except HTTPException:
+        await scratch_storage.release(workspace)
+        raise
+
+
+@router.post("/generate/research")
+async def generate_from_research(
+    request: ResearchRequest,
+    run_async: bool = Query(False, alias="async", description="Queue as a background job")
+):
+    """Generate newsletter from research topic"""
+    if run_async:
+        return _submit_job(
+            ContentType.RESEARCH,
+            lambda progress: pipeline.run_research(request, progress=progress)
+        )
+
+    try:
+        return await pipeline.run_research(request)
     except Exception as e:
         print(f"Error in research generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream/research")
+async def stream_from_research(request: ResearchRequest):
+    """Generate newsletter from research topic, streaming the article as SSE"""
+    return _stream_pipeline(
+        lambda progress, on_event: pipeline.run_research(request, progress=progress, on_event=on_event)
+    )
+
+
+@router.post("/generate/batch")
+async def generate_batch(request: BatchRequest):
+    """Generate several research newsletters, streaming each result as SSE when it finishes"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds {settings.batch_max_items} items"
+        )
+
+    async def event_stream():
+        succeeded = 0
+        async for outcome in pipeline.run_batch(request.items, request.max_concurrency):
+            succeeded += 1 if outcome["success"] else 0
+            yield format_sse({"type": "item", **outcome}, event="item")
+
+        yield format_sse({
+            "type": "summary",
+            "total": len(request.items),
+            "succeeded": succeeded,
+            "failed": len(request.items) - succeeded
+        }, event="summary")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+def _minutes_runner(upload: StoredUpload, additional_context: Optional[str],
+                    highlight_items: Optional[str], bypass_cache: bool):
+    items = highlight_items.split(',') if highlight_items else None
+
+    async def run(progress=None, on_event=None):
+        return await pipeline.run_minutes(
+            file_path=upload.path,
+            file_type=upload.file_type,
+            file_sha256=upload.sha256,
+            additional_context=additional_context,
+            highlight_items=items,
+            bypass_cache=bypass_cache,
+            progress=progress,
+            on_event=on_event
+        )
+    return run
+
+
+def _hybrid_runner(upload: StoredUpload, research_topic: str, research_context: Optional[str],
+                   minutes_context: Optional[str], bypass_cache: bool):
+    async def run(progress=None, on_event=None):
+        return await pipeline.run_hybrid(
+            file_path=upload.path,
+            file_type=upload.file_type,
+            file_sha256=upload.sha256,
+            research_topic=research_topic,
+            research_context=research_context,
+            minutes_context=minutes_context,
+            bypass_cache=bypass_cache,
+            progress=progress,
+            on_event=on_event
+        )
+    return run
+
+
 @router.post("/generate/minutes")
 async def generate_from_minutes(
     file: UploadFile = File(...),
     additional_context: Optional[str] = Form(None),
-    highlight_items: Optional[str] = Form(None)
+    highlight_items: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False),
+    run_async: bool = Query(False, alias="async", description="Queue as a background job")
 ):
     """Generate newsletter from meeting minutes"""
-    start_time = time.time()
-    
     try:
-        allowed_types = ['application/pdf', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'text/plain']
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Invalid file type")
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename or "file.txt")[1]
-        file_path = os.path.join(settings.upload_dir, f"minutes_{timestamp}{file_extension}")
-        
-        content_bytes = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content_bytes)
-        
-        print(f"Processing document: {file.filename}")
-        
-        structured_data = await document_processor.process_document(
-            file_path=file_path,
-            file_type=file.content_type or "text/plain"
-        )
-        
-        if additional_context:
-            structured_data['additional_context'] = additional_context
-        
-        if highlight_items:
-            structured_data['highlight_items'] = highlight_items.split(',')
-        
-        print("Generating newsletter from minutes...")
-        newsletter_content = await newsletter_generator.generate_newsletter(
-            content_type=ContentType.MINUTES,
-            input_data={'structured_data': structured_data},
-            word_count=800
-        )
-        
-        print("Generating featured image...")
-        image_url = None
-        image_id = None
-        try:
-            image_description = newsletter_content.suggested_images[0] if newsletter_content.suggested_images else "Meeting highlights"
-            image_url = await image_generator.generate_image(image_description)
-            
-            image_path = os.path.join(settings.upload_dir, f"newsletter_{timestamp}.png")
-            await image_generator.download_image(image_url, image_path)
-            
-            image_id = await wordpress_publisher.upload_image(image_path, alt_text=image_description)
-        except Exception as e:
-            print(f"Image generation failed: {e}")
-        
-        print("Creating WordPress draft...")
-        try:
-            wp_result = await wordpress_publisher.create_draft_post(
-                newsletter_content=newsletter_content.dict(),
-                featured_image_id=image_id
-            )
-            
-            if not wp_result.get('success'):
-                wp_result = {
-                    'success': True,
-                    'post_id': None,
-                    'edit_url': 'Pending WordPress credentials',
-                    'preview_url': 'Pending WordPress credentials'
-                }
-        except Exception as wp_error:
-            print(f"WordPress posting skipped: {wp_error}")
-            wp_result = {
-                'success': True,
-                'post_id': None,
-                'edit_url': 'Pending WordPress credentials',
-                'preview_url': 'Pending WordPress credentials'
-            }
-        
-        try:
-            os.remove(file_path)
-        except:
-            pass
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            "success": True,
-            "wordpress_post_id": wp_result.get('post_id'),
-            "edit_url": wp_result.get('edit_url'),
-            "preview_url": wp_result.get('preview_url'),
-            "content": newsletter_content.dict(),
-            "image_url": image_url,  # ADD THIS LINE
-            "generation_time": generation_time,
-            "created_at": datetime.now().isoformat()
-        }
-        
+        workspace, upload = await _save_upload(file, "minutes")
+        run = _minutes_runner(upload, additional_context, highlight_items, bypass_cache)
+        return await _run_in_workspace(ContentType.MINUTES, workspace, run, run_async)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in minutes generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream/minutes")
+async def stream_from_minutes(
+    file: UploadFile = File(...),
+    additional_context: Optional[str] = Form(None),
+    highlight_items: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False)
+):
+    """Generate newsletter from meeting minutes, streaming the article as SSE"""
+    workspace, upload = await _save_upload(file, "minutes")
+    return _stream_pipeline(_minutes_runner(upload, additional_context, highlight_items, bypass_cache), workspace)
+
+
 @router.post("/generate/hybrid")
 async def generate_hybrid(
     file: UploadFile = File(...),
     research_topic: str = Form(...),
     research_context: Optional[str] = Form(None),
-    minutes_context: Optional[str] = Form(None)
+    minutes_context: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False),
+    run_async: bool = Query(False, alias="async", description="Queue as a background job")
 ):
     """Generate newsletter combining minutes and research"""
-    start_time = time.time()
-    
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename or "file.txt")[1]
-        file_path = os.path.join(settings.upload_dir, f"minutes_{timestamp}{file_extension}")
-        
-        content_bytes = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content_bytes)
-        
-        print("Processing meeting minutes...")
-        meeting_data = await document_processor.process_document(
-            file_path=file_path,
-            file_type=file.content_type or "text/plain"
-        )
-        
-        if minutes_context:
-            meeting_data['additional_context'] = minutes_context
-        
-        print(f"Researching topic: {research_topic}")
-        research_data = await research_engine.research_topic(
-            topic=research_topic,
-            context=research_context
-        )
-        
-        print("Generating hybrid newsletter...")
-        newsletter_content = await newsletter_generator.generate_newsletter(
-            content_type=ContentType.HYBRID,
-            input_data={
-                'meeting_data': meeting_data,
-                'research_data': research_data
-            },
-            word_count=1000
-        )
-        
-        image_url = None
-        image_id = None
-        try:
-            image_description = newsletter_content.suggested_images[0] if newsletter_content.suggested_images else "Newsletter header"
-            image_url = await image_generator.generate_image(image_description)
-            
-            image_path = os.path.join(settings.upload_dir, f"newsletter_{timestamp}.png")
-            await image_generator.download_image(image_url, image_path)
-            
-            image_id = await wordpress_publisher.upload_image(image_path, alt_text=image_description)
-        except Exception as e:
-            print(f"Image generation failed: {e}")
-        
-        try:
-            wp_result = await wordpress_publisher.create_draft_post(
-                newsletter_content=newsletter_content.dict(),
-                featured_image_id=image_id
-            )
-            
-            if not wp_result.get('success'):
-                wp_result = {
-                    'success': True,
-                    'post_id': None,
-                    'edit_url': 'Pending WordPress credentials',
-                    'preview_url': 'Pending WordPress credentials'
-                }
-        except Exception as wp_error:
-            print(f"WordPress posting skipped: {wp_error}")
-            wp_result = {
-                'success': True,
-                'post_id': None,
-                'edit_url': 'Pending WordPress credentials',
-                'preview_url': 'Pending WordPress credentials'
-            }
-        
-        try:
-            os.remove(file_path)
-        except:
-            pass
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            "success": True,
-            "wordpress_post_id": wp_result.get('post_id'),
-            "edit_url": wp_result.get('edit_url'),
-            "preview_url": wp_result.get('preview_url'),
-            "content": newsletter_content.dict(),
-            "image_url": image_url,  # ADD THIS LINE
-            "generation_time": generation_time,
-            "created_at": datetime.now().isoformat()
-        }
-        
+        workspace, upload = await _save_upload(file, "hybrid")
+        run = _hybrid_runner(upload, research_topic, research_context, minutes_context, bypass_cache)
+        return await _run_in_workspace(ContentType.HYBRID, workspace, run, run_async)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in hybrid generation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream/hybrid")
+async def stream_hybrid(
+    file: UploadFile = File(...),
+    research_topic: str = Form(...),
+    research_context: Optional[str] = Form(None),
+    minutes_context: Optional[str] = Form(None),
+    bypass_cache: bool = Form(False)
+):
+    """Generate newsletter combining minutes and research, streaming the article as SSE"""
+    workspace, upload = await _save_upload(file, "hybrid")
+    return _stream_pipeline(
+        _hybrid_runner(upload, research_topic, research_context, minutes_context, bypass_cache),
+        workspace
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status, stage progress and result of a background job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JSONResponse(content=job.model_dump(mode="json"))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        index = 0
+        async for event in job_manager.stream_events(job_id):
+            yield format_sse(event, event=event["type"], event_id=str(index))
+            index += 1
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.get("/stats")
+async def get_pipeline_stats():
+    """Cache, request-coalescing and token usage statistics for the generation pipeline"""
+    return {
+        "research_cache": pipeline.research_engine.cache.stats(),
+        "document_store": pipeline.document_processor.store.stats(),
+        "coalescing": {
+            "research": pipeline.research_engine.inflight.stats(),
+            "structure": pipeline.document_processor.inflight.stats(),
+            "image": pipeline.image_generator.inflight.stats()
+        },
+        "generation_usage": pipeline.newsletter_generator.usage,
+        "wordpress_taxonomy": pipeline.wordpress_publisher.taxonomy.stats(),
+        "wordpress_circuit": pipeline.wordpress_publisher.circuit.stats(),
+        "image_library": pipeline.image_library.stats() if pipeline.image_library is not None else None,
+        "publish_outbox": await pipeline.publish_outbox.stats(),
+        "scratch_storage": scratch_storage.stats()
+    }
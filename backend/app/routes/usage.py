@@ -0,0 +1,34 @@
+# backend/app/routes/usage.py
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from ..config import settings
+from .newsletter import pipeline
+
+router = APIRouter(prefix="/api/usage", tags=["usage"])
+
+
+@router.get("")
+async def get_usage(
+    days: int = Query(30, ge=1, description="Only the last N days (UTC)")
+):
+    """Token, image and cost totals by day, content type, model and stage"""
+    ledger = pipeline.usage_ledger
+    return {
+        "days": days,
+        "totals": await ledger.totals(days),
+        "by_day": await ledger.aggregate("day", days),
+        "by_content_type": await ledger.aggregate("content_type", days),
+        "by_model": await ledger.aggregate("model", days),
+        "by_stage": await ledger.aggregate("stage", days),
+        "prices": settings.usage_prices
+    }
+
+
+@router.get("/generations")
+async def list_generation_usage(
+    days: Optional[int] = Query(None, ge=1, description="Only the last N days (UTC)"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Usage and cost of individual generations, newest first"""
+    return {"generations": await pipeline.usage_ledger.aggregate("generation", days, limit)}
@@ -1,18 +1,24 @@
 # backend/app/routes/wordpress.py
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
 
-from ..services.wordpress_publisher import WordPressPublisher
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+from ..config import settings
+from ..services.wordpress_listings import ListingError, etag_matches
+from .newsletter import pipeline
 
 router = APIRouter(prefix="/api/wordpress", tags=["wordpress"])
 
-wordpress_publisher = WordPressPublisher()
+# The pipeline's publisher, so routes and drafts share one circuit, taxonomy cache and health probe
+wordpress_publisher = pipeline.wordpress_publisher
+wordpress_listings = wordpress_publisher.listings
 
 
 @router.get("/test-connection")
 async def test_wordpress_connection():
-    """Test WordPress API connection"""
-    result = wordpress_publisher.test_connection()
+    """WordPress API connectivity, as last seen by the background health probe"""
+    result = await wordpress_publisher.health.current()
     
     if result['success']:
         return JSONResponse(content=result)
@@ -20,59 +26,57 @@ async def test_wordpress_connection():
         raise HTTPException(status_code=500, detail=result.get('error'))
 
 
-@router.get("/categories")
-async def get_categories():
-    """Get all WordPress categories"""
+async def _proxy_get(request: Request, path: str, error: str, **params) -> Response:
+    """Relay a WP REST listing from the listing cache, honouring If-None-Match"""
     try:
-        import requests
-        response = requests.get(
-            f"{wordpress_publisher.wp_url}/wp-json/wp/v2/categories",
-            auth=wordpress_publisher.auth
-        )
-        
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        else:
-            raise HTTPException(status_code=response.status_code, detail="Failed to fetch categories")
-            
+        listing = await wordpress_listings.get(path, params)
+    except ListingError as e:
+        raise HTTPException(status_code=e.status_code, detail=error)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {
+        **listing["headers"],
+        "ETag": listing["etag"],
+        "Cache-Control": f"private, max-age={settings.wordpress_listing_ttl}",
+        "X-Cache": listing["source"]
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), listing["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=listing["body"], media_type="application/json", headers=headers)
+
+
+@router.get("/categories")
+async def get_categories(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Query(None, alias="_fields")
+):
+    """Get WordPress categories, one page at a time"""
+    return await _proxy_get(request, "/categories", "Failed to fetch categories",
+                            page=page, per_page=per_page, _fields=fields)
+
 
 @router.get("/tags")
-async def get_tags():
-    """Get all WordPress tags"""
-    try:
-        import requests
-        response = requests.get(
-            f"{wordpress_publisher.wp_url}/wp-json/wp/v2/tags",
-            auth=wordpress_publisher.auth
-        )
-        
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        else:
-            raise HTTPException(status_code=response.status_code, detail="Failed to fetch tags")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_tags(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(100, ge=1, le=100),
+    fields: Optional[str] = Query(None, alias="_fields")
+):
+    """Get WordPress tags, one page at a time"""
+    return await _proxy_get(request, "/tags", "Failed to fetch tags",
+                            page=page, per_page=per_page, _fields=fields)
 
 
 @router.get("/posts/drafts")
-async def get_draft_posts():
-    """Get all draft posts"""
-    try:
-        import requests
-        response = requests.get(
-            f"{wordpress_publisher.wp_url}/wp-json/wp/v2/posts",
-            params={'status': 'draft'},
-            auth=wordpress_publisher.auth
-        )
-        
-        if response.status_code == 200:
-            return JSONResponse(content=response.json())
-        else:
-            raise HTTPException(status_code=response.status_code, detail="Failed to fetch drafts")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+async def get_draft_posts(
+    request: Request,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, alias="_fields")
+):
+    """Get draft posts, one page at a time"""
+    return await _proxy_get(request, "/posts", "Failed to fetch drafts",
+                            status='draft', page=page, per_page=per_page, _fields=fields)
@@ -0,0 +1,105 @@
+# backend/app/services/circuit_breaker.py
+import time
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream is down.
+
+    ``failure_threshold`` consecutive failures open the circuit, and calls
+    are then rejected without touching the network. After
+    ``reset_seconds`` the circuit is half-open: a single trial call is let
+    through, and its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self.times_opened = 0
+        self._trial = False
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without claiming it)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_after() == 0
+        return not self._trial
+
+    def check(self):
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == OPEN and self.retry_after() == 0:
+            self.state = HALF_OPEN
+            self._trial = False
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and not self._trial:
+            self._trial = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit {self.state}, retry in {self.retry_after():.0f}s)")
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a trial call through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.time())
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"Circuit {self.name} closed")
+        self.state = CLOSED
+        self.failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                print(f"Circuit {self.name} opened after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def release(self):
+        """Forget an admitted call that ended without a verdict (e.g. cancelled)"""
+        self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+_circuits: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit(name: str) -> CircuitBreaker:
+    """One breaker per upstream name, shared by every caller in the process"""
+    if name not in _circuits:
+        _circuits[name] = CircuitBreaker(
+            name,
+            failure_threshold=settings.wordpress_circuit_failure_threshold,
+            reset_seconds=settings.wordpress_circuit_reset_seconds
+        )
+    return _circuits[name]
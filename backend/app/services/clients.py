@@ -0,0 +1,145 @@
+# backend/app/services/clients.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from ..config import settings
+from ..utils.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_SECONDS, record_upstream_error
+
+
+class _LoopClients:
+    """Clients sharing one pooled httpx transport on a single event loop"""
+
+    def __init__(self):
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+            follow_redirects=True
+        )
+        self._anthropic: Optional[AsyncAnthropic] = None
+        self._openai: Optional[AsyncOpenAI] = None
+        self._wordpress: Optional[httpx.AsyncClient] = None
+        self.limits = {
+            "anthropic": asyncio.Semaphore(settings.anthropic_concurrency),
+            "openai": asyncio.Semaphore(settings.openai_concurrency),
+            "wordpress": asyncio.Semaphore(settings.wordpress_concurrency),
+        }
+
+    @property
+    def anthropic(self) -> AsyncAnthropic:
+        if self._anthropic is None:
+            kwargs = {"api_key": settings.anthropic_api_key, "http_client": self.http}
+            if settings.anthropic_base_url:
+                kwargs["base_url"] = settings.anthropic_base_url
+            self._anthropic = AsyncAnthropic(**kwargs)
+        return self._anthropic
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            kwargs = {"api_key": settings.openai_api_key, "http_client": self.http}
+            if settings.openai_base_url:
+                kwargs["base_url"] = settings.openai_base_url
+            self._openai = AsyncOpenAI(**kwargs)
+        return self._openai
+
+    @property
+    def wordpress(self) -> httpx.AsyncClient:
+        # WordPress gets short timeouts and its own pool, so a slow site
+        # cannot hold connections the model APIs need
+        if self._wordpress is None:
+            self._wordpress = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.wordpress_max_connections,
+                    max_keepalive_connections=settings.wordpress_max_keepalive_connections
+                ),
+                timeout=httpx.Timeout(settings.wordpress_timeout, connect=settings.wordpress_connect_timeout),
+                follow_redirects=True
+            )
+        return self._wordpress
+
+    async def aclose(self):
+        await self.http.aclose()
+        if self._wordpress is not None:
+            await self._wordpress.aclose()
+
+
+# Pooled connections belong to the loop that opened them, so each running
+# loop gets its own set. The app itself only ever runs one.
+_clients: Dict[Optional[asyncio.AbstractEventLoop], _LoopClients] = {}
+
+
+def _current() -> _LoopClients:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    for known in [key for key in _clients if key is not None and key.is_closed()]:
+        del _clients[known]
+
+    if loop not in _clients:
+        _clients[loop] = _LoopClients()
+    return _clients[loop]
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP client"""
+    return _current().http
+
+
+def get_anthropic_client() -> AsyncAnthropic:
+    """Shared Anthropic client backed by the pooled HTTP client"""
+    return _current().anthropic
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Shared OpenAI client backed by the pooled HTTP client"""
+    return _current().openai
+
+
+def get_wordpress_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP client for the WordPress REST API"""
+    return _current().wordpress
+
+
+@asynccontextmanager
+async def upstream_slot(upstream: str) -> AsyncIterator[None]:
+    """Hold one of the configured concurrent-call slots for an upstream.
+
+    Upstreams are "anthropic", "openai" and "wordpress"; the limits apply
+    to every caller in the process (routes, jobs and batches alike). Time
+    spent holding the slot, calls in progress and exceptions raised are
+    recorded per upstream.
+    """
+    async with _current().limits[upstream]:
+        started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc(upstream=upstream)
+        try:
+            yield
+        except Exception as e:
+            record_upstream_error(upstream, type(e).__name__)
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(upstream=upstream)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream=upstream)
+
+
+async def close_clients():
+    """Close the pooled connections of the running loop"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    clients = _clients.pop(loop, None)
+    if clients is not None:
+        await clients.aclose()
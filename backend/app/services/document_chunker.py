@@ -0,0 +1,192 @@
+# backend/app/services/document_chunker.py
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Rough English average; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+PAGE_BREAK = "\f"
+
+# Lines that usually open a new section of minutes/agendas
+_SECTION_HEADING = re.compile(
+    r"^\s*(?:[IVXLC]+\.|\d+(?:\.\d+)*[.)]|[A-Z][.)]|(?:ITEM|SECTION|ARTICLE|AGENDA ITEM)\b|[A-Z][A-Z0-9 ,&'/-]{3,}:?$)",
+    re.IGNORECASE
+)
+
+LIST_FIELDS = ["attendees", "key_decisions", "discussions", "important_announcements"]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_document(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most ``max_tokens`` estimated tokens.
+
+    Page breaks are preferred split points, then section headings, then
+    paragraphs and lines; only text without any of those is cut mid-line.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+
+    units: List[str] = []
+    for page in text.split(PAGE_BREAK):
+        units.extend(_split_unit(page, max_chars, _sections))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for unit in units:
+        if current and size + len(unit) > max_chars:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit)
+    if current:
+        chunks.append("".join(current))
+
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class PageChunker:
+    """Pack pages into chunks as they arrive, with ``split_document``'s boundaries.
+
+    ``add`` returns the chunks a page completes, so structuring can start
+    while later pages are still being extracted. ``finish`` returns the
+    rest; a document that never filled a chunk is split as a whole.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.max_chars = max_tokens * CHARS_PER_TOKEN
+        self.emitted = 0
+        self._current: List[str] = []
+        self._size = 0
+
+    def add(self, page: str) -> List[str]:
+        chunks: List[str] = []
+        for unit in _split_unit(page, self.max_chars, _sections):
+            if self._current and self._size + len(unit) > self.max_chars:
+                chunks.append("".join(self._current))
+                self._current, self._size = [], 0
+            self._current.append(unit)
+            self._size += len(unit)
+        return self._emit(chunks)
+
+    def finish(self, text: str) -> List[str]:
+        if not self.emitted:
+            return split_document(text, self.max_tokens)
+        return self._emit(["".join(self._current)])
+
+    def _emit(self, chunks: List[str]) -> List[str]:
+        chunks = [chunk for chunk in chunks if chunk.strip()]
+        self.emitted += len(chunks)
+        return chunks
+
+
+def _split_unit(text: str, max_chars: int, splitter: Optional[Callable[[str], List[str]]]) -> List[str]:
+    """Break ``text`` with progressively finer splitters until pieces fit"""
+    if len(text) <= max_chars:
+        return [text]
+
+    finer = {_sections: _paragraphs, _paragraphs: _lines, _lines: None}
+    if splitter is None:
+        return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+
+    pieces = splitter(text)
+    if len(pieces) <= 1:
+        return _split_unit(text, max_chars, finer[splitter])
+
+    result: List[str] = []
+    for piece in pieces:
+        result.extend(_split_unit(piece, max_chars, finer[splitter]))
+    return result
+
+
+def _sections(text: str) -> List[str]:
+    lines = text.splitlines(keepends=True)
+    sections: List[str] = []
+    current: List[str] = []
+    for line in lines:
+        if current and _SECTION_HEADING.match(line):
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return sections
+
+
+def _paragraphs(text: str) -> List[str]:
+    parts = re.split(r"(\n\s*\n)", text)
+    # Keep the blank-line separators attached to the preceding paragraph
+    return ["".join(parts[i:i + 2]) for i in range(0, len(parts), 2) if "".join(parts[i:i + 2])]
+
+
+def _lines(text: str) -> List[str]:
+    return text.splitlines(keepends=True)
+
+
+def merge_structured(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk structuring results into one document record.
+
+    Scalar fields take the first value a chunk provided; list fields are
+    concatenated in document order with near-duplicates removed.
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    merged: Dict[str, Any] = {
+        "document_type": _first(part.get("document_type") for part in parts if part.get("document_type") != "general") or "general",
+        "date": _first(part.get("date") for part in parts),
+        "title": _first(part.get("title") for part in parts),
+    }
+
+    for field in LIST_FIELDS:
+        merged[field] = _dedupe(
+            (item for part in parts for item in part.get(field) or []),
+            key=_normalize
+        )
+
+    merged["action_items"] = _dedupe(
+        (item for part in parts for item in part.get("action_items") or []),
+        key=lambda item: _normalize(item.get("item") if isinstance(item, dict) else item)
+    )
+    merged["upcoming_events"] = _dedupe(
+        (item for part in parts for item in part.get("upcoming_events") or []),
+        key=lambda item: (
+            _normalize(item.get("event")), _normalize(item.get("date"))
+        ) if isinstance(item, dict) else _normalize(item)
+    )
+
+    summaries = [part["summary"].strip() for part in parts if part.get("summary")]
+    merged["summary"] = " ".join(summaries)
+
+    raw = [part["raw_content"] for part in parts if part.get("raw_content")]
+    if raw:
+        merged["raw_content"] = "\n".join(raw)[:5000]
+
+    merged["chunks"] = len(parts)
+    return merged
+
+
+def _first(values: Iterable[Any]) -> Any:
+    return next((value for value in values if value), None)
+
+
+def _normalize(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def _dedupe(items: Iterable[Any], key: Callable[[Any], Any]) -> List[Any]:
+    seen = set()
+    result = []
+    for item in items:
+        marker = key(item)
+        if not marker or marker in seen:
+            continue
+        seen.add(marker)
+        result.append(item)
+    return result
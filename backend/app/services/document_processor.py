@@ -1,47 +1,174 @@
 # backend/app/services/document_processor.py
-import PyPDF2
 from docx import Document
-from anthropic import Anthropic
-from typing import Dict, Optional
+from anthropic import AsyncAnthropic
+from typing import Dict, List, Optional
+import asyncio
 import json
+import time
 from ..config import settings
+from ..utils.cache import TieredCache, hash_file, make_cache_key
+from ..utils.metrics import record_token_usage, span
+from ..utils.singleflight import SingleFlight
+from .clients import get_anthropic_client, upstream_slot
+from .document_chunker import PageChunker, merge_structured, split_document
+from .pdf_extractor import PDFExtractor
 import os
 
+# Bump whenever extraction or _request_structure changes so stored documents are not reused
+STRUCTURE_PROMPT_VERSION = "2"
+
+PDF_TYPES = ['application/pdf', 'pdf']
+
 class DocumentProcessor:
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
-        
-    async def process_document(self, file_path: str, file_type: str) -> Dict:
-        """Process uploaded document and extract structured information"""
-        
-        # Extract text based on file type
-        if file_type in ['application/pdf', 'pdf']:
-            text = self._extract_pdf_text(file_path)
-        elif file_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'docx']:
-            text = self._extract_docx_text(file_path)
-        elif file_type in ['text/plain', 'txt']:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+    def __init__(self, client: Optional[AsyncAnthropic] = None, store: Optional[TieredCache] = None):
+        self._client = client
+        self.store = store or TieredCache(
+            "documents",
+            ttl_seconds=settings.document_cache_ttl,
+            max_entries=settings.document_cache_max_entries,
+            directory=os.path.join(settings.cache_dir, "documents"),
+            max_disk_entries=settings.document_cache_max_disk_entries
+        )
+        self.inflight = SingleFlight("structure")
+        self.pdf_extractor = PDFExtractor(
+            workers=settings.pdf_workers,
+            pages_per_task=settings.pdf_pages_per_task,
+            min_parallel_pages=settings.pdf_parallel_min_pages
+        )
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        return self._client or get_anthropic_client()
+        
+    async def process_document(
+        self,
+        file_path: str,
+        file_type: str,
+        sha256: Optional[str] = None,
+        bypass_cache: bool = False
+    ) -> Dict:
+        """Process uploaded document and extract structured information.
+        
+        Results are stored by the file's SHA-256, model and prompt version,
+        so re-uploading the same document skips extraction and structuring;
+        ``bypass_cache`` forces both and refreshes the entry. Pass
+        ``sha256`` when the upload was already hashed.
+        """
+        
+        sha256 = sha256 or await asyncio.to_thread(hash_file, file_path)
+        store_key = self._store_key(sha256)
+        if not bypass_cache:
+            stored = self.store.get(store_key)
+            if stored is not None:
+                print(f"Document store hit for {sha256[:12]}")
+                structured_data = stored["structured"]
+                structured_data["full_text"] = stored["text"]
+                structured_data["extraction"] = {**stored["extraction"], "cached": True}
+                return structured_data
+        
+        # PDFs are structured chunk by chunk while later pages are still extracted
+        extraction = {}
+        if file_type in PDF_TYPES:
+            structured_data = await self.inflight.do(
+                make_cache_key("pdf", sha256, settings.default_model),
+                lambda: self._process_pdf(file_path)
+            )
+            text = structured_data["full_text"]
+            extraction = structured_data.pop("extraction")
         else:
-            raise ValueError(f"Unsupported file type: {file_type}")
+            # Extract text based on file type
+            async with span("extract", file_type=file_type):
+                if file_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'docx']:
+                    text = self._extract_docx_text(file_path)
+                elif file_type in ['text/plain', 'txt']:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        text = f.read()
+                else:
+                    raise ValueError(f"Unsupported file type: {file_type}")
+            
+            # Use Claude to structure the information
+            async with span("structure", characters=len(text)):
+                structured_data = await self._structure_document(text)
+        extraction = {"sha256": sha256, **extraction}
         
-        # Use Claude to structure the information
-        structured_data = await self._structure_document(text)
+        # Unparseable responses (kept as raw_content) are retried next time
+        if "raw_content" not in structured_data:
+            self.store.set(
+                store_key,
+                {
+                    "text": text,
+                    "structured": {k: v for k, v in structured_data.items() if k != "full_text"},
+                    "extraction": extraction
+                },
+                metadata={
+                    "sha256": sha256,
+                    "file_type": file_type,
+                    "characters": len(text),
+                    "model": settings.default_model,
+                    "prompt_version": STRUCTURE_PROMPT_VERSION
+                }
+            )
         
+        structured_data["extraction"] = {**extraction, "cached": False}
         return structured_data
     
-    def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
+    def _store_key(self, sha256: str) -> str:
+        return make_cache_key(
+            sha256,
+            settings.default_model,
+            settings.structure_chunk_tokens,
+            STRUCTURE_PROMPT_VERSION
+        )
+    
+    async def _process_pdf(self, file_path: str) -> Dict:
+        """Extract and structure a PDF, overlapping the two.
+        
+        Pages are packed into chunks as ``iter_pages`` yields them, and each
+        full chunk is sent for structuring immediately, so only the last
+        chunk waits for the whole extraction. Returns the merged structure
+        with ``full_text`` and the extraction timings under ``extraction``.
+        """
+        chunker = PageChunker(settings.structure_chunk_tokens)
+        pages = []
+        requests: List[asyncio.Task] = []
+        
+        def send(chunks: List[str], total: Optional[int] = None):
+            for chunk in chunks:
+                requests.append(asyncio.create_task(self._structure_part(chunk, len(requests) + 1, total)))
+        
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-        except Exception as e:
-            raise Exception(f"Error reading PDF: {str(e)}")
+            start = time.perf_counter()
+            async with span("extract", file_type="pdf"):
+                try:
+                    async for page in self.pdf_extractor.iter_pages(file_path):
+                        pages.append(page)
+                        send(chunker.add(page.text + "\n"))
+                except Exception as e:
+                    raise Exception(f"Error reading PDF: {str(e)}")
+            extraction = self.pdf_extractor.assemble(pages, time.perf_counter() - start)
+            print(f"Extracted {len(pages)} PDF pages in {extraction.seconds:.2f}s")
+            
+            # Before the first full chunk the document size was unknown
+            streamed = len(requests)
+            remaining = chunker.finish(extraction.text) or [extraction.text]
+            send(remaining, None if streamed else len(remaining))
+            if streamed:
+                print(f"Structuring document in {len(requests)} chunks, {streamed} during extraction")
+            
+            parts = await asyncio.gather(*requests)
+        except BaseException:
+            for request in requests:
+                request.cancel()
+            raise
         
-        return text
+        structured_data = merge_structured(list(parts))
+        structured_data["full_text"] = extraction.text
+        structured_data["extraction"] = extraction.timings()
+        return structured_data
+    
+    async def _structure_part(self, text: str, part: int, total: Optional[int]) -> Dict:
+        async with span("structure", part=part, characters=len(text)):
+            return await self._request_structure(text, part, total)
     
     def _extract_docx_text(self, file_path: str) -> str:
         """Extract text from Word document"""
@@ -54,12 +181,56 @@ class DocumentProcessor:
         return text
     
     async def _structure_document(self, text: str) -> Dict:
-        """Use Claude to extract structured data from document"""
+        """Use Claude to extract structured data from document.
+        
+        Concurrent requests for the same text share one upstream call.
+        """
+        
+        return await self.inflight.do(
+            make_cache_key(text, settings.default_model),
+            lambda: self._structure_chunks(text)
+        )
+    
+    async def _structure_chunks(self, text: str) -> Dict:
+        """Structure the whole document, map-reducing over chunks.
+        
+        Text over ``structure_chunk_tokens`` is split on page and section
+        boundaries, every chunk is structured in parallel and the results
+        are merged, so long minutes are processed completely.
+        """
+        
+        chunks = split_document(text, settings.structure_chunk_tokens) or [text]
+        if len(chunks) > 1:
+            print(f"Structuring document in {len(chunks)} chunks")
+        
+        parts = await asyncio.gather(*[
+            self._request_structure(chunk, index + 1, len(chunks))
+            for index, chunk in enumerate(chunks)
+        ])
+        
+        structured_data = merge_structured(list(parts))
+        
+        # Add full text for reference
+        structured_data["full_text"] = text
+        
+        return structured_data
+    
+    async def _request_structure(self, text: str, part: int = 1, total: Optional[int] = 1) -> Dict:
+        """Ask Claude for the structured JSON of a document or one of its chunks.
+        
+        ``total`` is None for chunks sent before the document's length is known.
+        """
+        
+        if total == 1:
+            scope = ""
+        else:
+            of_total = f" of {total}" if total else ""
+            scope = f"\nThis is part {part}{of_total} of a longer document; extract only what appears in this part.\n"
         
         prompt = f"""Analyze the following meeting minutes or document and extract structured information:
-
+{scope}
 DOCUMENT TEXT:
-{text[:15000]}  # Limit to ~15k chars to stay within context
+{text}
 
 Extract the following information in JSON format:
 {{
@@ -81,14 +252,16 @@ Extract the following information in JSON format:
 
 Be thorough and extract all relevant information. If a field doesn't apply, use an empty array or null."""
 
-        message = self.client.messages.create(
-            model=settings.default_model,
-            max_tokens=3000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        async with upstream_slot("anthropic"):
+            message = await self.client.messages.create(
+                model=settings.default_model,
+                max_tokens=3000,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            )
+        record_token_usage(settings.default_model, message.usage)
         
         # Extract JSON from response
         response_text = message.content[0].text
@@ -110,7 +283,4 @@ Be thorough and extract all relevant information. If a field doesn't apply, use
                 "raw_content": text[:5000]
             }
         
-        # Add full text for reference
-        structured_data["full_text"] = text
-        
         return structured_data
\ No newline at end of file
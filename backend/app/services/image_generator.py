@@ -1,32 +1,72 @@
 # backend/app/services/image_generator.py
-from openai import OpenAI
+from openai import AsyncOpenAI
 from typing import Optional
-import requests
 from ..config import settings
-import os
+from ..utils.cache import make_cache_key
+from ..utils.metrics import record_image_usage, record_upstream_error, span
+from ..utils.singleflight import SingleFlight
+from .clients import get_openai_client, get_http_client, upstream_slot
+from .image_processor import ImageProcessor, ProcessedImage
+
+IMAGE_MODEL = "dall-e-3"
+
+PROMPT_STYLE = "Professional, clean, modern digital illustration. "
+
+# Safety constraints added to every prompt
+PROMPT_CONSTRAINTS = """
+        Avoid: Specific political figures, partisan symbols, controversial imagery.
+        Include: Abstract concepts, Virginia landmarks, community themes, patriotic colors.
+        Style: Clean, professional, inclusive, appropriate for government/political newsletter.
+        """
 
 class ImageGenerator:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    def __init__(self, client: Optional[AsyncOpenAI] = None, processor: Optional[ImageProcessor] = None):
+        self._client = client
+        self.inflight = SingleFlight("image")
+        self.processor = processor or ImageProcessor(
+            image_format=settings.image_format,
+            quality=settings.image_quality,
+            max_width=settings.image_max_width,
+            thumbnail_width=settings.image_thumbnail_width,
+            workers=settings.image_workers
+        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return self._client or get_openai_client()
         
     async def generate_image(
         self, 
         description: str, 
         style: str = "professional"
     ) -> str:
-        """Generate an image using DALL-E 3"""
+        """Generate an image using DALL-E 3.
+        
+        Concurrent requests for the same prompt share one generation.
+        """
         
         # Refine prompt for political appropriateness
         refined_prompt = self._refine_prompt(description, style)
         
-        try:
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=refined_prompt,
-                size="1792x1024",
-                quality="standard",
-                n=1
+        async with span("image_generate"):
+            return await self.inflight.do(
+                make_cache_key(refined_prompt),
+                lambda: self._request_image(refined_prompt)
             )
+    
+    async def _request_image(self, refined_prompt: str) -> str:
+        """Ask DALL-E 3 for one image and return its URL"""
+        
+        try:
+            async with upstream_slot("openai"):
+                response = await self.client.images.generate(
+                    model=IMAGE_MODEL,
+                    prompt=refined_prompt,
+                    size="1792x1024",
+                    quality="standard",
+                    n=1
+                )
+            record_image_usage(IMAGE_MODEL, len(response.data))
             
             return response.data[0].url
             
@@ -38,30 +78,30 @@ class ImageGenerator:
     def _refine_prompt(self, description: str, style: str) -> str:
         """Refine image prompt for political appropriateness"""
         
-        base_style = "Professional, clean, modern digital illustration. "
-        
-        # Add safety constraints
-        constraints = """
-        Avoid: Specific political figures, partisan symbols, controversial imagery.
-        Include: Abstract concepts, Virginia landmarks, community themes, patriotic colors.
-        Style: Clean, professional, inclusive, appropriate for government/political newsletter.
-        """
-        
-        return f"{base_style}{description}. {constraints}"
+        return f"{PROMPT_STYLE}{description}. {PROMPT_CONSTRAINTS}"
     
-    async def download_image(self, image_url: str, save_path: str) -> str:
-        """Download generated image to local storage"""
+    async def fetch_image(self, image_url: str) -> bytes:
+        """Stream a generated image into memory"""
         
         try:
-            response = requests.get(image_url)
-            response.raise_for_status()
-            
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+            buffer = bytearray()
+            async with span("image_download") as record:
+                async with get_http_client().stream("GET", image_url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        buffer.extend(chunk)
+                        if len(buffer) > settings.image_max_download_bytes:
+                            raise ValueError(f"image exceeds {settings.image_max_download_bytes} bytes")
+                record["bytes"] = len(buffer)
             
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            
-            return save_path
+            return bytes(buffer)
             
         except Exception as e:
-            raise Exception(f"Image download failed: {str(e)}")
\ No newline at end of file
+            record_upstream_error("image_download", type(e).__name__)
+            raise Exception(f"Image download failed: {str(e)}")
+    
+    async def prepare_image(self, image_url: str) -> ProcessedImage:
+        """Download a generated image and compress it for upload, without touching disk"""
+        data = await self.fetch_image(image_url)
+        async with span("image_encode", format=self.processor.image_format):
+            return await self.processor.process(data)
@@ -0,0 +1,218 @@
+# backend/app/services/image_library.py
+import math
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from ..config import settings
+from ..models import LibraryImage
+from ..utils.database import Database, get_database
+from .image_generator import PROMPT_CONSTRAINTS, PROMPT_STYLE
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS image_library (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        wp_url TEXT NOT NULL,
+        media_id INTEGER NOT NULL,
+        source_url TEXT,
+        description TEXT NOT NULL,
+        prompt TEXT NOT NULL,
+        tags TEXT NOT NULL,
+        uses INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        last_used_at REAL,
+        UNIQUE (wp_url, media_id)
+    )"""
+]
+
+STOPWORDS = {
+    "a", "an", "and", "at", "by", "for", "from", "in", "into", "of", "on", "or", "the", "to", "with"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z0-9]+", (text or "").lower()) if word not in STOPWORDS]
+
+
+class LibraryMatch(NamedTuple):
+    image: LibraryImage
+    score: float
+
+
+class ImageLibrary:
+    """Generated featured images, reusable for articles with a similar theme.
+
+    Every uploaded image is indexed by its refined DALL-E prompt and the
+    article's tags. Lookups rank the library by TF-IDF cosine similarity
+    against the new description; a match at or above ``threshold`` is
+    reused from the WordPress media library instead of generating a new
+    image. The boilerplate every refined prompt carries (``templates``, by
+    default the style and safety text) is cut out of indexed prompts before
+    they are tokenized; its words still count when an article uses them.
+    The index is small and kept in memory; SQLite holds the entries across
+    restarts.
+    """
+
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        templates: Iterable[str] = (PROMPT_STYLE, PROMPT_CONSTRAINTS),
+        threshold: Optional[float] = None
+    ):
+        self.database = database or get_database(settings.database_url)
+        self.database.ensure_schema("image_library", SCHEMA)
+        self.threshold = settings.image_library_threshold if threshold is None else threshold
+        self._templates = [_collapse(template) for template in templates if template.strip()]
+        self._images: Dict[int, LibraryImage] = {}
+        self._terms: Dict[int, Counter] = {}
+        self.hits = 0
+        self.misses = 0
+        rows = self.database.run_sync(lambda connection: [dict(row) for row in connection.execute(
+            "SELECT * FROM image_library"
+        )])
+        for row in rows:
+            self._index(_to_image(row))
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def match(self, description: str, tags: Iterable[str] = (), wp_url: Optional[str] = None) -> Optional[LibraryMatch]:
+        """Most similar image for this WordPress site, if it clears the threshold"""
+        ranked = self.search(description, tags, wp_url, limit=1)
+        if ranked and ranked[0].score >= self.threshold:
+            return ranked[0]
+        return None
+
+    def search(
+        self,
+        description: str,
+        tags: Iterable[str] = (),
+        wp_url: Optional[str] = None,
+        limit: int = 5
+    ) -> List[LibraryMatch]:
+        """Nearest images by similarity, best first"""
+        candidates = [image_id for image_id, image in self._images.items() if wp_url in (None, image.wp_url)]
+        if not candidates:
+            return []
+
+        idf = self._idf()
+        query = self._vector(self._tokens(description, tags), idf)
+        ranked = []
+        for image_id in candidates:
+            score = _cosine(query, self._vector(self._terms[image_id], idf))
+            if score > 0:
+                ranked.append(LibraryMatch(self._images[image_id], round(score, 4)))
+        ranked.sort(key=lambda match: match.score, reverse=True)
+        return ranked[:limit]
+
+    async def add(
+        self,
+        description: str,
+        prompt: str,
+        media_id: int,
+        wp_url: str,
+        tags: Iterable[str] = (),
+        source_url: Optional[str] = None
+    ) -> LibraryImage:
+        """Index an uploaded image"""
+        tags = list(tags)
+        now = time.time()
+        await self.database.execute(
+            """INSERT INTO image_library (wp_url, media_id, source_url, description, prompt, tags, uses, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+               ON CONFLICT (wp_url, media_id) DO UPDATE SET
+                   source_url = excluded.source_url, description = excluded.description,
+                   prompt = excluded.prompt, tags = excluded.tags""",
+            (wp_url, media_id, source_url, description, prompt, "\n".join(tags), now)
+        )
+        row = await self.database.fetch_one(
+            "SELECT * FROM image_library WHERE wp_url = ? AND media_id = ?", (wp_url, media_id)
+        )
+        image = _to_image(row)
+        self._index(image)
+        return image
+
+    async def record_use(self, match: LibraryMatch):
+        self.hits += 1
+        now = time.time()
+        await self.database.execute(
+            "UPDATE image_library SET uses = uses + 1, last_used_at = ? WHERE id = ?", (now, match.image.id)
+        )
+        self._images[match.image.id] = match.image.model_copy(
+            update={"uses": match.image.uses + 1, "last_used_at": datetime.fromtimestamp(now)}
+        )
+
+    def record_miss(self):
+        self.misses += 1
+
+    def entries(self) -> List[LibraryImage]:
+        """Indexed images, newest first"""
+        return sorted(self._images.values(), key=lambda image: image.created_at, reverse=True)
+
+    async def delete(self, image_id: int) -> bool:
+        """Stop reusing an image (the WordPress media itself is kept)"""
+        if image_id not in self._images:
+            return False
+        await self.database.execute("DELETE FROM image_library WHERE id = ?", (image_id,))
+        del self._images[image_id]
+        del self._terms[image_id]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "images": len(self._images),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _index(self, image: LibraryImage):
+        self._images[image.id] = image
+        self._terms[image.id] = self._tokens(self._strip_templates(image.prompt), image.tags)
+
+    def _strip_templates(self, prompt: str) -> str:
+        prompt = _collapse(prompt)
+        for template in self._templates:
+            prompt = prompt.replace(template, " ")
+        return prompt
+
+    def _tokens(self, text: str, tags: Iterable[str]) -> Counter:
+        return Counter(tokenize(text) + [word for tag in tags for word in tokenize(tag)])
+
+    def _idf(self) -> Dict[str, float]:
+        documents = len(self._terms)
+        frequency = Counter(word for terms in self._terms.values() for word in terms)
+        return {word: math.log((1 + documents) / (1 + count)) + 1 for word, count in frequency.items()}
+
+    def _vector(self, terms: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+        # Words no indexed image uses get the highest weight, so they pull similarity down
+        unseen = math.log(1 + len(self._terms)) + 1
+        return {word: count * idf.get(word, unseen) for word, count in terms.items()}
+
+
+def _collapse(text: str) -> str:
+    """Single-space whitespace, so templates match however they were indented"""
+    return " ".join(text.split())
+
+
+def _cosine(left: Dict[str, float], right: Dict[str, float]) -> float:
+    dot = sum(weight * right.get(word, 0.0) for word, weight in left.items())
+    norm = math.sqrt(sum(w * w for w in left.values())) * math.sqrt(sum(w * w for w in right.values()))
+    return dot / norm if norm else 0.0
+
+
+def _to_image(row: Dict[str, Any]) -> LibraryImage:
+    return LibraryImage(
+        id=row["id"],
+        wp_url=row["wp_url"],
+        media_id=row["media_id"],
+        source_url=row["source_url"],
+        description=row["description"],
+        prompt=row["prompt"],
+        tags=[tag for tag in row["tags"].split("\n") if tag],
+        uses=row["uses"],
+        created_at=datetime.fromtimestamp(row["created_at"]),
+        last_used_at=datetime.fromtimestamp(row["last_used_at"]) if row["last_used_at"] else None
+    )
@@ -0,0 +1,132 @@
+# backend/app/services/image_processor.py
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+from PIL import Image
+
+# format setting -> (Pillow format, content type, file extension)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+
+class ProcessedImage(NamedTuple):
+    data: bytes
+    content_type: str
+    extension: str
+    width: int
+    height: int
+    thumbnail: bytes
+    source_bytes: int
+    seconds: float
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}.{self.extension}"
+
+    def summary(self) -> Dict:
+        """Sizes and timing of the re-encode, without the image bytes"""
+        return {
+            "content_type": self.content_type,
+            "width": self.width,
+            "height": self.height,
+            "source_bytes": self.source_bytes,
+            "bytes": len(self.data),
+            "thumbnail_bytes": len(self.thumbnail),
+            "seconds": round(self.seconds, 3)
+        }
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    pil_format = FORMATS[image_format][0]
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=quality, optimize=pil_format == "JPEG")
+    return buffer.getvalue()
+
+
+def encode_image(
+    data: bytes,
+    image_format: str = "webp",
+    quality: int = 82,
+    max_width: int = 1600,
+    thumbnail_width: int = 400
+) -> ProcessedImage:
+    """Re-encode an image (and a thumbnail) in memory; runs in a pool worker"""
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as source:
+        image = source.copy()
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((thumbnail_width, thumbnail_width), Image.LANCZOS)
+
+    _, content_type, extension = FORMATS[image_format]
+    return ProcessedImage(
+        data=_encode(image, image_format, quality),
+        content_type=content_type,
+        extension=extension,
+        width=image.width,
+        height=image.height,
+        thumbnail=_encode(thumbnail, image_format, quality),
+        source_bytes=len(data),
+        seconds=time.perf_counter() - start
+    )
+
+
+# One pool per process, shared by every processor and closed on shutdown
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool(workers: int) -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+    return _pool
+
+
+def close_image_pool():
+    """Shut down the image encoding pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class ImageProcessor:
+    """Compress generated images before they are uploaded.
+
+    DALL-E returns multi-megabyte PNGs; these are downscaled to
+    ``max_width`` and re-encoded as WebP or JPEG, with a thumbnail, off the
+    event loop. Pillow releases the GIL while decoding, resizing and
+    encoding, so a thread pool runs them in parallel without copying the
+    image bytes into another process.
+    """
+
+    def __init__(
+        self,
+        image_format: str = "webp",
+        quality: int = 82,
+        max_width: int = 1600,
+        thumbnail_width: int = 400,
+        workers: int = 2
+    ):
+        if image_format not in FORMATS:
+            raise ValueError(f"Unsupported image format {image_format!r}; expected one of {sorted(FORMATS)}")
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.thumbnail_width = thumbnail_width
+        self.workers = max(1, workers)
+
+    async def process(self, data: bytes) -> ProcessedImage:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_pool(self.workers),
+            encode_image, data, self.image_format, self.quality, self.max_width, self.thumbnail_width
+        )
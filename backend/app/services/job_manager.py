@@ -0,0 +1,171 @@
+# backend/app/services/job_manager.py
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from ..config import settings
+from ..models import ContentType, JobInfo, JobStage, JobStatus
+
+JobRunner = Callable[[Callable[[str, str], None]], Awaitable[Dict]]
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue cannot accept more submissions"""
+
+
+class _JobState:
+    def __init__(self, info: JobInfo, runner: JobRunner):
+        self.info = info
+        self.runner = runner
+        self.events: List[Dict] = []
+        self.changed = asyncio.Event()
+        self.finished_monotonic: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.info.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def publish(self, event: Dict):
+        """Record an event and wake every listener waiting for one"""
+        self.events.append(event)
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class JobManager:
+    """In-process job queue drained by a bounded pool of asyncio workers"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        retention_seconds: Optional[int] = None
+    ):
+        self.worker_count = workers or settings.job_workers
+        self.queue_size = queue_size or settings.job_queue_size
+        self.retention_seconds = retention_seconds or settings.job_retention_seconds
+        self._jobs: Dict[str, _JobState] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start the worker pool"""
+        self._ensure_started()
+
+    async def stop(self):
+        """Cancel the worker pool, abandoning queued jobs"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, kind: ContentType, runner: JobRunner) -> JobInfo:
+        """Queue a pipeline run and return its job record immediately"""
+        self._ensure_started()
+        self._prune()
+
+        info = JobInfo(job_id=uuid.uuid4().hex, kind=kind)
+        state = _JobState(info, runner)
+
+        try:
+            self._queue.put_nowait(info.job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"Job queue is full ({self.queue_size} pending jobs)"
+            )
+
+        self._jobs[info.job_id] = state
+        state.publish({"type": "status", "status": info.status.value})
+        return info
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """Return the current job record"""
+        state = self._jobs.get(job_id)
+        return state.info if state else None
+
+    async def stream_events(self, job_id: str) -> AsyncIterator[Dict]:
+        """Yield every event of a job, replaying history first, until it finishes"""
+        state = self._jobs.get(job_id)
+        if state is None:
+            return
+
+        index = 0
+        while True:
+            while index < len(state.events):
+                yield state.events[index]
+                index += 1
+
+            if state.done:
+                return
+
+            await state.changed.wait()
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                state = self._jobs.get(job_id)
+                if state is not None:
+                    await self._run(state)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, state: _JobState):
+        info = state.info
+        info.status = JobStatus.RUNNING
+        info.started_at = datetime.now()
+        state.publish({"type": "status", "status": info.status.value})
+
+        def progress(stage: str, status: str):
+            now = datetime.now()
+            current = next((s for s in info.stages if s.name == stage), None)
+            if current is None:
+                current = JobStage(name=stage, status=status, started_at=now)
+                info.stages.append(current)
+            else:
+                current.status = status
+            if status != "started":
+                current.finished_at = now
+            state.publish({"type": "stage", "stage": stage, "status": status})
+
+        try:
+            info.result = await state.runner(progress)
+            info.status = JobStatus.SUCCEEDED
+        except asyncio.CancelledError:
+            info.status = JobStatus.FAILED
+            info.error = "Job cancelled"
+            raise
+        except Exception as e:
+            print(f"Job {info.job_id} failed: {e}")
+            info.status = JobStatus.FAILED
+            info.error = str(e)
+        finally:
+            info.finished_at = datetime.now()
+            state.finished_monotonic = time.monotonic()
+            state.publish({
+                "type": "status",
+                "status": info.status.value,
+                "result": info.result,
+                "error": info.error
+            })
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            job_id for job_id, state in self._jobs.items()
+            if state.finished_monotonic is not None and state.finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
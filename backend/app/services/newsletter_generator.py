@@ -1,21 +1,62 @@
 # backend/app/services/newsletter_generator.py
 # Correct fix for Anthropic SDK
-from anthropic import Anthropic
-from typing import Dict, Optional
+from anthropic import AsyncAnthropic
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import json
+import os
 from ..config import settings
 from ..models import ContentType, NewsletterContent
+from ..utils.json_stream import IncrementalJSONParser
+from ..utils.metrics import USAGE_FIELDS, record_token_usage, span
+from .clients import get_anthropic_client, upstream_slot
+from .prompt_budget import PromptAssembler
 import yaml
 
+# Fields whose text is forwarded piecewise while the model is still writing
+STREAMED_FIELDS = {"body"}
+
+# Array fields whose elements are forwarded one by one as they complete
+ITEMIZED_FIELDS = {"suggested_images"}
+
+CONFIG_PATH = 'config/newsletter_config.yaml'
+
+# Token budgets for the raw-text sections of each generation prompt. The
+# structured meeting summary is always sent in full, so no decision, action
+# item or attendee is ever dropped.
+SECTION_BUDGETS = {
+    ContentType.RESEARCH: {"context": 500, "research": 2500},
+    ContentType.MINUTES: {"source": 3000},
+    ContentType.HYBRID: {"source": 1500, "research": 2000}
+}
+
+# Order of the meeting fields in the prompt, most important first;
+# the raw document text is sent only when structuring found nothing
+MEETING_FIELD_PRIORITY = [
+    "highlight_items", "additional_context", "title", "date", "document_type",
+    "summary", "key_decisions", "action_items", "upcoming_events",
+    "important_announcements", "discussions", "attendees"
+]
+MEETING_CONTENT_FIELDS = [
+    "key_decisions", "action_items", "upcoming_events", "important_announcements", "discussions"
+]
+MEETING_EXCLUDED_FIELDS = {"full_text", "raw_content", "extraction", "chunks"}
+
 class NewsletterGenerator:
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+    def __init__(self, client: Optional[AsyncAnthropic] = None):
+        self._client = client
         self.style_guidelines = self._load_style_guidelines()
+        self._system_prompt_version = None
+        self._system_prompt_blocks: List[Dict] = []
+        self.usage = {"requests": 0, **{field: 0 for field in USAGE_FIELDS}}
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        return self._client or get_anthropic_client()
         
     def _load_style_guidelines(self) -> str:
         """Load style guidelines from config"""
         try:
-            with open('config/newsletter_config.yaml', 'r') as f:
+            with open(CONFIG_PATH, 'r') as f:
                 config = yaml.safe_load(f)
                 return config.get('style', {}).get('guidelines', '')
         except:
@@ -36,25 +77,21 @@ class NewsletterGenerator:
     ) -> NewsletterContent:
         """Generate newsletter content based on input type"""
         
-        if content_type == ContentType.RESEARCH:
-            prompt = self._build_research_prompt(input_data, word_count)
-        elif content_type == ContentType.MINUTES:
-            prompt = self._build_minutes_prompt(input_data, word_count)
-        elif content_type == ContentType.HYBRID:
-            prompt = self._build_hybrid_prompt(input_data, word_count)
-        else:
-            raise ValueError(f"Unsupported content type: {content_type}")
+        prompt, prompt_report = self._build_prompt(content_type, input_data, word_count)
         
         # Generate newsletter
-        message = self.client.messages.create(
-            model=settings.default_model,
-            max_tokens=settings.max_tokens,
-            system=self._build_system_prompt(),
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        async with span("generate", model=settings.default_model):
+            async with upstream_slot("anthropic"):
+                message = await self.client.messages.create(
+                    model=settings.default_model,
+                    max_tokens=settings.max_tokens,
+                    system=self._system_prompt(),
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }]
+                )
+        usage = self._record_usage(message.usage)
         
         # CORRECT FIX: Extract text properly
         response_text = ""
@@ -63,9 +100,139 @@ class NewsletterGenerator:
                 response_text += block.text
         
         # Parse response
-        newsletter_data = self._parse_newsletter_response(response_text)
+        async with span("parse"):
+            newsletter_data = self._parse_newsletter_response(response_text)
+        
+        content = NewsletterContent(**newsletter_data)
+        content.metadata["usage"] = usage
+        content.metadata["prompt"] = prompt_report
+        return content
+    
+    async def stream_newsletter(
+        self,
+        content_type: ContentType,
+        input_data: Dict,
+        word_count: int = 800
+    ) -> AsyncIterator[Dict]:
+        """Generate newsletter content, yielding fields as soon as they complete.
+        
+        Yields ``{"type": "field", "name", "value"}`` for each finished
+        member, ``{"type": "item", "name", "value"}`` for each finished
+        suggested image, ``{"type": "body", "text"}`` for body text as it is
+        written, and finally ``{"type": "complete", "content"}`` with the full article.
+        """
+        
+        prompt, prompt_report = self._build_prompt(content_type, input_data, word_count)
+        parser = IncrementalJSONParser(stream_fields=STREAMED_FIELDS, item_fields=ITEMIZED_FIELDS)
+        response_text = ""
+        parse_failed = False
         
-        return NewsletterContent(**newsletter_data)
+        async with span("generate", model=settings.default_model, streamed=True), upstream_slot("anthropic"):
+            async with self.client.messages.stream(
+                model=settings.default_model,
+                max_tokens=settings.max_tokens,
+                system=self._system_prompt(),
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            ) as stream:
+                async for text in stream.text_stream:
+                    response_text += text
+                    if parse_failed:
+                        continue
+                
+                    try:
+                        events = parser.feed(text)
+                    except ValueError as e:
+                        # Fall back to parsing the complete response at the end
+                        print(f"Streaming JSON parse error: {e}")
+                        parse_failed = True
+                        continue
+                
+                    for kind, name, value in events:
+                        if kind == "chunk":
+                            yield {"type": "body", "text": value}
+                        elif kind == "item":
+                            yield {"type": "item", "name": name, "value": value}
+                        elif name not in STREAMED_FIELDS:
+                            yield {"type": "field", "name": name, "value": value}
+                
+                final_message = await stream.get_final_message()
+                usage = self._record_usage(final_message.usage)
+        
+        async with span("parse", streamed=True):
+            if parser.done and not parse_failed:
+                newsletter_data = parser.close()
+                newsletter_data.setdefault("sources", [])
+            else:
+                newsletter_data = self._parse_newsletter_response(response_text)
+        
+        content = NewsletterContent(**newsletter_data)
+        content.metadata["usage"] = usage
+        content.metadata["prompt"] = prompt_report
+        yield {"type": "complete", "content": content.dict()}
+    
+    def _build_prompt(self, content_type: ContentType, input_data: Dict, word_count: int) -> Tuple[str, Dict[str, Any]]:
+        """Build the user prompt for a content type, with its token report"""
+        
+        assembler = PromptAssembler()
+        if content_type == ContentType.RESEARCH:
+            prompt = self._build_research_prompt(input_data, word_count, assembler)
+        elif content_type == ContentType.MINUTES:
+            prompt = self._build_minutes_prompt(input_data, word_count, assembler)
+        elif content_type == ContentType.HYBRID:
+            prompt = self._build_hybrid_prompt(input_data, word_count, assembler)
+        else:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        return assembler.finish(prompt)
+    
+    def _meeting_sections(self, meeting_data: Dict, budgets: Dict[str, int], assembler: PromptAssembler) -> str:
+        """Compact meeting summary, plus a source excerpt only if structuring came back empty"""
+        
+        summary = {k: v for k, v in meeting_data.items() if k not in MEETING_EXCLUDED_FIELDS}
+        sections = assembler.structured("meeting", summary, None, MEETING_FIELD_PRIORITY)
+        
+        if not any(meeting_data.get(field) for field in MEETING_CONTENT_FIELDS):
+            source = meeting_data.get("full_text") or meeting_data.get("raw_content")
+            if source:
+                excerpt = assembler.text("source", source, budgets["source"])
+                sections += f"\n\nSOURCE DOCUMENT EXCERPT:\n{excerpt}"
+        return sections
+    
+    def _config_version(self) -> Optional[tuple]:
+        """Identify the current style config so edits invalidate the prompt"""
+        try:
+            stat = os.stat(CONFIG_PATH)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _system_prompt(self) -> List[Dict]:
+        """System prompt blocks, rebuilt only when the style config changes.
+        
+        The prompt is identical across generations, so it carries a
+        cache_control breakpoint and repeat calls read it from Anthropic's
+        prompt cache instead of paying for it as fresh input.
+        """
+        version = self._config_version()
+        if not self._system_prompt_blocks or version != self._system_prompt_version:
+            self.style_guidelines = self._load_style_guidelines()
+            self._system_prompt_blocks = [{
+                "type": "text",
+                "text": self._build_system_prompt(),
+                "cache_control": {"type": "ephemeral"}
+            }]
+            self._system_prompt_version = version
+        return self._system_prompt_blocks
+    
+    def _record_usage(self, usage) -> Dict[str, int]:
+        """Add a response's token usage, including prompt cache reads and writes, to the totals"""
+        recorded = record_token_usage(settings.default_model, usage)
+        self.usage["requests"] += 1
+        for field, value in recorded.items():
+            self.usage[field] += value
+        return recorded
     
     def _build_system_prompt(self) -> str:
         """Build system prompt for newsletter generation"""
@@ -75,13 +242,13 @@ STYLE GUIDELINES:
 {self.style_guidelines}
 
 OUTPUT FORMAT:
-You must respond with valid JSON in exactly this structure:
+You must respond with valid JSON in exactly this structure, with the keys in this order:
 {{
     "title": "Compelling headline (60-80 characters)",
     "subtitle": "Optional subtitle providing context",
-    "body": "Full article in HTML format with proper tags (<p>, <h2>, <h3>, <strong>, <em>, <ul>, <ol>, <a>)",
     "excerpt": "2-3 sentence summary (150-200 characters)",
     "suggested_images": ["Description 1", "Description 2"],
+    "body": "Full article in HTML format with proper tags (<p>, <h2>, <h3>, <strong>, <em>, <ul>, <ol>, <a>)",
     "sources": [
         {{"title": "Source Name or Organization", "url": "", "accessed": ""}}
     ],
@@ -106,19 +273,20 @@ IN THE BODY TEXT:
 TONE:
 Professional, informative, engaging, and respectful. Represent conservative values authentically while remaining inclusive to all Goochland residents."""
 
-    def _build_research_prompt(self, data: Dict, word_count: int) -> str:
+    def _build_research_prompt(self, data: Dict, word_count: int, assembler: PromptAssembler) -> str:
         """Build prompt for research-based newsletter"""
         
-        research_findings = data.get('raw_content', '')
+        budgets = SECTION_BUDGETS[ContentType.RESEARCH]
+        research_findings = assembler.text("research", data.get('raw_content', ''), budgets["research"])
         topic = data.get('topic', 'Recent Developments')
-        context = data.get('context', '')
+        context = assembler.text("context", data.get('context', ''), budgets["context"])
         
         return f"""Create a newsletter article based on this research:
 
 TOPIC: {topic}
 
 RESEARCH FINDINGS:
-{research_findings[:10000]}
+{research_findings}
 
 ADDITIONAL CONTEXT:
 {context}
@@ -143,15 +311,17 @@ Then list those same sources in the "sources" array.
 
 Remember to output valid JSON as specified in your system prompt."""
 
-    def _build_minutes_prompt(self, data: Dict, word_count: int) -> str:
+    def _build_minutes_prompt(self, data: Dict, word_count: int, assembler: PromptAssembler) -> str:
         """Build prompt for minutes-based newsletter"""
         
-        structured_data = data.get('structured_data', {})
+        meeting = self._meeting_sections(
+            data.get('structured_data', {}), SECTION_BUDGETS[ContentType.MINUTES], assembler
+        )
         
         return f"""Create a newsletter article from these meeting minutes:
 
 MEETING INFORMATION:
-{json.dumps(structured_data, indent=2)}
+{meeting}
 
 TARGET LENGTH: {word_count} words
 
@@ -168,19 +338,21 @@ Use a narrative style that makes readers feel connected to the committee's work.
 
 Remember to output valid JSON as specified in your system prompt."""
 
-    def _build_hybrid_prompt(self, data: Dict, word_count: int) -> str:
+    def _build_hybrid_prompt(self, data: Dict, word_count: int, assembler: PromptAssembler) -> str:
         """Build prompt for hybrid newsletter"""
         
-        meeting_data = data.get('meeting_data', {})
+        budgets = SECTION_BUDGETS[ContentType.HYBRID]
+        meeting = self._meeting_sections(data.get('meeting_data', {}), budgets, assembler)
         research_data = data.get('research_data', {})
+        research_findings = assembler.text("research", research_data.get('raw_content', ''), budgets["research"])
         
         return f"""Create a comprehensive newsletter article combining meeting updates with topical research:
 
 MEETING SUMMARY:
-{json.dumps(meeting_data, indent=2)}
+{meeting}
 
 RESEARCH TOPIC & FINDINGS:
-{research_data.get('raw_content', '')[:8000]}
+{research_findings}
 
 TARGET LENGTH: {word_count} words
 
@@ -0,0 +1,537 @@
+# backend/app/services/newsletter_pipeline.py
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import base64
+import os
+import time
+import uuid
+from datetime import datetime
+
+from ..models import ContentType, NewsletterContent, ResearchRequest
+from ..utils.metrics import collect_spans, collect_usage
+from .research_engine import ResearchEngine
+from .document_processor import DocumentProcessor
+from .newsletter_generator import NewsletterGenerator
+from .image_generator import ImageGenerator
+from .wordpress_publisher import WordPressPublisher
+from .publish_outbox import PublishOutbox, is_retryable
+from .image_library import ImageLibrary
+from .stage_graph import StageGraph
+from .speculative_image import SpeculativeImage
+from .usage_ledger import UsageLedger
+from ..config import settings
+
+# progress(stage, status) where status is "started", "completed" or "failed"
+ProgressCallback = Callable[[str, str], None]
+
+# Receives NewsletterGenerator.stream_newsletter events as they are produced
+EventCallback = Callable[[Dict], None]
+
+class IncompleteGenerationError(Exception):
+    """Raised when a streamed generation ends without its complete article"""
+
+
+PENDING_WP_RESULT = {
+    'success': True,
+    'post_id': None,
+    'edit_url': 'Pending WordPress credentials',
+    'preview_url': 'Pending WordPress credentials'
+}
+
+
+class NewsletterPipeline:
+    """Research -> generation -> image -> WordPress chain shared by the
+    synchronous routes and the background job workers.
+
+    Each run is a StageGraph: input stages (structure, research) feed
+    ``generate``, whose output fans out to ``image`` and ``taxonomy`` in
+    parallel before ``publish`` creates the draft. With speculative images
+    enabled the featured image starts during ``generate``, as soon as the
+    streamed output names its first suggested image.
+    """
+
+    def __init__(
+        self,
+        research_engine: Optional[ResearchEngine] = None,
+        document_processor: Optional[DocumentProcessor] = None,
+        newsletter_generator: Optional[NewsletterGenerator] = None,
+        image_generator: Optional[ImageGenerator] = None,
+        wordpress_publisher: Optional[WordPressPublisher] = None,
+        publish_outbox: Optional[PublishOutbox] = None,
+        image_library: Optional[ImageLibrary] = None,
+        usage_ledger: Optional[UsageLedger] = None
+    ):
+        self.research_engine = research_engine or ResearchEngine()
+        self.document_processor = document_processor or DocumentProcessor()
+        self.newsletter_generator = newsletter_generator or NewsletterGenerator()
+        self.image_generator = image_generator or ImageGenerator()
+        self.wordpress_publisher = wordpress_publisher or WordPressPublisher()
+        self.publish_outbox = publish_outbox or PublishOutbox(self.wordpress_publisher)
+        if image_library is None and settings.image_library_enabled:
+            image_library = ImageLibrary()
+        self.image_library = image_library
+        self.usage_ledger = usage_ledger or UsageLedger()
+
+    async def run_research(
+        self,
+        request: ResearchRequest,
+        progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Dict:
+        """Generate newsletter from research topic"""
+        graph = StageGraph(progress)
+        speculative = self._speculative_image()
+
+        async def research(inputs):
+            print(f"Starting research for topic: {request.topic}")
+            research_data = await self.research_engine.research_topic(
+                topic=request.topic,
+                context=request.context,
+                sources=request.sources,
+                bypass_cache=request.bypass_cache
+            )
+            research_data['topic'] = request.topic
+            research_data['context'] = request.context or ""
+            return research_data
+
+        async def generate(inputs):
+            print("Generating newsletter content...")
+            return await self._generate(
+                ContentType.RESEARCH,
+                inputs['research'],
+                request.word_count or 800,
+                on_event,
+                speculative
+            )
+
+        graph.add("research", research)
+        graph.add("generate", generate, depends_on=["research"])
+        return await self._run(graph, ContentType.RESEARCH, "Newsletter header image", speculative)
+
+    async def run_batch(
+        self,
+        requests: List[ResearchRequest],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """Generate several research newsletters, yielding each outcome as it finishes.
+
+        At most ``max_concurrency`` items run at once; upstream calls are
+        further bounded by the per-upstream limits. A failed item is
+        reported and never aborts the rest of the batch.
+        """
+        limit = asyncio.Semaphore(max_concurrency or settings.batch_concurrency)
+
+        async def run_item(index: int, request: ResearchRequest) -> Dict:
+            async with limit:
+                try:
+                    result = await self.run_research(request)
+                    return {"index": index, "topic": request.topic, "success": True, "result": result}
+                except Exception as e:
+                    print(f"Batch item {index} ({request.topic}) failed: {e}")
+                    return {"index": index, "topic": request.topic, "success": False, "error": str(e)}
+
+        tasks = [asyncio.create_task(run_item(index, request)) for index, request in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_minutes(
+        self,
+        file_path: str,
+        file_type: str,
+        file_sha256: Optional[str] = None,
+        additional_context: Optional[str] = None,
+        highlight_items: Optional[List[str]] = None,
+        bypass_cache: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Dict:
+        """Generate newsletter from meeting minutes"""
+        graph = StageGraph(progress)
+        speculative = self._speculative_image()
+        extraction = {}
+
+        async def structure(inputs):
+            print(f"Processing document: {os.path.basename(file_path)}")
+            structured_data = await self.document_processor.process_document(
+                file_path=file_path,
+                file_type=file_type,
+                sha256=file_sha256,
+                bypass_cache=bypass_cache
+            )
+            extraction.update(structured_data.pop('extraction', {}))
+            if additional_context:
+                structured_data['additional_context'] = additional_context
+            if highlight_items:
+                structured_data['highlight_items'] = highlight_items
+            return structured_data
+
+        async def generate(inputs):
+            print("Generating newsletter from minutes...")
+            return await self._generate(
+                ContentType.MINUTES,
+                {'structured_data': inputs['structure']},
+                800,
+                on_event,
+                speculative
+            )
+
+        graph.add("structure", structure)
+        graph.add("generate", generate, depends_on=["structure"])
+        response = await self._run(graph, ContentType.MINUTES, "Meeting highlights", speculative)
+        if extraction:
+            response["extraction"] = extraction
+        return response
+
+    async def run_hybrid(
+        self,
+        file_path: str,
+        file_type: str,
+        research_topic: str,
+        file_sha256: Optional[str] = None,
+        research_context: Optional[str] = None,
+        minutes_context: Optional[str] = None,
+        bypass_cache: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Dict:
+        """Generate newsletter combining minutes and research"""
+        graph = StageGraph(progress)
+        speculative = self._speculative_image()
+        extraction = {}
+
+        async def structure(inputs):
+            print("Processing meeting minutes...")
+            meeting_data = await self.document_processor.process_document(
+                file_path=file_path,
+                file_type=file_type,
+                sha256=file_sha256,
+                bypass_cache=bypass_cache
+            )
+            extraction.update(meeting_data.pop('extraction', {}))
+            if minutes_context:
+                meeting_data['additional_context'] = minutes_context
+            return meeting_data
+
+        async def research(inputs):
+            print(f"Researching topic: {research_topic}")
+            return await self.research_engine.research_topic(
+                topic=research_topic,
+                context=research_context,
+                bypass_cache=bypass_cache
+            )
+
+        async def generate(inputs):
+            print("Generating hybrid newsletter...")
+            return await self._generate(
+                ContentType.HYBRID,
+                {
+                    'meeting_data': inputs['structure'],
+                    'research_data': inputs['research']
+                },
+                1000,
+                on_event,
+                speculative
+            )
+
+        # Document structuring and research are independent and overlap
+        graph.add("structure", structure)
+        graph.add("research", research)
+        graph.add("generate", generate, depends_on=["structure", "research"])
+        response = await self._run(graph, ContentType.HYBRID, "Newsletter header", speculative)
+        if extraction:
+            response["extraction"] = extraction
+        return response
+
+    async def _generate(
+        self,
+        content_type: ContentType,
+        input_data: Dict,
+        word_count: int,
+        on_event: Optional[EventCallback],
+        speculative: Optional[SpeculativeImage] = None
+    ) -> NewsletterContent:
+        """Generate the article, streaming partial output when someone
+        listens or a speculative image is waiting for its description"""
+        if on_event is None and speculative is None:
+            return await self.newsletter_generator.generate_newsletter(
+                content_type=content_type,
+                input_data=input_data,
+                word_count=word_count
+            )
+
+        content = None
+        async for event in self.newsletter_generator.stream_newsletter(
+            content_type=content_type,
+            input_data=input_data,
+            word_count=word_count
+        ):
+            if speculative and event["type"] == "item" and event["name"] == "suggested_images" \
+                    and not self._library_match(event["value"]):
+                speculative.speculate(event["value"])
+            if on_event:
+                on_event(event)
+            if event["type"] == "complete":
+                content = NewsletterContent(**event["content"])
+
+        if content is None:
+            # Later stages would otherwise fail far from the cause
+            raise IncompleteGenerationError("Newsletter stream ended before the article was complete")
+        return content
+
+    def _speculative_image(self) -> Optional[SpeculativeImage]:
+        if not settings.speculative_images:
+            return None
+        return SpeculativeImage(self.image_generator)
+
+    async def _record_usage(
+        self,
+        generation_id: str,
+        content_type: ContentType,
+        events: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Write a run's usage to the ledger; a ledger failure never fails the run"""
+        try:
+            return await self.usage_ledger.record(generation_id, content_type.value, events)
+        except Exception as e:
+            print(f"Could not record usage of generation {generation_id}: {e}")
+            return None
+
+    async def _run(
+        self,
+        graph: StageGraph,
+        content_type: ContentType,
+        default_image_description: str,
+        speculative: Optional[SpeculativeImage] = None
+    ) -> Dict:
+        """Attach the shared image/taxonomy/publish stages and execute the graph.
+
+        The upstream usage of the run is written to the usage ledger, even
+        when the run fails.
+        """
+        start_time = time.time()
+        generation_id = uuid.uuid4().hex
+
+        async def image(inputs):
+            return await self._create_featured_image(
+                inputs['generate'], default_image_description, speculative
+            )
+
+        async def taxonomy(inputs):
+            return await self._resolve_taxonomy(inputs['generate'])
+
+        async def publish(inputs):
+            return await self._create_draft(inputs['generate'], inputs['image'], inputs['taxonomy'])
+
+        graph.add("image", image, depends_on=["generate"])
+        graph.add("taxonomy", taxonomy, depends_on=["generate"])
+        graph.add("publish", publish, depends_on=["generate", "image", "taxonomy"])
+
+        with collect_spans() as spans, collect_usage() as usage_events:
+            try:
+                results = await graph.run()
+            finally:
+                if speculative:
+                    speculative.cancel()
+                usage = await self._record_usage(generation_id, content_type, usage_events)
+        response = self._build_response(results['generate'], results['image']['url'], results['publish'], start_time)
+        if results['publish'].get('outbox_id'):
+            response["outbox_id"] = results['publish']['outbox_id']
+        if results['publish'].get('error'):
+            response["wordpress_error"] = results['publish']['error']
+        prompt_warnings = results['generate'].metadata.get('prompt', {}).get('warnings')
+        if prompt_warnings:
+            response["warnings"] = prompt_warnings
+        if results['image'].get('library'):
+            response["image_library"] = results['image']['library']
+        processed = results['image']['processed']
+        if processed:
+            response["image_thumbnail"] = (
+                f"data:{processed.content_type};base64,{base64.b64encode(processed.thumbnail).decode('ascii')}"
+            )
+            response["image_processing"] = processed.summary()
+        response["critical_path"] = graph.critical_path()
+        response["stage_timings"] = graph.timings()
+        response["spans"] = sorted(spans, key=lambda record: record["start"])
+        response["newsletter_id"] = generation_id
+        if usage is not None:
+            response["usage"] = usage
+        if speculative:
+            response["image_speculation"] = speculative.outcome
+        return response
+
+    async def _create_featured_image(
+        self,
+        newsletter_content: NewsletterContent,
+        default_image_description: str,
+        speculative: Optional[SpeculativeImage] = None
+    ) -> Dict[str, Any]:
+        """Reuse a similar library image, or generate, compress and upload one in memory.
+
+        Best effort: failures are logged and the article is published
+        without a featured image. Returns the image ``url``, WordPress
+        ``media_id``, compressed ``data`` with its ``filename`` and
+        ``content_type``, ``alt`` text, ``processed`` image and the
+        ``library`` match, each possibly None.
+        """
+        print("Generating featured image...")
+        image = {
+            "url": None, "media_id": None, "data": None, "filename": None,
+            "content_type": None, "alt": default_image_description, "processed": None, "library": None
+        }
+        try:
+            image_description = newsletter_content.suggested_images[0] if newsletter_content.suggested_images else default_image_description
+            image["alt"] = image_description
+
+            match = self._library_match(image_description)
+            if match:
+                print(f"Reusing library image {match.image.id} (similarity {match.score})")
+                if speculative:
+                    speculative.cancel()
+                await self.image_library.record_use(match)
+                image.update(
+                    url=match.image.source_url,
+                    media_id=match.image.media_id,
+                    library={"image_id": match.image.id, "score": match.score, "reused": True}
+                )
+                return image
+            if self.image_library is not None:
+                self.image_library.record_miss()
+
+            if speculative:
+                image["url"] = await speculative.result(image_description)
+            else:
+                image["url"] = await self.image_generator.generate_image(image_description)
+
+            processed = await self.image_generator.prepare_image(image["url"])
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            image.update(
+                data=processed.data,
+                filename=processed.filename(f"newsletter_{timestamp}"),
+                content_type=processed.content_type,
+                processed=processed
+            )
+
+            if self.wordpress_publisher.circuit.available():
+                media = await self.wordpress_publisher.upload_media(
+                    processed.data, image["filename"], processed.content_type, alt_text=image_description
+                )
+                if media:
+                    image["media_id"] = media["media_id"]
+                    await self._add_to_library(image_description, newsletter_content.tags, media)
+        except Exception as e:
+            print(f"Image generation/upload failed: {e}")
+
+        return image
+
+    def _library_match(self, description: str):
+        """Library image similar enough to ``description`` to reuse on this site.
+
+        Queried by description alone: tags stream after the suggested images,
+        so the speculative lookup could not use them and both lookups must agree.
+        """
+        if not self.image_library or not description:
+            # Also skips empty libraries (ImageLibrary defines __len__)
+            return None
+        return self.image_library.match(description, wp_url=self.wordpress_publisher.wp_url)
+
+    async def _add_to_library(self, description: str, tags: List[str], media: Dict[str, Any]):
+        if self.image_library is None:
+            return
+        try:
+            await self.image_library.add(
+                description=description,
+                prompt=self.image_generator._refine_prompt(description, "professional"),
+                media_id=media["media_id"],
+                wp_url=self.wordpress_publisher.wp_url,
+                tags=tags,
+                source_url=media.get("source_url")
+            )
+        except Exception as e:
+            print(f"Could not add image to library: {e}")
+
+    async def _resolve_taxonomy(self, newsletter_content: NewsletterContent) -> Optional[Dict]:
+        """Resolve category/tag ids while the image is being produced"""
+        if not self.wordpress_publisher.circuit.available():
+            # The outbox resolves them when it delivers the draft
+            return None
+        try:
+            return await self.wordpress_publisher.resolve_taxonomy(newsletter_content.dict())
+        except Exception as e:
+            print(f"Taxonomy resolution failed: {e}")
+            return None
+
+    async def _create_draft(
+        self,
+        newsletter_content: NewsletterContent,
+        image: Dict[str, Any],
+        taxonomy: Optional[Dict]
+    ) -> Dict:
+        """Create the WordPress draft, queueing it in the outbox if WordPress fails.
+
+        Transient failures (5xx, timeouts, an open circuit) are retried from
+        the outbox; drafts WordPress rejected are stored there as failed.
+        """
+        print("Creating WordPress draft...")
+        circuit = self.wordpress_publisher.circuit
+        retryable = True
+        if not circuit.available():
+            # WordPress is known to be down: queue straight away instead of waiting on it
+            error = f"WordPress unavailable (circuit {circuit.state})"
+        else:
+            try:
+                wp_result = await self.wordpress_publisher.create_draft_post(
+                    newsletter_content=newsletter_content.dict(),
+                    featured_image_id=image['media_id'],
+                    taxonomy=taxonomy
+                )
+                error = None if wp_result.get('success') else wp_result.get('error')
+                retryable = is_retryable(wp_result)
+            except Exception as wp_error:
+                error = str(wp_error)
+
+        if error is None:
+            return wp_result
+
+        try:
+            outbox_id = await self.publish_outbox.enqueue(
+                newsletter_content.dict(),
+                image_alt=image['alt'],
+                media_id=image['media_id'],
+                error=error,
+                image_data=image['data'],
+                image_name=image['filename'] or "image.png",
+                retryable=retryable
+            )
+        except Exception as outbox_error:
+            print(f"WordPress posting skipped, outbox unavailable: {outbox_error}")
+            return dict(PENDING_WP_RESULT)
+
+        if not retryable:
+            return {**PENDING_WP_RESULT, 'outbox_id': outbox_id, 'error': error}
+        return {**PENDING_WP_RESULT, 'outbox_id': outbox_id}
+
+    def _build_response(
+        self,
+        newsletter_content: NewsletterContent,
+        image_url: Optional[str],
+        wp_result: Dict,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Build the route response payload"""
+        generation_time = time.time() - start_time
+
+        return {
+            "success": True,
+            "wordpress_post_id": wp_result.get('post_id'),
+            "edit_url": wp_result.get('edit_url'),
+            "preview_url": wp_result.get('preview_url'),
+            "content": newsletter_content.dict(),
+            "image_url": image_url,
+            "generation_time": generation_time,
+            "created_at": datetime.now().isoformat()
+        }
+
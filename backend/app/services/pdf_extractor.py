@@ -0,0 +1,137 @@
+# backend/app/services/pdf_extractor.py
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import PyPDF2
+
+from .document_chunker import PAGE_BREAK
+
+
+class PageText(NamedTuple):
+    number: int  # 1-based page number
+    text: str
+    seconds: float
+
+
+class PDFExtraction(NamedTuple):
+    text: str
+    pages: List[PageText]
+    seconds: float
+    workers: int
+
+    def timings(self) -> Dict:
+        """Extraction summary with per-page seconds, in page order"""
+        return {
+            "pages": len(self.pages),
+            "seconds": round(self.seconds, 3),
+            "workers": self.workers,
+            "page_seconds": [round(page.seconds, 4) for page in self.pages]
+        }
+
+
+# The reader a worker parsed last, so its later ranges skip re-parsing
+_reader: Optional[Tuple[Tuple, PyPDF2.PdfReader]] = None
+
+
+def _open_reader(file_path: str) -> PyPDF2.PdfReader:
+    global _reader
+    stat = os.stat(file_path)
+    identity = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    if _reader is None or _reader[0] != identity:
+        _reader = (identity, PyPDF2.PdfReader(file_path))
+    return _reader[1]
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[PageText]:
+    """Extract pages ``start`` to ``stop`` (exclusive); runs in a pool worker"""
+    return _extract_pages(_open_reader(file_path), start, stop)
+
+
+def _extract_pages(reader: PyPDF2.PdfReader, start: int, stop: int) -> List[PageText]:
+    pages = []
+    for index in range(start, stop):
+        began = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        pages.append(PageText(index + 1, text, time.perf_counter() - began))
+    return pages
+
+
+# One pool per process, shared by every extractor and closed on shutdown
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Forking a process that already runs threads is unsafe; spawn is not
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def close_pdf_pool():
+    """Shut down the extraction process pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class PDFExtractor:
+    """Extract PDF text page-parallel in a process pool.
+
+    Pages are split into ranges of ``pages_per_task`` that workers extract
+    independently, so long agenda packets use every core and never block
+    the event loop. Short documents skip the pool and use a thread.
+    """
+
+    def __init__(self, workers: int = 0, pages_per_task: int = 8, min_parallel_pages: int = 16):
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self.min_parallel_pages = min_parallel_pages
+
+    async def iter_pages(self, file_path: str) -> AsyncIterator[PageText]:
+        """Yield pages in order as soon as each one and those before it are extracted"""
+        reader = await asyncio.to_thread(PyPDF2.PdfReader, file_path)
+        total = len(reader.pages)
+
+        if total < self.min_parallel_pages or self.workers == 1:
+            for page in await asyncio.to_thread(_extract_pages, reader, 0, total):
+                yield page
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = _get_pool(self.workers)
+        futures = [
+            loop.run_in_executor(
+                pool, extract_page_range, file_path, start, min(start + self.pages_per_task, total)
+            )
+            for start in range(0, total, self.pages_per_task)
+        ]
+        try:
+            for future in futures:
+                for page in await future:
+                    yield page
+        except BrokenProcessPool:
+            # A crashed worker poisons the pool; start a fresh one next time
+            close_pdf_pool()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def extract(self, file_path: str) -> PDFExtraction:
+        """Extract the whole document, with form feeds marking page boundaries"""
+        start = time.perf_counter()
+        pages = [page async for page in self.iter_pages(file_path)]
+        return self.assemble(pages, time.perf_counter() - start)
+
+    def assemble(self, pages: List[PageText], seconds: float) -> PDFExtraction:
+        """Join pages yielded by ``iter_pages`` into one extraction"""
+        text = "".join(page.text + "\n" + PAGE_BREAK for page in pages)
+        workers = 1 if len(pages) < self.min_parallel_pages else self.workers
+        return PDFExtraction(text, pages, seconds, workers)
@@ -0,0 +1,130 @@
+# backend/app/services/prompt_budget.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .document_chunker import CHARS_PER_TOKEN, estimate_tokens
+
+TRUNCATION_MARKER = " [...]"
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or padding"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def prune_empty(value: Any) -> Any:
+    """Drop None, empty strings and empty containers, recursively"""
+    if isinstance(value, dict):
+        pruned = {key: prune_empty(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        pruned = [prune_empty(item) for item in value]
+        return [item for item in pruned if item not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def truncate_text(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Cut text to ``max_tokens``, preferring paragraph, sentence, then word ends"""
+    text = text.strip()
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    head = text[:limit]
+    for boundary in (r"\n\s*\n", r"[.!?][\"')\]]?\s", r"\s"):
+        ends = [match.end() for match in re.finditer(boundary, head)]
+        # Only back off to a boundary that keeps most of the budget
+        if ends and ends[-1] >= limit * 0.7:
+            head = head[:ends[-1]]
+            break
+    return head.rstrip() + TRUNCATION_MARKER, True
+
+
+def fit_structured(
+    data: Dict[str, Any],
+    max_tokens: Optional[int],
+    priority: Sequence[str]
+) -> Tuple[str, List[str]]:
+    """Serialize ``data`` compactly, within ``max_tokens`` if given.
+
+    Fields are ordered by ``priority`` (unlisted fields come last). While
+    over budget the lowest-priority field loses its last list item, or the
+    whole field when it is not a list. Returns the JSON and what was cut;
+    with no budget nothing is cut.
+    """
+    rank = {field: index for index, field in enumerate(priority)}
+    data = prune_empty(data)
+    fields = sorted(data, key=lambda field: rank.get(field, len(rank)))
+    data = {field: data[field] for field in fields}
+    trimmed: List[str] = []
+
+    serialized = compact_json(data)
+    while max_tokens is not None and data and estimate_tokens(serialized) > max_tokens:
+        field = next(reversed(data))
+        value = data[field]
+        if isinstance(value, list) and len(value) > 1:
+            value.pop()
+            trimmed.append(f"{field}[{len(value)}]")
+        else:
+            del data[field]
+            trimmed.append(field)
+        serialized = compact_json(data)
+
+    return serialized, trimmed
+
+
+class PromptAssembler:
+    """Collect budgeted prompt sections and report where the tokens went.
+
+    Each ``text``/``structured`` call returns the fitted section for the
+    caller to place in its template; ``finish`` takes the finished prompt
+    and returns it with a per-section token report, whose ``warnings``
+    name every section that lost content.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, Dict[str, Any]] = {}
+
+    def text(self, name: str, text: Optional[str], budget: int) -> str:
+        text = text or ""
+        fitted, truncated = truncate_text(text, budget)
+        self._record(name, text, fitted, budget, ["text"] if truncated else [])
+        return fitted
+
+    def structured(
+        self,
+        name: str,
+        data: Optional[Dict[str, Any]],
+        budget: Optional[int],
+        priority: Sequence[str]
+    ) -> str:
+        """Compact JSON of ``data``; trimmed by priority only when a budget is given"""
+        data = data or {}
+        fitted, trimmed = fit_structured(data, budget, priority)
+        self._record(name, compact_json(data), fitted, budget, trimmed)
+        return fitted
+
+    def finish(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        sections_total = sum(section["tokens"] for section in self.sections.values())
+        total = estimate_tokens(prompt)
+        return prompt, {
+            "estimated_tokens": total,
+            "instruction_tokens": max(0, total - sections_total),
+            "sections": self.sections,
+            "warnings": [
+                f"Prompt section '{name}' was cut to {section['tokens']} of {section['original_tokens']} "
+                f"estimated tokens (removed: {', '.join(section['trimmed'])})"
+                for name, section in self.sections.items() if section["trimmed"]
+            ]
+        }
+
+    def _record(self, name: str, original: str, fitted: str, budget: Optional[int], trimmed: List[str]):
+        self.sections[name] = {
+            "tokens": estimate_tokens(fitted),
+            "budget": budget,
+            "original_tokens": estimate_tokens(original),
+            "trimmed": trimmed
+        }
@@ -0,0 +1,300 @@
+# backend/app/services/publish_outbox.py
+import asyncio
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..models import OutboxEntry, OutboxStatus
+from ..utils.database import Database, get_database
+from .wordpress_publisher import WordPressPublisher
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS publish_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        status TEXT NOT NULL,
+        content TEXT NOT NULL,
+        image_path TEXT,
+        image_alt TEXT,
+        media_id INTEGER,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        result TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS publish_outbox_due ON publish_outbox (status, next_attempt_at)"
+]
+
+
+# Client errors that may go away by themselves; any other 4xx needs a fix first
+TRANSIENT_STATUS_CODES = {408, 425, 429}
+
+
+class OutboxDeliveryError(Exception):
+    """Raised when WordPress does not accept an outbox entry"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(result: Dict[str, Any]) -> bool:
+    """Whether a failed ``create_draft_post`` result is worth retrying.
+
+    Failures without a status code (timeouts, connection errors, an open
+    circuit) and 5xx responses are; rejected requests such as 400, 401 or
+    403 fail the same way every time.
+    """
+    status_code = result.get('status_code')
+    return status_code is None or status_code >= 500 or status_code in TRANSIENT_STATUS_CODES
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = settings.outbox_retry_base_seconds * 2 ** max(0, attempts - 1)
+    return min(settings.outbox_retry_max_seconds, delay) * random.uniform(0.9, 1.1)
+
+
+class PublishOutbox:
+    """Durable queue of drafts (and their featured images) for WordPress.
+
+    Drafts WordPress did not accept are stored in SQLite, with their image
+    kept under ``outbox_dir``, and a background flusher retries them with
+    exponential backoff. Each round first probes with one entry, so an
+    unreachable site costs a single request, and no round runs while the
+    WordPress circuit breaker is open. Once the probe succeeds, the rest
+    of the batch is delivered concurrently.
+    """
+
+    def __init__(
+        self,
+        publisher: WordPressPublisher,
+        database: Optional[Database] = None,
+        directory: Optional[str] = None
+    ):
+        self.publisher = publisher
+        self.database = database or get_database(settings.database_url)
+        self.directory = directory or settings.outbox_dir
+        os.makedirs(self.directory, exist_ok=True)
+        self.database.ensure_schema("publish_outbox", SCHEMA)
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._failed_rounds = 0
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._flusher())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self):
+        """Make the flusher re-check the queue now"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def enqueue(
+        self,
+        content: Dict[str, Any],
+        image_path: Optional[str] = None,
+        image_alt: str = "",
+        media_id: Optional[int] = None,
+        error: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        image_name: str = "image.png",
+        retryable: bool = True
+    ) -> int:
+        """Store a draft for later delivery; returns its outbox id.
+
+        The image comes either as a file (``image_path``, moved into the
+        outbox) or as in-memory ``image_data``, written there only now.
+        Drafts WordPress rejected outright (``retryable=False``) are stored
+        as failed, to be replayed by hand once the cause is fixed.
+        """
+        if media_id is not None:
+            image_path = None
+        elif image_data is not None:
+            image_path = os.path.join(self.directory, f"{uuid.uuid4().hex}{os.path.splitext(image_name)[1]}")
+            await asyncio.to_thread(_write_file, image_path, image_data)
+        elif image_path and os.path.exists(image_path):
+            # Keep the image out of upload cleanup until it is delivered
+            kept_path = os.path.join(self.directory, f"{uuid.uuid4().hex}{os.path.splitext(image_path)[1]}")
+            shutil.move(image_path, kept_path)
+            image_path = kept_path
+
+        now = time.time()
+        entry_id = await self.database.execute(
+            """INSERT INTO publish_outbox
+               (status, content, image_path, image_alt, media_id, attempts, next_attempt_at, last_error, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)""",
+            ((OutboxStatus.PENDING if retryable else OutboxStatus.FAILED).value,
+             json.dumps(content, default=str), image_path, image_alt,
+             media_id, now + retry_delay(1), error, now, now)
+        )
+        if retryable:
+            print(f"Draft queued in publish outbox as #{entry_id}: {error}")
+            self.wake()
+        else:
+            print(f"Draft stored as failed outbox entry #{entry_id}, not retried: {error}")
+        return entry_id
+
+    async def entries(self, status: Optional[OutboxStatus] = None, limit: int = 100) -> List[OutboxEntry]:
+        """Entries newest first, optionally of one status"""
+        if status is None:
+            rows = await self.database.fetch_all(
+                "SELECT * FROM publish_outbox ORDER BY id DESC LIMIT ?", (limit,)
+            )
+        else:
+            rows = await self.database.fetch_all(
+                "SELECT * FROM publish_outbox WHERE status = ? ORDER BY id DESC LIMIT ?", (status.value, limit)
+            )
+        return [_to_entry(row) for row in rows]
+
+    async def get(self, entry_id: int) -> Optional[OutboxEntry]:
+        row = await self.database.fetch_one("SELECT * FROM publish_outbox WHERE id = ?", (entry_id,))
+        return _to_entry(row) if row else None
+
+    async def replay(self, entry_id: Optional[int] = None) -> int:
+        """Make pending/failed entries (or one entry) due now; returns how many"""
+        now = time.time()
+        if entry_id is None:
+            count = await self.database.run(lambda connection: connection.execute(
+                "UPDATE publish_outbox SET status = ?, next_attempt_at = ?, updated_at = ? WHERE status != ?",
+                (OutboxStatus.PENDING.value, now, now, OutboxStatus.DELIVERED.value)
+            ).rowcount)
+        else:
+            count = await self.database.run(lambda connection: connection.execute(
+                "UPDATE publish_outbox SET status = ?, next_attempt_at = ?, updated_at = ? WHERE id = ? AND status != ?",
+                (OutboxStatus.PENDING.value, now, now, entry_id, OutboxStatus.DELIVERED.value)
+            ).rowcount)
+        self._failed_rounds = 0
+        self.wake()
+        return count
+
+    async def stats(self) -> Dict[str, int]:
+        rows = await self.database.fetch_all("SELECT status, COUNT(*) AS count FROM publish_outbox GROUP BY status")
+        counts = {status.value: 0 for status in OutboxStatus}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    async def flush(self) -> float:
+        """Deliver due entries; returns seconds until the queue should be checked again"""
+        due = await self.database.fetch_all(
+            "SELECT * FROM publish_outbox WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (OutboxStatus.PENDING.value, time.time(), settings.outbox_batch_size)
+        )
+        circuit = self.publisher.circuit
+        if due and not circuit.available():
+            # Nothing gets through until the circuit lets a trial call out
+            return max(1.0, circuit.retry_after())
+        if due:
+            if not await self._deliver(due[0]):
+                self._failed_rounds += 1
+                return retry_delay(self._failed_rounds)
+            self._failed_rounds = 0
+            await asyncio.gather(*[self._deliver(row) for row in due[1:]])
+            if len(due) == settings.outbox_batch_size:
+                return 0
+
+        row = await self.database.fetch_one(
+            "SELECT MIN(next_attempt_at) AS next_attempt_at FROM publish_outbox WHERE status = ?",
+            (OutboxStatus.PENDING.value,)
+        )
+        if row is None or row["next_attempt_at"] is None:
+            return settings.outbox_poll_seconds
+        return max(0.0, min(settings.outbox_poll_seconds, row["next_attempt_at"] - time.time()))
+
+    async def _flusher(self):
+        while True:
+            try:
+                delay = await self.flush()
+            except Exception as e:
+                print(f"Publish outbox flush failed: {e}")
+                delay = settings.outbox_poll_seconds
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _deliver(self, row: Dict[str, Any]) -> bool:
+        """Upload the image if still needed, then create the draft"""
+        entry_id = row["id"]
+        media_id = row["media_id"]
+        try:
+            if row["image_path"] and media_id is None and os.path.exists(row["image_path"]):
+                media_id = await self.publisher.upload_image(row["image_path"], alt_text=row["image_alt"] or "")
+                if media_id is None:
+                    raise OutboxDeliveryError("Featured image upload failed")
+                # Remember the upload so a failed draft does not upload it again
+                await self.database.execute(
+                    "UPDATE publish_outbox SET media_id = ?, updated_at = ? WHERE id = ?",
+                    (media_id, time.time(), entry_id)
+                )
+
+            result = await self.publisher.create_draft_post(
+                newsletter_content=json.loads(row["content"]),
+                featured_image_id=media_id
+            )
+            if not result.get("success"):
+                raise OutboxDeliveryError(result.get("error") or "Draft creation failed", is_retryable(result))
+        except Exception as e:
+            attempts = row["attempts"] + 1
+            retryable = getattr(e, "retryable", True)
+            status = OutboxStatus.PENDING
+            if not retryable or attempts >= settings.outbox_max_attempts:
+                status = OutboxStatus.FAILED
+            await self.database.execute(
+                """UPDATE publish_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                   WHERE id = ?""",
+                (status.value, attempts, time.time() + retry_delay(attempts), str(e), time.time(), entry_id)
+            )
+            print(f"Outbox #{entry_id} delivery failed (attempt {attempts}): {e}")
+            return False
+
+        await self.database.execute(
+            "UPDATE publish_outbox SET status = ?, attempts = ?, result = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (OutboxStatus.DELIVERED.value, row["attempts"] + 1, json.dumps(result), time.time(), entry_id)
+        )
+        if row["image_path"]:
+            try:
+                os.remove(row["image_path"])
+            except OSError:
+                pass
+        print(f"Outbox #{entry_id} delivered as post {result.get('post_id')}")
+        return True
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _to_entry(row: Dict[str, Any]) -> OutboxEntry:
+    content = json.loads(row["content"])
+    return OutboxEntry(
+        id=row["id"],
+        status=row["status"],
+        title=content.get("title"),
+        image_path=row["image_path"],
+        media_id=row["media_id"],
+        attempts=row["attempts"],
+        next_attempt_at=datetime.fromtimestamp(row["next_attempt_at"]) if row["status"] == OutboxStatus.PENDING.value else None,
+        last_error=row["last_error"],
+        result=json.loads(row["result"]) if row["result"] else None,
+        created_at=datetime.fromtimestamp(row["created_at"]),
+        updated_at=datetime.fromtimestamp(row["updated_at"])
+    )
@@ -1,41 +1,116 @@
 # backend/app/services/research_engine.py
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from typing import List, Dict, Optional
 import json
+import os
+import re
 from ..config import settings
+from ..utils.cache import TieredCache, make_cache_key
+from ..utils.metrics import record_token_usage, span
+from ..utils.singleflight import SingleFlight
+from .clients import get_anthropic_client, upstream_slot
+
+# Bump whenever _build_research_prompt changes so cached research is not reused
+RESEARCH_PROMPT_VERSION = "1"
 
 class ResearchEngine:
-    def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+    def __init__(self, client: Optional[AsyncAnthropic] = None, cache: Optional[TieredCache] = None):
+        self._client = client
+        self.cache = cache or TieredCache(
+            "research",
+            ttl_seconds=settings.research_cache_ttl,
+            max_entries=settings.research_cache_max_entries,
+            directory=os.path.join(settings.cache_dir, "research"),
+            max_disk_entries=settings.research_cache_max_disk_entries
+        )
+        self.inflight = SingleFlight("research")
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        return self._client or get_anthropic_client()
         
     async def research_topic(
         self, 
         topic: str, 
         context: Optional[str] = None,
-        sources: Optional[List[str]] = None
+        sources: Optional[List[str]] = None,
+        bypass_cache: bool = False
     ) -> Dict:
         """
-        Research a topic using Claude
+        Research a topic using Claude.
+        
+        Results are cached by topic, context, sources, model and prompt
+        version; ``bypass_cache`` forces a fresh call and refreshes the entry.
+        Concurrent calls for the same inputs share one upstream request.
         """
         
+        cache_key = self._cache_key(topic, context, sources)
+        async with span("research") as record:
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print(f"Research cache hit for topic: {topic}")
+                    record["cached"] = True
+                    return cached
+            
+            # Identical research already in flight is awaited, not repeated
+            return await self.inflight.do(
+                cache_key,
+                lambda: self._research(topic, context, sources, cache_key)
+            )
+    
+    async def _research(
+        self,
+        topic: str,
+        context: Optional[str],
+        sources: Optional[List[str]],
+        cache_key: str
+    ) -> Dict:
+        """Call Claude for research and store the result in the cache"""
+        
         # Build research prompt
         prompt = self._build_research_prompt(topic, context, sources)
         
         # Call Claude WITHOUT web search for now (simpler)
-        message = self.client.messages.create(
-            model=settings.default_model,
-            max_tokens=4000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        async with upstream_slot("anthropic"):
+            message = await self.client.messages.create(
+                model=settings.default_model,
+                max_tokens=4000,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            )
+        record_token_usage(settings.default_model, message.usage)
         
         # Process response
         research_data = await self._process_research_response(message)
         
+        self.cache.set(cache_key, research_data, metadata={"topic": topic})
+        
         return research_data
     
+    def _cache_key(
+        self,
+        topic: str,
+        context: Optional[str],
+        sources: Optional[List[str]]
+    ) -> str:
+        """Hash of the normalized research inputs"""
+        
+        def normalize(text: Optional[str]) -> str:
+            return re.sub(r"\s+", " ", text or "").strip().casefold()
+        
+        normalized_sources = sorted({source.strip().rstrip('/') for source in sources or [] if source.strip()})
+        
+        return make_cache_key(
+            normalize(topic),
+            normalize(context),
+            normalized_sources,
+            settings.default_model,
+            RESEARCH_PROMPT_VERSION
+        )
+    
     def _build_research_prompt(
         self, 
         topic: str, 
@@ -0,0 +1,211 @@
+# backend/app/services/scratch_storage.py
+import asyncio
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Any, Dict, NamedTuple, Optional
+
+from ..config import settings
+
+# Names of the directories ``create`` makes: <prefix>-<32 hex digits>
+WORKSPACE_NAME = re.compile(r"^[a-z0-9_]+-[0-9a-f]{32}$")
+
+
+class ScratchQuotaExceededError(Exception):
+    """Raised when scratch storage is too full to start another job"""
+
+
+class Workspace(NamedTuple):
+    """A job's private scratch directory"""
+    id: str
+    path: str
+    created_at: float
+
+    def file(self, name: str) -> str:
+        """Path for ``name`` inside the workspace"""
+        return os.path.join(self.path, os.path.basename(name))
+
+
+def directory_size(path: str) -> int:
+    """Bytes used by the files under ``path``"""
+    total = 0
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                total += directory_size(entry.path)
+            else:
+                total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+class ScratchStorage:
+    """Per-job workspaces under one root, with a quota and garbage collection.
+
+    ``create`` issues a uniquely named directory per job, so concurrent
+    jobs never share file names, and refuses new work once the workspaces
+    hold ``quota_bytes`` (less room for one more ``reserve_bytes`` upload).
+    Usage is tracked incrementally: callers ``track`` what they save and
+    ``release`` subtracts it, so no request walks the disk.
+
+    ``release`` deletes a workspace when its job ends. Workspaces of jobs
+    still queued or running are never collected; the background
+    collector only deletes workspace directories left over from earlier
+    processes (e.g. after a crash) that have not been touched for
+    ``max_age_seconds``. Other files under the root are never touched.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        quota_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        gc_interval: Optional[float] = None,
+        reserve_bytes: Optional[int] = None
+    ):
+        self.root = root or settings.upload_dir
+        self.quota_bytes = quota_bytes or settings.scratch_quota_bytes
+        self.max_age_seconds = max_age_seconds or settings.scratch_max_age_seconds
+        self.gc_interval = gc_interval or settings.scratch_gc_interval
+        self.reserve_bytes = settings.max_upload_size if reserve_bytes is None else reserve_bytes
+        self.active: Dict[str, Workspace] = {}
+        self._sizes: Dict[str, int] = {}
+        self.used_bytes = 0
+        self.created = 0
+        self.released = 0
+        self.collected = 0
+        self.freed_bytes = 0
+        self.rejected = 0
+        self._task: Optional[asyncio.Task] = None
+        os.makedirs(self.root, exist_ok=True)
+
+    async def start(self):
+        """Count leftover workspaces towards the quota and start the background collector"""
+        if self._task is None or self._task.done():
+            self.used_bytes = await asyncio.to_thread(self._scan) + sum(self._sizes.values())
+            self._task = asyncio.create_task(self._collector())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def create(self, prefix: str = "job") -> Workspace:
+        """New empty workspace; raises ScratchQuotaExceededError when full"""
+        if not re.fullmatch(r"[a-z0-9_]+", prefix):
+            raise ValueError(f"Invalid workspace prefix {prefix!r}")
+        if self.used_bytes + self.reserve_bytes > self.quota_bytes:
+            await self.collect()
+            if self.used_bytes + self.reserve_bytes > self.quota_bytes:
+                self.rejected += 1
+                raise ScratchQuotaExceededError(
+                    f"Scratch storage is full ({self.used_bytes} of {self.quota_bytes} bytes used)"
+                )
+
+        workspace_id = f"{prefix}-{uuid.uuid4().hex}"
+        workspace = Workspace(workspace_id, os.path.join(self.root, workspace_id), time.time())
+        os.makedirs(workspace.path)
+        self.active[workspace_id] = workspace
+        self._sizes[workspace_id] = 0
+        self.created += 1
+        return workspace
+
+    def track(self, workspace: Workspace, size: int):
+        """Count ``size`` bytes saved into a workspace towards the quota"""
+        if workspace.id in self._sizes:
+            self._sizes[workspace.id] += size
+            self.used_bytes += size
+
+    def touch(self, workspace: Workspace):
+        """Mark a workspace as in use (e.g. when its queued job starts)"""
+        try:
+            os.utime(workspace.path)
+        except OSError:
+            pass
+
+    async def release(self, workspace: Workspace):
+        """Delete a workspace and everything in it"""
+        self.active.pop(workspace.id, None)
+        await asyncio.to_thread(self._remove, workspace.path)
+        self.released += 1
+        self.used_bytes = max(0, self.used_bytes - self._sizes.pop(workspace.id, 0))
+
+    async def collect(self) -> int:
+        """Delete leftover workspaces untouched for ``max_age_seconds``; returns how many"""
+        cutoff = time.time() - self.max_age_seconds
+        removed, freed = await asyncio.to_thread(self._collect, cutoff, set(self.active))
+        self.collected += removed
+        self.freed_bytes += freed
+        self.used_bytes = max(0, self.used_bytes - freed)
+        if removed:
+            print(f"Scratch storage: collected {removed} stale workspaces ({freed} bytes)")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "used_bytes": self.used_bytes,
+            "quota_bytes": self.quota_bytes,
+            "active_workspaces": len(self.active),
+            "created": self.created,
+            "released": self.released,
+            "collected": self.collected,
+            "freed_bytes": self.freed_bytes,
+            "rejected": self.rejected
+        }
+
+    def _leftovers(self, active: set):
+        """Workspace directories under the root that no job of this process owns"""
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        return [
+            entry for entry in entries
+            if WORKSPACE_NAME.match(entry.name) and entry.name not in active
+            and entry.is_dir(follow_symlinks=False)
+        ]
+
+    def _scan(self) -> int:
+        return sum(directory_size(entry.path) for entry in self._leftovers(set(self.active)))
+
+    def _collect(self, cutoff: float, active: set):
+        """Remove leftover workspaces not modified since ``cutoff``"""
+        removed = freed = 0
+        for entry in self._leftovers(active):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            freed += self._remove(entry.path)
+            removed += 1
+        return removed, freed
+
+    def _remove(self, path: str) -> int:
+        """Delete a workspace directory, logging what could not be removed"""
+        if not os.path.isdir(path):
+            return 0
+        size = directory_size(path)
+
+        def log_error(function, failed_path, exc_info):
+            print(f"Scratch storage: could not remove {failed_path}: {exc_info[1]}")
+
+        shutil.rmtree(path, onerror=log_error)
+        return size
+
+    async def _collector(self):
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                print(f"Scratch storage collection failed: {e}")
+            await asyncio.sleep(self.gc_interval)
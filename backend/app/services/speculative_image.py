@@ -0,0 +1,53 @@
+# backend/app/services/speculative_image.py
+import asyncio
+from typing import Optional
+
+from .image_generator import ImageGenerator
+
+
+class SpeculativeImage:
+    """Featured image generation started from partial model output.
+
+    ``speculate`` is called with the first suggested image as soon as the
+    streamed article contains it and starts DALL-E in the background.
+    ``result`` is called with the final description once the article is
+    parsed: a matching description reuses the in-flight (or finished) image,
+    anything else cancels the guess and generates the right one.
+    """
+
+    def __init__(self, image_generator: ImageGenerator):
+        self.image_generator = image_generator
+        self.description: Optional[str] = None
+        self.outcome = "not_started"  # not_started, pending, hit, miss
+        self._task: Optional[asyncio.Task] = None
+
+    def speculate(self, description: str):
+        """Start generating ``description`` unless a guess is already running"""
+        if self._task is not None or not description:
+            return
+
+        print(f"Speculatively generating featured image: {description}")
+        self.description = description
+        self.outcome = "pending"
+        self._task = asyncio.create_task(self.image_generator.generate_image(description))
+
+    async def result(self, description: str) -> str:
+        """Image URL for the final description"""
+        if self._task is not None and self.description == description:
+            self.outcome = "hit"
+            return await self._task
+
+        if self._task is not None:
+            print("Suggested image changed; discarding speculative image")
+            self.outcome = "miss"
+            self.cancel()
+
+        return await self.image_generator.generate_image(description)
+
+    def cancel(self):
+        """Abandon the speculative generation if it is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        # Retrieve the outcome so a failed guess is not reported as unhandled
+        if self._task is not None and self._task.done() and not self._task.cancelled():
+            self._task.exception()
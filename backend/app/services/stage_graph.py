@@ -0,0 +1,117 @@
+# backend/app/services/stage_graph.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# A stage receives the results of the stages it depends on, keyed by name
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class _Stage:
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str]):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+
+class StageGraph:
+    """Run pipeline stages as a dependency graph.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages overlap. A failing stage cancels the rest of the run
+    and its exception propagates to the caller.
+    """
+
+    def __init__(self, progress: Optional[Callable[[str, str], None]] = None):
+        self.progress = progress
+        self._stages: Dict[str, _Stage] = {}
+        self._origin: Optional[float] = None
+
+    def add(self, name: str, func: StageFunc, depends_on: Iterable[str] = ()) -> "StageGraph":
+        """Register a stage; dependencies must already be registered"""
+        depends_on = list(depends_on)
+        missing = [dep for dep in depends_on if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+
+        self._stages[name] = _Stage(name, func, depends_on)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """Execute every stage and return their results keyed by name"""
+        self._origin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(stage: _Stage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            inputs = {dep: tasks[dep].result() for dep in stage.depends_on}
+
+            self._notify(stage.name, "started")
+            stage.started = time.perf_counter()
+            try:
+                result = await stage.func(inputs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                stage.finished = time.perf_counter()
+                self._notify(stage.name, "failed")
+                raise
+            stage.finished = time.perf_counter()
+            self._notify(stage.name, "completed")
+            return result
+
+        # Registration order is a topological order, so every dependency
+        # task exists before the stages waiting on it
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(execute(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Start/end offsets and duration of each finished stage, in seconds"""
+        report = {}
+        for stage in self._stages.values():
+            if stage.started is None or stage.finished is None:
+                continue
+            report[stage.name] = {
+                "start": round(stage.started - self._origin, 3),
+                "end": round(stage.finished - self._origin, 3),
+                "duration": round(stage.finished - stage.started, 3)
+            }
+        return report
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined the total wall time.
+
+        Walks back from the last stage to finish, at each step following the
+        dependency that finished last (the one the stage was waiting on).
+        """
+        finished = [stage for stage in self._stages.values() if stage.finished is not None]
+        if not finished:
+            return []
+
+        path = []
+        current = max(finished, key=lambda stage: stage.finished)
+        while current is not None:
+            path.append(current.name)
+            deps = [self._stages[dep] for dep in current.depends_on if self._stages[dep].finished is not None]
+            current = max(deps, key=lambda stage: stage.finished) if deps else None
+
+        return list(reversed(path))
+
+    def _notify(self, stage: str, status: str):
+        if self.progress:
+            self.progress(stage, status)
@@ -0,0 +1,187 @@
+# backend/app/services/taxonomy_cache.py
+import asyncio
+import html
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from ..utils.singleflight import SingleFlight
+
+TAXONOMIES = ("categories", "tags")
+
+TERMS_PER_PAGE = 100
+
+# request(method, path, **kwargs) -> response with status_code, headers and json()
+RequestFunc = Callable[..., Awaitable[Any]]
+
+
+def normalize_term(name: str) -> str:
+    """Case- and whitespace-insensitive form of a term name"""
+    return re.sub(r"\s+", " ", html.unescape(name or "")).strip().casefold()
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", normalize_term(name)).strip("-")
+
+
+class _TermIndex:
+    def __init__(self):
+        self.by_name: Dict[str, int] = {}
+        self.by_slug: Dict[str, int] = {}
+        self.max_id = 0
+
+    def add(self, term: Dict[str, Any]):
+        term_id = term["id"]
+        self.by_name[normalize_term(term.get("name", ""))] = term_id
+        if term.get("slug"):
+            self.by_slug[term["slug"]] = term_id
+        self.max_id = max(self.max_id, term_id)
+
+    def find(self, name: str) -> Optional[int]:
+        return self.by_name.get(normalize_term(name)) or self.by_slug.get(slugify(name))
+
+
+class TaxonomyCache:
+    """Local index of WordPress categories and tags.
+
+    Every term is bulk-loaded once with paginated ``per_page=100``
+    requests, after which names are matched locally and case-insensitively.
+    Terms missing locally are created in parallel; WordPress answers
+    ``term_exists`` for names created elsewhere, which resolves them too.
+    Once ``refresh_seconds`` old, the index is topped up in the background
+    with terms newer than the highest id it knows.
+    """
+
+    def __init__(self, request: RequestFunc, refresh_seconds: int = 300):
+        self._request = request
+        self.refresh_seconds = refresh_seconds
+        self._indexes = {taxonomy: _TermIndex() for taxonomy in TAXONOMIES}
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self.inflight = SingleFlight("taxonomy")
+        self._background: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    async def prefetch(self):
+        """Load every term unless already loaded; concurrent callers share one load"""
+        if self.loaded_at is None:
+            await self.inflight.do("load", self._load)
+
+    async def resolve(self, taxonomy: str, names: List[str]) -> List[int]:
+        """Term ids for ``names``, creating any that do not exist yet"""
+        try:
+            await self.prefetch()
+        except Exception as e:
+            # Creation below still resolves terms via term_exists
+            print(f"Taxonomy prefetch failed: {e}")
+        self._refresh_if_stale()
+
+        index = self._indexes[taxonomy]
+        ids: Dict[str, Optional[int]] = {}
+        missing = []
+        for name in names:
+            key = normalize_term(name)
+            if not key or key in ids:
+                continue
+            ids[key] = index.find(name)
+            if ids[key] is None:
+                missing.append(name)
+        self.hits += len(ids) - len(missing)
+        self.misses += len(missing)
+
+        created = await asyncio.gather(*[self._create(taxonomy, name) for name in missing])
+        for name, term_id in zip(missing, created):
+            ids[normalize_term(name)] = term_id
+
+        return list(dict.fromkeys(term_id for term_id in ids.values() if term_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded_at": self.loaded_at,
+            "refreshed_at": self.refreshed_at,
+            "terms": {taxonomy: len(index.by_name) for taxonomy, index in self._indexes.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created
+        }
+
+    async def _load(self):
+        pages = await asyncio.gather(*[self._load_taxonomy(taxonomy) for taxonomy in TAXONOMIES])
+        for taxonomy, terms in zip(TAXONOMIES, pages):
+            index = _TermIndex()
+            for term in terms:
+                index.add(term)
+            self._indexes[taxonomy] = index
+        self.loaded_at = self.refreshed_at = time.time()
+        print(f"Loaded WordPress taxonomy: {self.stats()['terms']}")
+
+    async def _load_taxonomy(self, taxonomy: str) -> List[Dict[str, Any]]:
+        """Fetch page 1, then every remaining page concurrently"""
+        first = await self._get_page(taxonomy, 1)
+        total_pages = int(first.headers.get("X-WP-TotalPages", 1) or 1)
+        rest = await asyncio.gather(*[self._get_page(taxonomy, page) for page in range(2, total_pages + 1)])
+        return [term for response in (first, *rest) for term in response.json()]
+
+    async def _get_page(self, taxonomy: str, page: int, **params):
+        response = await self._request(
+            "GET",
+            f"/{taxonomy}",
+            params={"per_page": TERMS_PER_PAGE, "page": page, "_fields": "id,name,slug", **params}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Loading {taxonomy} page {page} failed: {response.status_code}")
+        return response
+
+    def _refresh_if_stale(self):
+        if self.loaded_at is None or time.time() - self.refreshed_at < self.refresh_seconds:
+            return
+        task = asyncio.create_task(self.inflight.do("refresh", self._refresh))
+        self._background.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"Taxonomy refresh failed: {task.exception()}")
+
+    async def _refresh(self):
+        """Add terms created since the last load, newest first"""
+        await asyncio.gather(*[self._refresh_taxonomy(taxonomy) for taxonomy in TAXONOMIES])
+        self.refreshed_at = time.time()
+
+    async def _refresh_taxonomy(self, taxonomy: str):
+        index = self._indexes[taxonomy]
+        known = index.max_id
+        page = 1
+        while True:
+            response = await self._get_page(taxonomy, page, orderby="id", order="desc")
+            terms = response.json()
+            for term in terms:
+                if term["id"] > known:
+                    index.add(term)
+            if len(terms) < TERMS_PER_PAGE or any(term["id"] <= known for term in terms):
+                return
+            page += 1
+
+    async def _create(self, taxonomy: str, name: str) -> Optional[int]:
+        try:
+            response = await self._request("POST", f"/{taxonomy}", json={"name": name})
+            body = response.json()
+        except Exception as e:
+            print(f"Error creating {taxonomy} term {name!r}: {e}")
+            return None
+
+        if response.status_code == 201:
+            self.created += 1
+            self._indexes[taxonomy].add(body)
+            return body["id"]
+        if isinstance(body, dict) and body.get("code") == "term_exists":
+            term_id = (body.get("data") or {}).get("term_id")
+            if term_id:
+                self._indexes[taxonomy].add({"id": term_id, "name": name})
+            return term_id
+
+        print(f"Creating {taxonomy} term {name!r} failed: {response.status_code}")
+        return None
@@ -0,0 +1,153 @@
+# backend/app/services/usage_ledger.py
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config import settings
+from ..utils.database import Database, get_database
+from ..utils.metrics import USAGE_FIELDS
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS usage_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        generation_id TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        model TEXT NOT NULL,
+        input_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_creation_input_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_read_input_tokens INTEGER NOT NULL DEFAULT 0,
+        images INTEGER NOT NULL DEFAULT 0,
+        cost_usd REAL,
+        day TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS usage_ledger_day ON usage_ledger (day)",
+    "CREATE INDEX IF NOT EXISTS usage_ledger_generation ON usage_ledger (generation_id)"
+]
+
+# Counted columns: the message.usage fields plus generated images
+COUNT_FIELDS = USAGE_FIELDS + ("images",)
+
+# group_by value -> ledger column
+GROUPS = {
+    "day": "day",
+    "content_type": "content_type",
+    "model": "model",
+    "stage": "stage",
+    "generation": "generation_id"
+}
+
+
+def usage_cost(model: str, counts: Dict[str, int], prices: Dict[str, Dict[str, float]]) -> Optional[float]:
+    """USD cost of one call, or None when the model has no price"""
+    table = prices.get(model)
+    if table is None:
+        return None
+    tokens = sum(counts.get(field, 0) * table.get(field, 0.0) for field in USAGE_FIELDS) / 1_000_000
+    return tokens + counts.get("images", 0) * table.get("images", 0.0)
+
+
+def _totals(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    totals: Dict[str, Any] = {"calls": 0, **{field: 0 for field in COUNT_FIELDS}, "cost_usd": 0.0, "unpriced_calls": 0}
+    for row in rows:
+        totals["calls"] += row.get("calls", 1)
+        for field in COUNT_FIELDS:
+            totals[field] += row.get(field, 0) or 0
+        totals["cost_usd"] += row.get("cost_usd") or 0.0
+        totals["unpriced_calls"] += row.get("unpriced_calls", row.get("cost_usd") is None)
+    return _finish(totals)
+
+
+def _finish(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Round the cost and add the share of prompt tokens served from the prompt cache"""
+    prompt = totals["input_tokens"] + totals["cache_creation_input_tokens"] + totals["cache_read_input_tokens"]
+    totals["cost_usd"] = round(totals["cost_usd"] or 0.0, 6)
+    totals["cache_read_share"] = round(totals["cache_read_input_tokens"] / prompt, 4) if prompt else 0.0
+    return totals
+
+
+class UsageLedger:
+    """Tokens, images and cost of every upstream call, per stage and generation.
+
+    The pipeline collects the usage events of each run (see
+    ``utils.metrics.collect_usage``) and records them here with the run's
+    generation id and content type. Cost is priced from ``usage_prices``
+    when the call is recorded, so later price changes do not rewrite
+    history; calls to unpriced models are stored without a cost.
+    """
+
+    def __init__(self, database: Optional[Database] = None, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self.database = database or get_database(settings.database_url)
+        self.database.ensure_schema("usage_ledger", SCHEMA)
+        self.prices = settings.usage_prices if prices is None else prices
+
+    async def record(self, generation_id: str, content_type: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store one generation's usage events; returns its totals and per-stage breakdown"""
+        now = time.time()
+        day = datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+        rows = [
+            {
+                "stage": event.get("stage") or "unknown",
+                "model": event["model"],
+                **{field: event.get(field, 0) for field in COUNT_FIELDS},
+                "cost_usd": usage_cost(event["model"], event, self.prices)
+            }
+            for event in events
+        ]
+        if rows:
+            await self.database.run(lambda connection: connection.executemany(
+                f"""INSERT INTO usage_ledger (generation_id, content_type, stage, model, {", ".join(COUNT_FIELDS)},
+                                              cost_usd, day, created_at)
+                    VALUES (?, ?, ?, ?, {", ".join("?" for _ in COUNT_FIELDS)}, ?, ?, ?)""",
+                [
+                    (generation_id, content_type, row["stage"], row["model"],
+                     *[row[field] for field in COUNT_FIELDS], row["cost_usd"], day, now)
+                    for row in rows
+                ]
+            ))
+
+        stages: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            stages.setdefault(row["stage"], []).append(row)
+        return {
+            "generation_id": generation_id,
+            **_totals(rows),
+            "by_stage": {stage: _totals(stage_rows) for stage, stage_rows in stages.items()}
+        }
+
+    async def aggregate(self, group_by: str, days: Optional[int] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Totals grouped by day, content_type, model, stage or generation"""
+        if group_by not in GROUPS:
+            raise ValueError(f"Unsupported group_by {group_by!r}; expected one of {sorted(GROUPS)}")
+        column = GROUPS[group_by]
+        where, params = self._since(days)
+        order = "MAX(created_at) DESC" if group_by == "generation" else column
+        rows = await self.database.fetch_all(
+            f"""SELECT {column} AS {group_by}, COUNT(*) AS calls, COUNT(DISTINCT generation_id) AS generations,
+                       {", ".join(f"SUM({field}) AS {field}" for field in COUNT_FIELDS)},
+                       SUM(cost_usd) AS cost_usd, SUM(cost_usd IS NULL) AS unpriced_calls
+                FROM usage_ledger {where}
+                GROUP BY {column} ORDER BY {order} LIMIT ?""",
+            (*params, limit)
+        )
+        return [_finish(row) for row in rows]
+
+    async def totals(self, days: Optional[int] = None) -> Dict[str, Any]:
+        """Totals over every recorded call (in the last ``days`` days)"""
+        where, params = self._since(days)
+        row = await self.database.fetch_one(
+            f"""SELECT COUNT(*) AS calls, COUNT(DISTINCT generation_id) AS generations,
+                       {", ".join(f"COALESCE(SUM({field}), 0) AS {field}" for field in COUNT_FIELDS)},
+                       SUM(cost_usd) AS cost_usd, COALESCE(SUM(cost_usd IS NULL), 0) AS unpriced_calls
+                FROM usage_ledger {where}""",
+            params
+        )
+        return _finish(row)
+
+    def _since(self, days: Optional[int]):
+        if not days:
+            return "", ()
+        first_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+        return "WHERE day >= ?", (first_day,)
@@ -0,0 +1,66 @@
+# backend/app/services/wordpress_health.py
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ..utils.singleflight import SingleFlight
+
+
+class WordPressHealthMonitor:
+    """Cached WordPress connectivity, refreshed by a background probe.
+
+    ``current()`` answers from the last probe while it is younger than
+    ``interval`` seconds, so page loads never wait on WordPress. The
+    probe goes through the publisher's circuit breaker: while the circuit
+    is open it reports the outage without a request, and once the circuit
+    turns half-open the probe is the trial call that closes it again.
+    """
+
+    def __init__(self, publisher, interval: float = 60.0):
+        self.publisher = publisher
+        self.interval = interval
+        self.status: Optional[Dict[str, Any]] = None
+        self.inflight = SingleFlight("wordpress_health")
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background probe"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def current(self) -> Dict[str, Any]:
+        """Last known connectivity, probing only if it is older than ``interval``"""
+        if self.status is None or time.time() - self.status["checked_at"] >= self.interval:
+            return await self.check()
+        return self.status
+
+    async def check(self) -> Dict[str, Any]:
+        """Probe WordPress now (concurrent callers share one probe)"""
+        return await self.inflight.do("probe", self._probe)
+
+    async def _probe(self) -> Dict[str, Any]:
+        result = await self.publisher.test_connection()
+        self.status = {
+            **result,
+            "checked_at": time.time(),
+            "checked": datetime.now().isoformat(),
+            "circuit": self.publisher.circuit.stats()
+        }
+        return self.status
+
+    async def _monitor(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"WordPress health probe failed: {e}")
+            # While open, probe again as soon as the circuit allows a trial
+            delay = self.publisher.circuit.retry_after() or self.interval
+            await asyncio.sleep(min(delay, self.interval))
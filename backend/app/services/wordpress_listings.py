@@ -0,0 +1,154 @@
+# backend/app/services/wordpress_listings.py
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from ..utils.cache import TieredCache, make_cache_key
+from ..utils.singleflight import SingleFlight
+
+# request(method, path, **kwargs) -> response with status_code, headers and text
+RequestFunc = Callable[..., Awaitable[Any]]
+
+# WordPress pagination headers relayed to our clients
+PAGINATION_HEADERS = ("X-WP-Total", "X-WP-TotalPages")
+
+
+class ListingError(Exception):
+    """Raised when WordPress answers a listing with an error status"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+def body_etag(body: str) -> str:
+    """Strong ETag of a response body"""
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag`` (weak comparison, ``*`` matches any)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def collection(path: str) -> str:
+    """The REST collection a path belongs to: ``/posts/12`` -> ``/posts``"""
+    return "/" + path.strip("/").split("/", 1)[0]
+
+
+class WordPressListingCache:
+    """Short-lived cache of WordPress REST listings (categories, tags, drafts).
+
+    A listing is answered from memory for ``ttl_seconds``. After that it is
+    revalidated with ``If-None-Match``/``If-Modified-Since``; a 304 renews
+    the entry without transferring the body again. Entries are kept for
+    ``stale_seconds`` so they can be revalidated and, if WordPress is
+    unreachable, served stale. Bodies are stored as WordPress sent them,
+    with our own ETag so clients can revalidate against us. Writes to a
+    collection call ``invalidate`` so its listings are fetched again.
+    """
+
+    def __init__(
+        self,
+        request: RequestFunc,
+        ttl_seconds: int = 30,
+        stale_seconds: int = 3600,
+        max_entries: int = 128
+    ):
+        self._request = request
+        self.ttl_seconds = ttl_seconds
+        self.cache = TieredCache("wordpress_listings", ttl_seconds=stale_seconds, max_entries=max_entries)
+        self.inflight = SingleFlight("wordpress_listings")
+        # Cached keys and write count of each collection; a fetch that
+        # overlapped a write is not stored
+        self._keys: Dict[str, Set[str]] = {}
+        self._writes: Dict[str, int] = {}
+        self.revalidated = 0
+        self.refetched = 0
+        self.served_stale = 0
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Cached listing: ``{body, etag, headers, fetched_at, source}``"""
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        key = make_cache_key(path, params)
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl_seconds:
+            return {**entry, "source": "cache"}
+        return await self.inflight.do(key, lambda: self._fetch(key, path, params, entry))
+
+    def invalidate(self, path: Optional[str] = None) -> int:
+        """Drop the cached listings of ``path``'s collection (all if None); returns how many"""
+        if path is None:
+            self._keys.clear()
+            for name in self._writes:
+                self._writes[name] += 1
+            return self.cache.clear()
+
+        name = collection(path)
+        self._writes[name] = self._writes.get(name, 0) + 1
+        return sum(self.cache.delete(key) for key in self._keys.pop(name, set()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "revalidated": self.revalidated,
+            "refetched": self.refetched,
+            "served_stale": self.served_stale
+        }
+
+    async def _fetch(self, key: str, path: str, params: Dict[str, Any], entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        name = collection(path)
+        writes = self._writes.get(name, 0)
+        headers = {}
+        if entry is not None:
+            if entry.get("upstream_etag"):
+                headers["If-None-Match"] = entry["upstream_etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = await self._request("GET", path, params=params or None, headers=headers)
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"WordPress listing {path} unreachable, serving stale copy: {e}")
+            self.served_stale += 1
+            return {**entry, "source": "stale"}
+
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            entry = {**entry, "fetched_at": time.time()}
+            self._store(name, writes, key, entry)
+            return {**entry, "source": "revalidated"}
+
+        if response.status_code != 200:
+            if entry is not None and response.status_code >= 500:
+                print(f"WordPress listing {path} failed ({response.status_code}), serving stale copy")
+                self.served_stale += 1
+                return {**entry, "source": "stale"}
+            raise ListingError(response.status_code, response.text)
+
+        self.refetched += 1
+        body = response.text
+        entry = {
+            "body": body,
+            "etag": body_etag(body),
+            "upstream_etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": {name: response.headers[name] for name in PAGINATION_HEADERS if name in response.headers},
+            "fetched_at": time.time()
+        }
+        self._store(name, writes, key, entry)
+        return {**entry, "source": "upstream"}
+
+    def _store(self, name: str, writes: int, key: str, entry: Dict[str, Any]):
+        if self._writes.get(name, 0) != writes:
+            return
+        self.cache.set(key, entry)
+        self._keys.setdefault(name, set()).add(key)
@@ -1,27 +1,75 @@
 # backend/app/services/wordpress_publisher.py
-import requests
-from typing import Dict, Optional, List
+import asyncio
+import hashlib
+import httpx
+import mimetypes
+import time
+from typing import Any, Dict, Optional, List
 from ..config import settings
 from ..models import WordPressPost
+from ..utils.cache import make_cache_key
+from ..utils.database import Database, get_database
+from ..utils.metrics import record_upstream_error, span
+from ..utils.singleflight import SingleFlight
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit
+from .clients import get_wordpress_client, upstream_slot
+from .taxonomy_cache import TaxonomyCache
+from .wordpress_listings import WordPressListingCache
+from .wordpress_health import WordPressHealthMonitor
 import base64
 import os
 import json
 
+# What WordPress already holds for each published article or image
+IDEMPOTENCY_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS wordpress_objects (
+        fingerprint TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        wp_id INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        result TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )"""
+]
+
+# Article fields that identify "the same draft"
+FINGERPRINT_FIELDS = ('title', 'subtitle', 'body', 'excerpt', 'sources', 'suggested_images', 'tags', 'category')
+
+# Post fields a repeated publish may change on the existing draft
+UPDATABLE_FIELDS = ('featured_media', 'categories', 'tags')
+
 class WordPressPublisher:
-    def __init__(self):
+    def __init__(self, database: Optional[Database] = None):
         self.wp_url = settings.wordpress_url.rstrip('/')
         self.username = settings.wordpress_username
         self.password = settings.wordpress_app_password
         self.auth = (self.username, self.password)
         self.headers = {'Content-Type': 'application/json'}
+        self.taxonomy = TaxonomyCache(
+            self.request,
+            refresh_seconds=settings.wordpress_taxonomy_refresh_seconds
+        )
+        self.database = database or get_database(settings.database_url)
+        self.database.ensure_schema("wordpress_objects", IDEMPOTENCY_SCHEMA)
+        self.listings = WordPressListingCache(
+            self.request,
+            ttl_seconds=settings.wordpress_listing_ttl,
+            stale_seconds=settings.wordpress_listing_stale_seconds,
+            max_entries=settings.wordpress_listing_max_entries
+        )
+        self.inflight = SingleFlight("wordpress")
+        self.health = WordPressHealthMonitor(self, interval=settings.wordpress_health_interval)
+    
+    @property
+    def circuit(self) -> CircuitBreaker:
+        """Circuit breaker shared by every publisher talking to this site"""
+        return get_circuit(f"wordpress:{self.wp_url}")
         
-    def test_connection(self) -> Dict:
+    async def test_connection(self) -> Dict:
         """Test WordPress connection"""
         try:
-            response = requests.get(
-                f"{self.wp_url}/wp-json/wp/v2/users/me",
-                auth=self.auth
-            )
+            response = await self.request("GET", "/users/me")
             
             if response.status_code == 200:
                 return {
@@ -41,183 +89,297 @@ class WordPressPublisher:
                 "error": f"Connection error: {str(e)}"
             }
     
-    async def upload_image(self, image_path: str, alt_text: str = "") -> Optional[int]:
-        """Upload image to WordPress media library"""
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Call the WP REST API over the shared keep-alive client.
         
+        Raises CircuitOpenError without a request while WordPress is known
+        to be down; transport errors and 5xx responses count as failures.
+        Successful writes (posts, media, terms) invalidate the cached
+        listings of the collection they changed.
+        """
+        circuit = self.circuit
         try:
-            with open(image_path, 'rb') as f:
-                files = {
-                    'file': (os.path.basename(image_path), f, 'image/png')
-                }
-                
-                response = requests.post(
-                    f"{self.wp_url}/wp-json/wp/v2/media",
+            circuit.check()
+        except CircuitOpenError:
+            record_upstream_error("wordpress", "CircuitOpenError")
+            raise
+        try:
+            async with upstream_slot("wordpress"):
+                response = await get_wordpress_client().request(
+                    method,
+                    f"{self.wp_url}/wp-json/wp/v2{path}",
                     auth=self.auth,
-                    files=files,
-                    data={'alt_text': alt_text}
+                    **kwargs
+                )
+        except httpx.TransportError:
+            circuit.record_failure()
+            raise
+        except BaseException:
+            circuit.release()
+            raise
+        
+        if response.status_code >= 500:
+            record_upstream_error("wordpress", f"http_{response.status_code}")
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+        if method != "GET" and response.status_code < 300:
+            self.listings.invalidate(path)
+        return response
+    
+    async def upload_image(self, image_path: str, alt_text: str = "") -> Optional[int]:
+        """Upload an image file to the WordPress media library"""
+        
+        try:
+            image_bytes = await asyncio.to_thread(_read_file, image_path)
+        except OSError as e:
+            print(f"Error uploading image: {e}")
+            return None
+        content_type = mimetypes.guess_type(image_path)[0] or 'image/png'
+        return await self.upload_image_bytes(image_bytes, os.path.basename(image_path), content_type, alt_text)
+    
+    async def upload_image_bytes(
+        self,
+        image_bytes: bytes,
+        filename: str,
+        content_type: str = 'image/png',
+        alt_text: str = ""
+    ) -> Optional[int]:
+        """Upload in-memory image bytes; returns the media id"""
+        media = await self.upload_media(image_bytes, filename, content_type, alt_text)
+        return media['media_id'] if media else None
+    
+    async def upload_media(
+        self,
+        image_bytes: bytes,
+        filename: str,
+        content_type: str = 'image/png',
+        alt_text: str = ""
+    ) -> Optional[Dict]:
+        """Upload image bytes to the WordPress media library.
+        
+        Images are fingerprinted by content, so uploading the same bytes
+        again returns what WordPress already has, unless it was deleted
+        there since. Returns ``media_id`` and ``source_url``, or None if
+        the upload failed.
+        """
+        
+        try:
+            fingerprint = make_cache_key("media", self.wp_url, hashlib.sha256(image_bytes).hexdigest())
+            async with span("wp_media", bytes=len(image_bytes)):
+                return await self.inflight.do(
+                    fingerprint,
+                    lambda: self._upload_media(fingerprint, filename, image_bytes, content_type, alt_text)
                 )
-                
-                if response.status_code == 201:
-                    return response.json()['id']
-                else:
-                    print(f"Image upload failed: {response.text}")
-                    return None
-                    
         except Exception as e:
             print(f"Error uploading image: {e}")
             return None
     
+    async def _upload_media(
+        self, fingerprint: str, filename: str, image_bytes: bytes, content_type: str, alt_text: str
+    ) -> Optional[Dict]:
+        existing = await self._recall(fingerprint)
+        if existing:
+            media = await self._existing_media(fingerprint, existing)
+            if media is not None:
+                print(f"Image already uploaded as media {existing['wp_id']}")
+                return media
+        
+        response = await self.request(
+            "POST",
+            "/media",
+            files={'file': (filename, image_bytes, content_type)},
+            data={'alt_text': alt_text}
+        )
+        
+        if response.status_code == 201:
+            media = response.json()
+            result = {'media_id': media['id'], 'source_url': media.get('source_url')}
+            await self._remember(fingerprint, "media", media['id'], {}, result)
+            return result
+        else:
+            print(f"Image upload failed: {response.text}")
+            return None
+    
+    async def _existing_media(self, fingerprint: str, existing: Dict[str, Any]) -> Optional[Dict]:
+        """The stored upload, or None (forgetting it) if WordPress no longer has it"""
+        try:
+            response = await self.request("GET", f"/media/{existing['wp_id']}", params={'_fields': 'id,source_url'})
+        except (httpx.TransportError, CircuitOpenError):
+            return {'source_url': None, **existing['result']}
+        
+        if response.status_code == 404:
+            print(f"Media {existing['wp_id']} was deleted in WordPress; uploading again")
+            await self._forget(fingerprint)
+            return None
+        if response.status_code == 200:
+            return {**existing['result'], 'source_url': response.json().get('source_url')}
+        return {'source_url': None, **existing['result']}
+    
+    async def resolve_taxonomy(self, newsletter_content: Dict) -> Dict[str, List[int]]:
+        """Resolve the article's category and tags to WordPress term ids.
+        
+        Terms are looked up in the taxonomy cache; only names WordPress
+        has never seen cost a request, and those are created in parallel.
+        """
+        
+        async with span("wp_taxonomy"):
+            categories, tags = await asyncio.gather(
+                self.taxonomy.resolve('categories', [newsletter_content.get('category') or 'Newsletter']),
+                self.taxonomy.resolve('tags', newsletter_content.get('tags') or [])
+            )
+        return {'categories': categories[:1], 'tags': tags}
+    
     async def create_draft_post(
         self, 
         newsletter_content: Dict,
-        featured_image_id: Optional[int] = None
+        featured_image_id: Optional[int] = None,
+        taxonomy: Optional[Dict[str, List[int]]] = None
     ) -> Dict:
-        """Create a draft post in WordPress"""
+        """Create a draft post in WordPress, once per article.
+        
+        Pass ``taxonomy`` from ``resolve_taxonomy`` when it was resolved
+        ahead of time; otherwise categories and tags are resolved here.
+        Publishing an article that already has a draft returns that draft
+        (``deduplicated``) without resolving terms again, updating its image
+        (or the terms in ``taxonomy``, when passed) if they changed.
+        """
         
         try:
-            # Prepare post data
-            post_data = {
-                'title': newsletter_content.get('title'),
-                'content': newsletter_content.get('body'),
-                'excerpt': newsletter_content.get('excerpt'),
-                'status': 'draft',
-                'meta': {
-                    'ai_generated': True,
-                    'sources': newsletter_content.get('sources', []),
-                    'suggested_images': newsletter_content.get('suggested_images', [])
-                }
+            fingerprint = self.content_fingerprint(newsletter_content)
+            async with span("wp_post"):
+                return await self.inflight.do(
+                    fingerprint,
+                    lambda: self._publish_draft(fingerprint, newsletter_content, featured_image_id, taxonomy)
+                )
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Error creating post: {str(e)}"
             }
+    
+    def content_fingerprint(self, newsletter_content: Dict) -> str:
+        """Idempotency key of an article on this WordPress site"""
+        return make_cache_key(
+            "post",
+            self.wp_url,
+            {field: newsletter_content.get(field) for field in FINGERPRINT_FIELDS}
+        )
+    
+    async def _publish_draft(
+        self,
+        fingerprint: str,
+        newsletter_content: Dict,
+        featured_image_id: Optional[int],
+        taxonomy: Optional[Dict[str, List[int]]]
+    ) -> Dict:
+        # An article already published costs this one lookup; its category
+        # and tag names are part of the fingerprint, so its terms are known
+        existing = await self._recall(fingerprint)
+        if existing:
+            state = {'featured_media': featured_image_id, **(taxonomy or {})}
+            changes = {
+                field: value for field, value in state.items()
+                if field in UPDATABLE_FIELDS and value and value != existing['state'].get(field)
+            }
+            if not changes:
+                print(f"Draft already published as post {existing['wp_id']}")
+                return {**existing['result'], 'deduplicated': True}
             
-            if featured_image_id:
-                post_data['featured_media'] = featured_image_id
-            
-            # Handle categories and tags
-            category_id = await self._get_or_create_category(
-                newsletter_content.get('category', 'Newsletter')
-            )
-            if category_id:
-                post_data['categories'] = [category_id]
-            
-            # Create tags
-            tag_ids = []
-            for tag_name in newsletter_content.get('tags', []):
-                tag_id = await self._get_or_create_tag(tag_name)
-                if tag_id:
-                    tag_ids.append(tag_id)
-            if tag_ids:
-                post_data['tags'] = tag_ids
-            
-            # Create the post
-            response = requests.post(
-                f"{self.wp_url}/wp-json/wp/v2/posts",
-                auth=self.auth,
+            response = await self.request(
+                "POST",
+                f"/posts/{existing['wp_id']}",
                 headers=self.headers,
-                json=post_data
+                json=changes
             )
-            
-            if response.status_code == 201:
-                post = response.json()
-                return {
-                    'success': True,
-                    'post_id': post['id'],
-                    'edit_url': f"{self.wp_url}/wp-admin/post.php?post={post['id']}&action=edit",
-                    'preview_url': post['link']
-                }
-            else:
+            if response.status_code == 200:
+                await self._remember(
+                    fingerprint, "post", existing['wp_id'], {**existing['state'], **changes}, existing['result']
+                )
+                return {**existing['result'], 'deduplicated': True}
+            if response.status_code != 404:
                 return {
                     'success': False,
-                    'error': f"Post creation failed: {response.status_code}",
+                    'error': f"Post update failed: {response.status_code}",
+                    'status_code': response.status_code,
                     'details': response.text
                 }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"Error creating post: {str(e)}"
+            # The draft was deleted in WordPress; publish it again below
+        
+        # Prepare post data
+        post_data = {
+            'title': newsletter_content.get('title'),
+            'content': newsletter_content.get('body'),
+            'excerpt': newsletter_content.get('excerpt'),
+            'status': 'draft',
+            'meta': {
+                'ai_generated': True,
+                'sources': newsletter_content.get('sources', []),
+                'suggested_images': newsletter_content.get('suggested_images', [])
             }
-    
-    async def _get_or_create_category(self, category_name: str) -> Optional[int]:
-        """Get existing category or create new one"""
+        }
         
-        try:
-            # Search for existing
-            response = requests.get(
-                f"{self.wp_url}/wp-json/wp/v2/categories",
-                params={'search': category_name},
-                auth=self.auth
-            )
-            
-            # FIX: Check if response is valid JSON before parsing
-            if response.status_code != 200:
-                print(f"Category search failed with status {response.status_code}")
-                return None
-            
-            try:
-                categories = response.json()
-            except json.JSONDecodeError as e:
-                print(f"Error with category (invalid JSON response): {e}")
-                return None
-            
-            if categories:
-                return categories[0]['id']
-            
-            # Create new
-            response = requests.post(
-                f"{self.wp_url}/wp-json/wp/v2/categories",
-                auth=self.auth,
-                json={'name': category_name}
-            )
-            
-            if response.status_code == 201:
-                try:
-                    return response.json()['id']
-                except json.JSONDecodeError:
-                    return None
-            
-        except Exception as e:
-            print(f"Error with category: {e}")
+        if featured_image_id:
+            post_data['featured_media'] = featured_image_id
         
-        return None
-    
-    async def _get_or_create_tag(self, tag_name: str) -> Optional[int]:
-        """Get existing tag or create new one"""
+        # Handle categories and tags
+        if taxonomy is None:
+            taxonomy = await self.resolve_taxonomy(newsletter_content)
+        if taxonomy.get('categories'):
+            post_data['categories'] = taxonomy['categories']
+        if taxonomy.get('tags'):
+            post_data['tags'] = taxonomy['tags']
         
-        try:
-            # Search for existing
-            response = requests.get(
-                f"{self.wp_url}/wp-json/wp/v2/tags",
-                params={'search': tag_name},
-                auth=self.auth
-            )
-            
-            # FIX: Check if response is valid JSON before parsing
-            if response.status_code != 200:
-                print(f"Tag search failed with status {response.status_code}")
-                return None
-            
-            try:
-                tags = response.json()
-            except json.JSONDecodeError as e:
-                print(f"Error with tag (invalid JSON response): {e}")
-                return None
-            
-            if tags:
-                return tags[0]['id']
-            
-            # Create new
-            response = requests.post(
-                f"{self.wp_url}/wp-json/wp/v2/tags",
-                auth=self.auth,
-                json={'name': tag_name}
-            )
-            
-            if response.status_code == 201:
-                try:
-                    return response.json()['id']
-                except json.JSONDecodeError:
-                    return None
-            
-        except Exception as e:
-            print(f"Error with tag: {e}")
+        state = {field: post_data.get(field) for field in UPDATABLE_FIELDS}
         
-        return None
\ No newline at end of file
+        # Create the post
+        response = await self.request(
+            "POST",
+            "/posts",
+            headers=self.headers,
+            json=post_data
+        )
+        
+        if response.status_code == 201:
+            post = response.json()
+            result = {
+                'success': True,
+                'post_id': post['id'],
+                'edit_url': f"{self.wp_url}/wp-admin/post.php?post={post['id']}&action=edit",
+                'preview_url': post['link']
+            }
+            await self._remember(fingerprint, "post", post['id'], state, result)
+            return result
+        else:
+            return {
+                'success': False,
+                'error': f"Post creation failed: {response.status_code}",
+                'status_code': response.status_code,
+                'details': response.text
+            }
+    
+    async def _recall(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.fetch_one(
+            "SELECT wp_id, state, result FROM wordpress_objects WHERE fingerprint = ?", (fingerprint,)
+        )
+        if row is None:
+            return None
+        return {'wp_id': row['wp_id'], 'state': json.loads(row['state']), 'result': json.loads(row['result'])}
+    
+    async def _forget(self, fingerprint: str):
+        await self.database.execute("DELETE FROM wordpress_objects WHERE fingerprint = ?", (fingerprint,))
+    
+    async def _remember(self, fingerprint: str, kind: str, wp_id: int, state: Dict, result: Dict):
+        now = time.time()
+        await self.database.execute(
+            """INSERT INTO wordpress_objects (fingerprint, kind, wp_id, state, result, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(fingerprint) DO UPDATE SET
+                   wp_id = excluded.wp_id, state = excluded.state, result = excluded.result, updated_at = excluded.updated_at""",
+            (fingerprint, kind, wp_id, json.dumps(state), json.dumps(result), now, now)
+        )
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
@@ -0,0 +1,221 @@
+# backend/app/utils/cache.py
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable SHA-256 key for JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """Key/value cache with an in-memory LRU tier in front of JSON files.
+
+    Entries expire ``ttl_seconds`` after they were written (0 disables
+    expiry). The memory tier holds at most ``max_entries`` values; the disk
+    tier under ``directory`` survives restarts and is optional. It holds at
+    most ``max_disk_entries`` files (0 = no limit): once a write passes the
+    cap, expired files and then the oldest are deleted until it is back to
+    90% of the cap. Values must be JSON-serializable and are returned as
+    copies.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int,
+        max_entries: int,
+        directory: Optional[str] = None,
+        max_disk_entries: int = 0
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._disk_count = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # Also clears what expired while the process was down
+            self._sweep()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value or None, promoting disk hits into memory"""
+        entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry):
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return copy.deepcopy(entry["value"])
+        if entry is not None:
+            self.delete(key)
+
+        entry = self._read_disk(key)
+        if entry is not None and not self._expired(entry):
+            self._remember(key, entry)
+            self.disk_hits += 1
+            return copy.deepcopy(entry["value"])
+        if entry is not None:
+            self.delete(key)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, metadata: Optional[Dict[str, Any]] = None):
+        """Store a value in both tiers"""
+        entry = {
+            "key": key,
+            "created_at": time.time(),
+            "metadata": metadata or {},
+            "value": copy.deepcopy(value)
+        }
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from both tiers; True if it existed"""
+        existed = self._memory.pop(key, None) is not None
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+                existed = True
+                self._disk_count = max(0, self._disk_count - 1)
+            except OSError as e:
+                print(f"Cache {self.name}: could not delete {path}: {e}")
+        return existed
+
+    def clear(self) -> int:
+        """Remove every entry; returns how many were removed"""
+        keys = set(self._memory) | set(self._disk_keys())
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Describe live entries (without their values), newest first"""
+        described = {}
+        for key in set(self._memory) | set(self._disk_keys()):
+            entry = self._memory.get(key) or self._read_disk(key)
+            if entry is None or self._expired(entry):
+                continue
+            described[key] = {
+                "key": key,
+                "created_at": entry["created_at"],
+                "expires_at": entry["created_at"] + self.ttl_seconds if self.ttl_seconds else None,
+                "in_memory": key in self._memory,
+                "metadata": entry.get("metadata", {})
+            }
+        return sorted(described.values(), key=lambda item: item["created_at"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_keys()),
+            "disk_evictions": self.disk_evictions
+        }
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return bool(self.ttl_seconds) and time.time() - entry["created_at"] > self.ttl_seconds
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _disk_keys(self) -> List[str]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Cache {self.name}: unreadable entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        path = self._path(key)
+        if not path:
+            return
+        temp_path = f"{path}.tmp"
+        is_new = not os.path.exists(path)
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, default=str)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Cache {self.name}: could not persist {key}: {e}")
+            return
+        if is_new:
+            self._disk_count += 1
+            if self.max_disk_entries and self._disk_count > self.max_disk_entries:
+                self._sweep()
+
+    def _sweep(self):
+        """Delete expired files, then the oldest, down to 90% of ``max_disk_entries``"""
+        files = []
+        for key in self._disk_keys():
+            try:
+                files.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                continue
+        files.sort()
+
+        keep = len(files)
+        target = self.max_disk_entries * 9 // 10 if self.max_disk_entries else keep
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else None
+        removed = 0
+        for modified, key in files:
+            # Files are written once per entry, so mtime is when it was created
+            if keep - removed <= target and (cutoff is None or modified >= cutoff):
+                break
+            self._remove_file(key)
+            removed += 1
+        self._disk_count = keep - removed
+        self.disk_evictions += removed
+        if removed:
+            print(f"Cache {self.name}: removed {removed} old entries from disk")
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError as e:
+            print(f"Cache {self.name}: could not delete {self._path(key)}: {e}")
@@ -0,0 +1,101 @@
+# backend/app/utils/database.py
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+SQLITE_PREFIX = "sqlite:///"
+
+# Used when DATABASE_URL is unset or names a database this store cannot open
+DEFAULT_DATABASE_URL = "sqlite:///./temp/newsletter.db"
+
+
+def sqlite_path(database_url: str) -> str:
+    """File path of a ``sqlite:///path`` URL (the only kind supported)"""
+    if not database_url.startswith(SQLITE_PREFIX):
+        raise ValueError(f"Unsupported database URL (expected {SQLITE_PREFIX}...): {database_url}")
+    return database_url[len(SQLITE_PREFIX):]
+
+
+class Database:
+    """Small SQLite store shared by the services that need durable state.
+
+    Every call opens a short-lived connection on a worker thread, so the
+    event loop never blocks on disk and no connection crosses threads.
+    Services register their tables with ``ensure_schema``.
+    """
+
+    def __init__(self, database_url: str):
+        self.path = sqlite_path(database_url)
+        self._schemas: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA busy_timeout=30000")
+        return connection
+
+    def ensure_schema(self, name: str, statements: Sequence[str]):
+        """Run a service's CREATE statements once per process"""
+        with self._lock:
+            if self._schemas.get(name):
+                return
+            connection = self.connect()
+            try:
+                with connection:
+                    for statement in statements:
+                        connection.execute(statement)
+            finally:
+                connection.close()
+            self._schemas[name] = True
+
+    async def run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``func(connection)`` in one transaction on a worker thread"""
+        return await asyncio.to_thread(self.run_sync, func)
+
+    def run_sync(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        connection = self.connect()
+        try:
+            with connection:
+                return func(connection)
+        finally:
+            connection.close()
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Run one statement; returns the last inserted row id"""
+        return await self.run(lambda connection: connection.execute(sql, params).lastrowid)
+
+    async def fetch_all(self, sql: str, params: Sequence[Any] = ()) -> list:
+        return await self.run(lambda connection: [dict(row) for row in connection.execute(sql, params)])
+
+    async def fetch_one(self, sql: str, params: Sequence[Any] = ()):
+        rows = await self.fetch_all(sql, params)
+        return rows[0] if rows else None
+
+
+_databases: Dict[str, Database] = {}
+
+
+def get_database(database_url: Optional[str]) -> Database:
+    """One Database per URL, shared across services.
+
+    Only SQLite is supported. A missing URL, or one for another database
+    (such as a Postgres ``DATABASE_URL`` injected by the host), falls back
+    to ``DEFAULT_DATABASE_URL`` with a warning instead of failing startup.
+    """
+    key = database_url or DEFAULT_DATABASE_URL
+    if key not in _databases:
+        if not key.startswith(SQLITE_PREFIX):
+            scheme = key.split(":", 1)[0]
+            print(f"Warning: unsupported DATABASE_URL scheme '{scheme}'; using {DEFAULT_DATABASE_URL} for local state")
+            _databases[key] = get_database(DEFAULT_DATABASE_URL)
+        else:
+            _databases[key] = Database(key)
+    return _databases[key]
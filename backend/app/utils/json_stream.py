@@ -0,0 +1,254 @@
+# backend/app/utils/json_stream.py
+import json
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Events produced by IncrementalJSONParser.feed:
+#   ("field", key, value)  a top-level member finished parsing
+#   ("chunk", key, text)   newly decoded text of a streamed string member
+#   ("item", key, value)   an element of an itemized array member finished
+Event = Tuple[str, str, Any]
+
+_SEEK, _KEY, _KEY_STRING, _COLON, _VALUE, _STRING_VALUE, _RAW_VALUE, _AFTER_VALUE, _DONE = range(9)
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Parse a streamed top-level JSON object member by member.
+
+    Text before the opening brace (model preamble) is skipped. Members are
+    reported as soon as their value is complete; string members named in
+    ``stream_fields`` are additionally reported piecewise while they are
+    still being written, and elements of array members named in
+    ``item_fields`` are reported one by one as each element completes.
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = (), item_fields: Iterable[str] = ()):
+        self.stream_fields = set(stream_fields)
+        self.item_fields = set(item_fields)
+        self.result: Dict[str, Any] = {}
+        self._buf = ""
+        self._pos = 0
+        self._state = _SEEK
+        self._key = None
+        self._start = 0
+        self._emitted = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> List[Event]:
+        """Consume the next piece of model output and return new events"""
+        self._buf += text
+        events: List[Event] = []
+
+        while self._state != _DONE and self._pos < len(self._buf):
+            if not self._step(events):
+                break
+
+        if self._state == _STRING_VALUE and self._key in self.stream_fields:
+            self._emit_chunk(events, self._pos)
+
+        self._compact()
+        return events
+
+    def close(self) -> Dict[str, Any]:
+        """Return the parsed object, failing if the stream ended early"""
+        if self._state != _DONE:
+            raise ValueError("Incomplete JSON object in stream")
+        return self.result
+
+    def _step(self, events: List[Event]) -> bool:
+        """Advance the state machine; False means more input is needed"""
+        buf = self._buf
+
+        if self._state == _SEEK:
+            index = buf.find("{", self._pos)
+            if index < 0:
+                self._pos = len(buf)
+                return False
+            self._pos = index + 1
+            self._state = _KEY
+
+        elif self._state in (_KEY, _COLON, _AFTER_VALUE):
+            char = buf[self._pos]
+            if char in _WHITESPACE:
+                self._pos += 1
+            elif self._state == _KEY and char == '"':
+                self._start = self._pos
+                self._pos += 1
+                self._state = _KEY_STRING
+            elif self._state == _KEY and char == "}" and not self.result:
+                self._pos += 1
+                self._state = _DONE
+            elif self._state == _COLON and char == ":":
+                self._pos += 1
+                self._state = _VALUE
+            elif self._state == _AFTER_VALUE and char == ",":
+                self._pos += 1
+                self._state = _KEY
+            elif self._state == _AFTER_VALUE and char == "}":
+                self._pos += 1
+                self._state = _DONE
+            else:
+                raise ValueError(f"Unexpected {char!r} in JSON stream")
+
+        elif self._state == _KEY_STRING:
+            end = self._scan_string()
+            if end is None:
+                return False
+            self._key = json.loads(buf[self._start:end + 1])
+            self._pos = end + 1
+            self._state = _COLON
+
+        elif self._state == _VALUE:
+            char = buf[self._pos]
+            if char in _WHITESPACE:
+                self._pos += 1
+            elif char == '"':
+                self._start = self._pos
+                self._pos += 1
+                self._emitted = self._pos
+                self._state = _STRING_VALUE
+            else:
+                self._start = self._pos
+                self._depth = 0
+                self._in_string = False
+                self._escaped = False
+                self._item_start = None
+                self._state = _RAW_VALUE
+
+        elif self._state == _STRING_VALUE:
+            end = self._scan_string()
+            if end is None:
+                return False
+            if self._key in self.stream_fields:
+                self._emit_chunk(events, end)
+            self._finish_value(events, json.loads(buf[self._start:end + 1]), end + 1)
+
+        elif self._state == _RAW_VALUE:
+            end = self._scan_raw(events)
+            if end is None:
+                return False
+            self._finish_value(events, json.loads(buf[self._start:end]), end)
+
+        return True
+
+    def _finish_value(self, events: List[Event], value: Any, end: int):
+        self.result[self._key] = value
+        events.append(("field", self._key, value))
+        self._pos = end
+        self._state = _AFTER_VALUE
+
+    def _scan_string(self):
+        """Move over string content; return the closing quote index or None.
+
+        ``self._pos`` is left on the first character that is not yet safe to
+        decode (an escape sequence cut off by the end of the buffer).
+        """
+        buf = self._buf
+        while True:
+            match = _STRING_SPECIAL.search(buf, self._pos)
+            if match is None:
+                self._pos = len(buf)
+                return None
+
+            index = match.start()
+            if buf[index] == '"':
+                self._pos = index
+                return index
+
+            length = self._escape_length(index)
+            if length is None:
+                self._pos = index
+                return None
+            self._pos = index + length
+
+    def _escape_length(self, index: int):
+        """Length of the complete escape sequence at ``index`` or None"""
+        buf = self._buf
+        if index + 1 >= len(buf):
+            return None
+        if buf[index + 1] != "u":
+            return 2
+        if index + 6 > len(buf):
+            return None
+
+        # Keep UTF-16 surrogate pairs together so they decode to one character
+        if 0xD800 <= int(buf[index + 2:index + 6], 16) <= 0xDBFF:
+            if index + 12 > len(buf):
+                return None
+            if buf[index + 6:index + 8] == "\\u":
+                return 12
+        return 6
+
+    def _scan_raw(self, events: List[Event]):
+        """Find the end of a non-string value (number, literal, array, object)"""
+        buf = self._buf
+        itemize = self._key in self.item_fields
+        for index in range(self._pos, len(buf)):
+            char = buf[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if itemize and self._depth == 1 and char == "[":
+                    self._item_start = index + 1
+            elif char in "]}":
+                if self._depth == 0:
+                    return index
+                if itemize and self._depth == 1 and char == "]":
+                    self._emit_item(events, index)
+                self._depth -= 1
+                if self._depth == 0:
+                    return index + 1
+            elif itemize and self._depth == 1 and char == ",":
+                self._emit_item(events, index)
+                self._item_start = index + 1
+            elif self._depth == 0 and (char == "," or char in _WHITESPACE):
+                return index
+
+        self._pos = len(buf)
+        return None
+
+    def _emit_item(self, events: List[Event], end: int):
+        if self._item_start is None:
+            return
+        raw = self._buf[self._item_start:end].strip()
+        if raw:
+            events.append(("item", self._key, json.loads(raw)))
+
+    def _emit_chunk(self, events: List[Event], end: int):
+        if end > self._emitted:
+            text = json.loads('"' + self._buf[self._emitted:end] + '"')
+            events.append(("chunk", self._key, text))
+            self._emitted = end
+
+    def _compact(self):
+        """Drop consumed input so long streams do not grow the buffer"""
+        if self._state in (_KEY_STRING, _STRING_VALUE, _RAW_VALUE):
+            cut = self._start
+        else:
+            cut = self._pos
+
+        if cut:
+            self._buf = self._buf[cut:]
+            self._pos -= cut
+            self._start -= cut
+            self._emitted -= cut
+            if self._item_start is not None:
+                self._item_start -= cut
@@ -0,0 +1,265 @@
+# backend/app/utils/metrics.py
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans range from cache hits to multi-minute generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Token counters reported in message.usage
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens"
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str], lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str], lock: threading.Lock,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames, lock)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state["count"] if state else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, state["buckets"]):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms rendered for Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, labelnames, self._lock, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def _register(self, kind, name: str, help_text: str, labelnames: Iterable[str]):
+        if name not in self._metrics:
+            self._metrics[name] = kind(name, help_text, labelnames, self._lock)
+        return self._metrics[name]
+
+
+metrics = MetricsRegistry()
+
+SPAN_SECONDS = metrics.histogram("newsletter_span_seconds", "Duration of pipeline spans", ["span"])
+SPANS_IN_FLIGHT = metrics.gauge("newsletter_spans_in_flight", "Pipeline spans currently running", ["span"])
+SPAN_ERRORS = metrics.counter("newsletter_span_errors_total", "Pipeline spans that raised", ["span", "error"])
+UPSTREAM_SECONDS = metrics.histogram(
+    "newsletter_upstream_request_seconds", "Duration of upstream API calls, excluding queueing", ["upstream"]
+)
+UPSTREAM_IN_FLIGHT = metrics.gauge("newsletter_upstream_in_flight", "Upstream API calls in progress", ["upstream"])
+UPSTREAM_ERRORS = metrics.counter(
+    "newsletter_upstream_errors_total", "Failed upstream API calls by error type", ["upstream", "error"]
+)
+LLM_TOKENS = metrics.counter("newsletter_llm_tokens_total", "Tokens reported in message.usage", ["model", "kind"])
+IMAGES_GENERATED = metrics.counter("newsletter_images_generated_total", "Images generated", ["model"])
+
+# Spans of the pipeline run in progress, if it is collecting them
+_current_spans: ContextVar[Optional[Tuple[float, List[Dict[str, Any]]]]] = ContextVar("spans", default=None)
+# Innermost open span, which upstream usage is attributed to
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("span", default=None)
+# Billable usage events of the pipeline run in progress, if it is collecting them
+_current_usage: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("usage", default=None)
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Dict[str, Any]]]:
+    """Collect the spans recorded in this context (and tasks it starts) into a list"""
+    spans: List[Dict[str, Any]] = []
+    token = _current_spans.set((time.perf_counter(), spans))
+    try:
+        yield spans
+    finally:
+        _current_spans.reset(token)
+
+
+@contextmanager
+def collect_usage() -> Iterator[List[Dict[str, Any]]]:
+    """Collect the token and image usage recorded in this context (and tasks it starts)"""
+    events: List[Dict[str, Any]] = []
+    token = _current_usage.set(events)
+    try:
+        yield events
+    finally:
+        _current_usage.reset(token)
+
+
+@asynccontextmanager
+async def span(name: str, **attributes) -> AsyncIterator[Dict[str, Any]]:
+    """Time a block: feeds the span histogram, in-flight gauge and error counter.
+
+    Yields the span record, so callers can add attributes while it runs.
+    """
+    record: Dict[str, Any] = {"name": name, **attributes}
+    started = time.perf_counter()
+    SPANS_IN_FLIGHT.inc(span=name)
+    # Restored with set(), not reset(): spans inside async generators may close in another context
+    parent = _current_span.get()
+    _current_span.set(record)
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        SPAN_ERRORS.inc(span=name, error=record["error"])
+        raise
+    finally:
+        _current_span.set(parent)
+        duration = time.perf_counter() - started
+        SPANS_IN_FLIGHT.dec(span=name)
+        SPAN_SECONDS.observe(duration, span=name)
+        current = _current_spans.get()
+        if current is not None:
+            origin, spans = current
+            spans.append({**record, "start": round(started - origin, 3), "duration": round(duration, 3)})
+
+
+def record_upstream_error(upstream: str, error: str):
+    UPSTREAM_ERRORS.inc(upstream=upstream, error=error)
+
+
+def record_token_usage(model: str, usage) -> Dict[str, int]:
+    """Count the tokens of one response's ``message.usage``; returns them by field.
+
+    The tokens are also added to the current span and, when a run is
+    collecting usage, logged as an event of that span's stage.
+    """
+    counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+    for kind, count in counts.items():
+        if count:
+            LLM_TOKENS.inc(count, model=model, kind=kind)
+    _record_usage_event(model, counts)
+    return counts
+
+
+def record_image_usage(model: str, images: int = 1):
+    """Count generated images, like ``record_token_usage`` does tokens"""
+    IMAGES_GENERATED.inc(images, model=model)
+    _record_usage_event(model, {"images": images})
+
+
+def _record_usage_event(model: str, counts: Dict[str, int]):
+    current = _current_span.get()
+    if current is not None:
+        span_usage = current.setdefault("usage", {})
+        for field, count in counts.items():
+            span_usage[field] = span_usage.get(field, 0) + count
+    events = _current_usage.get()
+    if events is not None:
+        events.append({"stage": current["name"] if current else None, "model": model, **counts})
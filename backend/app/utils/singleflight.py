@@ -0,0 +1,67 @@
+# backend/app/utils/singleflight.py
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one upstream request.
+
+    The first caller for a key (the leader) starts the work; callers that
+    arrive with the same key while it is running (followers) await the
+    leader's result instead of starting their own. The work is cancelled
+    only when every caller waiting on it has gone away.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        follower = call is not None
+
+        if follower:
+            self.coalesced += 1
+            call.followers += 1
+        else:
+            self.leaders += 1
+            call = _Call(asyncio.create_task(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+        # A shared result is copied so each caller can mutate its own
+        return copy.deepcopy(result) if call.followers else result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark a failure as retrieved even if every waiter was cancelled
+        if not call.task.cancelled():
+            call.task.exception()
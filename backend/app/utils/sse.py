@@ -0,0 +1,24 @@
+# backend/app/utils/sse.py
+import json
+from typing import Any, Optional
+
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """Format a payload as a Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    for line in payload.splitlines() or [""]:
+        lines.append(f"data: {line}")
+
+    return "\n".join(lines) + "\n\n"
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
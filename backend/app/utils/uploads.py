@@ -0,0 +1,164 @@
+# backend/app/utils/uploads.py
+import hashlib
+import os
+import uuid
+import zipfile
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Room for multipart boundaries and the other form fields around an upload
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Sniffed type -> the content type DocumentProcessor expects
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "txt": "text/plain"
+}
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UnsupportedFileTypeError(Exception):
+    pass
+
+
+class RequestTooLargeError(HTTPException):
+    """Raised while a guarded request body is read; FastAPI answers it with 413"""
+
+    def __init__(self, max_upload_size: int):
+        super().__init__(status_code=413, detail=f"Request exceeds the {max_upload_size} byte upload limit")
+
+
+class UploadSizeGuard:
+    """ASGI middleware that caps the request body of the upload routes.
+
+    Starlette reads and spools the whole multipart body before a route gets
+    its UploadFile, so ``save_upload``'s limit alone comes too late. A
+    Content-Length over the cap is answered with 413 before anything is
+    read; a chunked or understated body is counted as it arrives and fails
+    with 413 once it passes the cap. Other routes are not limited.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_upload_size: Callable[[], int]):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_upload_size = max_upload_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        max_upload_size = self.max_upload_size()
+        limit = max_upload_size + UPLOAD_FORM_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            error = RequestTooLargeError(max_upload_size)
+            await JSONResponse(status_code=error.status_code, content={"detail": error.detail})(scope, receive, send)
+            return
+
+        received = 0
+
+        async def guarded_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestTooLargeError(max_upload_size)
+            return message
+
+        await self.app(scope, guarded_receive, send)
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+    file_type: str  # a CONTENT_TYPES value
+
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """Identify pdf/docx/txt from the first bytes of a file, or None"""
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        # Any zip for now; save_upload confirms it is a Word document
+        return "docx"
+    if b"\x00" in head:
+        return None
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        if e.start < len(head) - 3:
+            return None
+    return "txt"
+
+
+def _is_word_document(path: str) -> bool:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return "word/document.xml" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+async def save_upload(
+    file: UploadFile,
+    directory: str,
+    max_bytes: int,
+    prefix: str = "upload"
+) -> StoredUpload:
+    """Copy an upload to ``directory`` in fixed-size chunks.
+
+    The file is hashed while it is written, so memory use does not grow
+    with its size. The real type is sniffed from its magic bytes rather
+    than the client's content type. Raises UploadTooLargeError as soon as
+    more than ``max_bytes`` arrive and UnsupportedFileTypeError for
+    anything but PDF, DOCX or UTF-8 text; no partial file is left behind.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file_type = None
+    partial_path = os.path.join(directory, f"{prefix}_{uuid.uuid4().hex}.part")
+
+    try:
+        async with aiofiles.open(partial_path, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if file_type is None:
+                    file_type = sniff_file_type(chunk[:4096])
+                    if file_type is None:
+                        raise UnsupportedFileTypeError("File is not a PDF, Word document or text file")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {max_bytes} byte upload limit")
+                digest.update(chunk)
+                await out.write(chunk)
+
+        if file_type is None:
+            raise UnsupportedFileTypeError("File is empty")
+        if file_type == "docx" and not _is_word_document(partial_path):
+            raise UnsupportedFileTypeError("Zip file is not a Word document")
+
+        path = partial_path[:-len(".part")] + f".{file_type}"
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return StoredUpload(path, size, digest.hexdigest(), CONTENT_TYPES[file_type])
@@ -0,0 +1,17 @@
+# tests/conftest.py
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from app.config import settings
+
+
+@pytest.fixture
+def isolated_state(tmp_path, monkeypatch):
+    """Point the caches, local database and outbox of services built in a test at ``tmp_path``"""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'newsletter.db'}")
+    monkeypatch.setattr(settings, "outbox_dir", str(tmp_path / "outbox"))
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    return tmp_path
@@ -0,0 +1,249 @@
+# tests/fake_servers.py
+"""Local stand-ins for the upstream APIs used by the hermetic tests"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeAPIServer:
+    """Threaded HTTP server answering from a table of route handlers.
+
+    Handlers take the recorded request dict and return
+    ``(status, body, headers)``; ``body`` may be a dict/list (sent as JSON)
+    or bytes. Every request is kept in ``self.requests`` for assertions.
+    A trailing numeric path segment also matches a route registered with
+    ``/{id}`` in its place (e.g. ``/posts/{id}``).
+    """
+
+    def __init__(self, routes=None, delay=0.0):
+        self.routes = dict(routes or {})
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = raw
+
+                request = {
+                    "method": self.command,
+                    "path": parsed.path,
+                    "query": {k: v[-1] for k, v in parse_qs(parsed.query).items()},
+                    "headers": dict(self.headers),
+                    "body": body,
+                    "client": self.client_address,
+                }
+                with server._lock:
+                    server.requests.append(request)
+
+                if server.delay:
+                    time.sleep(server.delay)
+
+                handler = server.routes.get((self.command, parsed.path)) or \
+                    server.routes.get((self.command, re.sub(r"/\d+$", "/{id}", parsed.path)))
+                if handler is None:
+                    status, payload, headers = 404, {"message": "not found"}, {}
+                else:
+                    status, payload, headers = handler(request)
+
+                if isinstance(payload, (dict, list)):
+                    data = json.dumps(payload).encode()
+                    headers = {"Content-Type": "application/json", **headers}
+                else:
+                    data = payload or b""
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, str(value))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        return Handler
+
+
+def anthropic_message(text, usage=None):
+    """Minimal Messages API response body"""
+    return {
+        "id": "msg_fake",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-fake",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage or {"input_tokens": 10, "output_tokens": 20},
+    }
+
+
+def anthropic_stream(text, chunk_size=16, usage=None):
+    """Messages API streaming response delivering ``text`` in small deltas"""
+    usage = usage or {"input_tokens": 10, "output_tokens": 20}
+    message = anthropic_message("", usage={**usage, "output_tokens": 1})
+    message["content"] = []
+    message["stop_reason"] = None
+
+    events = [
+        ("message_start", {"type": "message_start", "message": message}),
+        ("content_block_start", {"type": "content_block_start", "index": 0,
+                                 "content_block": {"type": "text", "text": ""}}),
+    ]
+    for start in range(0, len(text), chunk_size):
+        events.append(("content_block_delta", {
+            "type": "content_block_delta", "index": 0,
+            "delta": {"type": "text_delta", "text": text[start:start + chunk_size]},
+        }))
+    events += [
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {"type": "message_delta",
+                           "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                           "usage": {"output_tokens": usage["output_tokens"]}}),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+
+    body = "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
+    return body.encode(), {"Content-Type": "text/event-stream"}
+
+
+class FakeWordPress:
+    """In-memory WP REST API (terms, posts, media) for FakeAPIServer.
+
+    Term listings honour ``per_page``/``page``/``orderby=id``/``order`` and
+    send ``X-WP-TotalPages``; creating a name that exists (in any case)
+    answers 400 ``term_exists`` like WordPress does.
+    """
+
+    PREFIX = "/wp-json/wp/v2"
+
+    def __init__(self, categories=(), tags=()):
+        self.next_id = 1
+        # Set to an HTTP status to make every endpoint fail with it
+        self.outage = None
+        self.terms = {"categories": [], "tags": []}
+        self.posts = []
+        self.media = []
+        for name in categories:
+            self.add_term("categories", name)
+        for name in tags:
+            self.add_term("tags", name)
+
+    def add_term(self, taxonomy, name):
+        term = {"id": self.next_id, "name": name, "slug": name.lower().replace(" ", "-")}
+        self.next_id += 1
+        self.terms[taxonomy].append(term)
+        return term
+
+    def routes(self):
+        routes = {
+            ("POST", f"{self.PREFIX}/posts"): self._create_post,
+            ("POST", f"{self.PREFIX}/posts/{{id}}"): self._update_post,
+            ("POST", f"{self.PREFIX}/media"): self._create_media,
+            ("GET", f"{self.PREFIX}/media/{{id}}"): self._get_media,
+            ("GET", f"{self.PREFIX}/posts"): self._list_posts,
+            ("GET", f"{self.PREFIX}/users/me"): lambda request: (200, {"id": 1, "name": "admin"}, {}),
+        }
+        for taxonomy in self.terms:
+            routes[("GET", f"{self.PREFIX}/{taxonomy}")] = self._lister(taxonomy)
+            routes[("POST", f"{self.PREFIX}/{taxonomy}")] = self._creator(taxonomy)
+        return {route: self._unless_down(handler) for route, handler in routes.items()}
+
+    def _unless_down(self, handler):
+        def wrapped(request):
+            if self.outage:
+                return self.outage, {"code": "unavailable", "message": "Service Unavailable"}, {}
+            return handler(request)
+        return wrapped
+
+    def _lister(self, taxonomy):
+        def handler(request):
+            query = request["query"]
+            per_page = int(query.get("per_page", 10))
+            page = int(query.get("page", 1))
+            terms = sorted(self.terms[taxonomy], key=lambda term: term["id"], reverse=query.get("order") == "desc")
+            total_pages = max(1, -(-len(terms) // per_page))
+            window = terms[(page - 1) * per_page:page * per_page]
+            return 200, window, {"X-WP-Total": len(terms), "X-WP-TotalPages": total_pages}
+        return handler
+
+    def _creator(self, taxonomy):
+        def handler(request):
+            name = request["body"]["name"]
+            for term in self.terms[taxonomy]:
+                if term["name"].lower() == name.lower():
+                    return 400, {"code": "term_exists", "message": "A term with the name provided already exists.",
+                                 "data": {"status": 400, "term_id": term["id"]}}, {}
+            return 201, self.add_term(taxonomy, name), {}
+        return handler
+
+    def _list_posts(self, request):
+        """Paginated posts of one status, answering If-None-Match with 304"""
+        query = request["query"]
+        per_page = int(query.get("per_page", 10))
+        page = int(query.get("page", 1))
+        posts = [post for post in self.posts if post.get("status") == query.get("status", "publish")]
+        window = posts[(page - 1) * per_page:page * per_page]
+        etag = f'"{hash(json.dumps(window, sort_keys=True)) & 0xffffffff:x}"'
+        headers = {"ETag": etag, "X-WP-Total": len(posts), "X-WP-TotalPages": max(1, -(-len(posts) // per_page))}
+        if request["headers"].get("If-None-Match") == etag:
+            return 304, b"", headers
+        return 200, window, headers
+
+    def _create_post(self, request):
+        post = {"id": 1000 + len(self.posts), "link": f"http://wp.test/?p={1000 + len(self.posts)}", **request["body"]}
+        self.posts.append(post)
+        return 201, post, {}
+
+    def _update_post(self, request):
+        post_id = int(request["path"].rsplit("/", 1)[1])
+        post = next((post for post in self.posts if post["id"] == post_id), None)
+        if post is None:
+            return 404, {"code": "rest_post_invalid_id", "message": "Invalid post ID."}, {}
+        post.update(request["body"])
+        return 200, post, {}
+
+    def _get_media(self, request):
+        media_id = int(request["path"].rsplit("/", 1)[1])
+        media = next((media for media in self.media if media["id"] == media_id), None)
+        if media is None:
+            return 404, {"code": "rest_post_invalid_id", "message": "Invalid post ID."}, {}
+        return 200, media, {}
+
+    def _create_media(self, request):
+        media = {"id": 5000 + len(self.media), "source_url": f"http://wp.test/media/{len(self.media)}.png"}
+        self.media.append(media)
+        return 201, media, {}
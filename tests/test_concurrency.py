@@ -0,0 +1,63 @@
+# tests/test_concurrency.py
+import pytest
+import asyncio
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from app.services.research_engine import ResearchEngine
+from app.services.image_generator import ImageGenerator
+from fake_servers import FakeAPIServer, anthropic_message
+
+# A fresh research cache per test, so earlier runs cannot answer these requests
+pytestmark = pytest.mark.usefixtures("isolated_state")
+
+LATENCY = 0.5
+CONCURRENT_REQUESTS = 4  # within the default per-upstream limits
+
+@pytest.mark.asyncio
+async def test_research_requests_overlap():
+    """Test concurrent research calls take ~1x upstream latency, not Nx"""
+    routes = {("POST", "/v1/messages"): lambda request: (200, anthropic_message("Findings"), {})}
+
+    with FakeAPIServer(routes, delay=LATENCY) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        engine = ResearchEngine(client=client)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            engine.research_topic(topic=f"Topic {i}") for i in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+        await client.close()
+
+    assert all(result['raw_content'] == "Findings" for result in results)
+    assert len(server.requests) == CONCURRENT_REQUESTS
+    assert elapsed < LATENCY * 2
+
+@pytest.mark.asyncio
+async def test_image_requests_overlap():
+    """Test concurrent DALL-E calls do not block the event loop"""
+    routes = {
+        ("POST", "/v1/images/generations"): lambda request: (
+            200, {"created": 0, "data": [{"url": "http://images.test/a.png"}]}, {}
+        )
+    }
+
+    with FakeAPIServer(routes, delay=LATENCY) as server:
+        client = AsyncOpenAI(api_key="test", base_url=f"{server.url}/v1", max_retries=0)
+        generator = ImageGenerator(client=client)
+
+        start = time.perf_counter()
+        urls = await asyncio.gather(*[
+            generator.generate_image(f"Image {i}") for i in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+        await client.close()
+
+    assert urls == ["http://images.test/a.png"] * CONCURRENT_REQUESTS
+    assert elapsed < LATENCY * 2
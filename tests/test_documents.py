@@ -0,0 +1,217 @@
+# tests/test_documents.py
+import pytest
+import asyncio
+import json
+import threading
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from anthropic import AsyncAnthropic
+
+from app.config import settings
+from app.services.document_processor import DocumentProcessor
+from app.services.document_chunker import PageChunker, estimate_tokens, merge_structured, split_document
+from app.services.pdf_extractor import PDFExtractor, close_pdf_pool
+from app.utils.cache import TieredCache
+from app.utils.metrics import collect_spans
+from fake_servers import FakeAPIServer, anthropic_message
+from pdf_fixtures import page_line, write_pdf
+
+def _minutes(pages, paragraphs_per_page=6):
+    return "\f".join(
+        "\n\n".join(f"Page {page} item {item}: the board discussed road maintenance funding." for item in range(paragraphs_per_page))
+        for page in range(pages)
+    )
+
+def test_split_respects_budget_and_page_breaks():
+    """Test chunks stay within budget and break on page boundaries"""
+    text = _minutes(pages=10)
+    page_tokens = estimate_tokens(text.split("\f")[0])
+
+    chunks = split_document(text, max_tokens=page_tokens * 3)
+
+    assert len(chunks) == 4
+    assert all(estimate_tokens(chunk) <= page_tokens * 3 + 1 for chunk in chunks)
+    assert all(chunk.startswith("Page") for chunk in chunks)
+    assert "".join(chunks).replace("\f", "") == text.replace("\f", "")
+
+def test_page_chunker_matches_split_document():
+    """Test chunks packed page by page are the ones the whole text splits into"""
+    text = _minutes(pages=10)
+    page_tokens = estimate_tokens(text.split("\f")[0])
+
+    for max_tokens in (page_tokens * 3, page_tokens // 2, page_tokens * 20):
+        chunker = PageChunker(max_tokens)
+        chunks = [chunk for page in text.split("\f") for chunk in chunker.add(page)]
+        chunks += chunker.finish(text)
+        assert chunks == split_document(text, max_tokens)
+
+def test_split_breaks_oversized_pages_on_paragraphs():
+    """Test a single page bigger than the budget is split without losing text"""
+    text = _minutes(pages=1, paragraphs_per_page=50)
+
+    chunks = split_document(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "".join(chunks) == text
+
+def test_merge_deduplicates_across_chunks():
+    """Test per-chunk results merge into the single-document schema"""
+    merged = merge_structured([
+        {"document_type": "meeting_minutes", "date": "2025-03-04", "title": "Board Meeting",
+         "attendees": ["Jane Doe", "John Roe"], "key_decisions": ["Approved the budget"],
+         "action_items": [{"item": "Publish budget", "owner": "Clerk"}],
+         "upcoming_events": [{"event": "Town Hall", "date": "2025-04-01"}], "summary": "Budget approved."},
+        {"document_type": "general", "date": None, "title": None,
+         "attendees": ["jane doe", "Mary Poe"], "key_decisions": ["Approved the budget.", "Hired a planner"],
+         "action_items": [{"item": "Publish Budget", "owner": "Clerk"}],
+         "upcoming_events": [{"event": "Town hall", "date": "2025-04-01"}], "summary": "Planner hired."},
+    ])
+
+    assert merged["document_type"] == "meeting_minutes"
+    assert merged["title"] == "Board Meeting"
+    assert merged["attendees"] == ["Jane Doe", "John Roe", "Mary Poe"]
+    assert merged["key_decisions"] == ["Approved the budget", "Hired a planner"]
+    assert len(merged["action_items"]) == 1
+    assert len(merged["upcoming_events"]) == 1
+    assert merged["summary"] == "Budget approved. Planner hired."
+
+@pytest.mark.asyncio
+async def test_long_document_structured_in_parallel(monkeypatch):
+    """Test long minutes are structured completely with overlapping chunk calls"""
+    monkeypatch.setattr(settings, "structure_chunk_tokens", 500)
+    text = _minutes(pages=8, paragraphs_per_page=20)
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def messages(request):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        # Long enough for every chunk request to arrive while this one is open
+        time.sleep(0.3)
+        with lock:
+            in_flight["now"] -= 1
+        prompt = request["body"]["messages"][0]["content"]
+        page = prompt.split("Page ")[1].split(" ")[0]
+        return 200, anthropic_message(json.dumps({
+            "document_type": "meeting_minutes",
+            "key_decisions": [f"Decision from page {page}"],
+            "summary": f"Part starting on page {page}."
+        })), {}
+
+    with FakeAPIServer({("POST", "/v1/messages"): messages}) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        processor = DocumentProcessor(client=client)
+        result = await processor._structure_document(text)
+        await client.close()
+
+    prompts = "".join(request["body"]["messages"][0]["content"] for request in server.requests)
+    assert len(server.requests) == result["chunks"] > 1
+    assert "Page 7 item 19" in prompts
+    assert "Decision from page 7" in result["key_decisions"]
+    assert result["full_text"] == text
+    assert in_flight["peak"] > 1
+
+@pytest.mark.asyncio
+async def test_pdf_chunks_structured_while_pages_extract(tmp_path, monkeypatch):
+    """Test full PDF chunks are sent for structuring before extraction finishes"""
+    monkeypatch.setattr(settings, "structure_chunk_tokens", 300)
+    path = str(tmp_path / "packet.pdf")
+    write_pdf(path, pages=24, lines_per_page=10)
+
+    def messages(request):
+        prompt = request["body"]["messages"][0]["content"]
+        page = prompt.split("Page ")[1].split(" ")[0]
+        return 200, anthropic_message(json.dumps({"key_decisions": [f"Decision from page {page}"]})), {}
+
+    with FakeAPIServer({("POST", "/v1/messages"): messages}) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        store = TieredCache("documents", ttl_seconds=60, max_entries=10, directory=str(tmp_path / "store"))
+        processor = DocumentProcessor(client=client, store=store)
+        iter_pages = processor.pdf_extractor.iter_pages
+
+        async def slow_pages(file_path):
+            async for page in iter_pages(file_path):
+                await asyncio.sleep(0.01)
+                yield page
+
+        monkeypatch.setattr(processor.pdf_extractor, "iter_pages", slow_pages)
+        with collect_spans() as spans:
+            result = await processor.process_document(path, "application/pdf")
+        await client.close()
+
+    extract = next(record for record in spans if record["name"] == "extract")
+    parts = [record for record in spans if record["name"] == "structure"]
+    assert len(parts) == len(server.requests) == result["chunks"] > 2
+    assert min(record["start"] for record in parts) < extract["start"] + extract["duration"]
+    assert "Decision from page 24" in result["key_decisions"]
+    assert result["full_text"].count("\f") == 24
+    assert result["extraction"]["pages"] == 24 and result["extraction"]["cached"] is False
+
+@pytest.mark.asyncio
+async def test_pdf_pages_extracted_in_parallel_in_order(tmp_path):
+    """Test pool extraction returns every page, in order, with timings"""
+    path = str(tmp_path / "packet.pdf")
+    write_pdf(path, pages=20, lines_per_page=5)
+    extractor = PDFExtractor(workers=2, pages_per_task=3, min_parallel_pages=1)
+
+    try:
+        pages = [page async for page in extractor.iter_pages(path)]
+        extraction = await extractor.extract(path)
+    finally:
+        close_pdf_pool()
+
+    assert [page.number for page in pages] == list(range(1, 21))
+    assert all(page.text.startswith(page_line(page.number, 1)) for page in pages)
+    assert extraction.text.count("\f") == 20
+    assert extraction.text.index(page_line(20, 5)) > extraction.text.index(page_line(19, 5))
+    timings = extraction.timings()
+    assert timings["pages"] == 20 and timings["workers"] == 2
+    assert len(timings["page_seconds"]) == 20
+
+@pytest.mark.asyncio
+async def test_short_pdf_extracted_without_pool(tmp_path):
+    """Test documents under the parallel threshold skip the process pool"""
+    path = str(tmp_path / "agenda.pdf")
+    write_pdf(path, pages=2, lines_per_page=3)
+
+    extraction = await PDFExtractor(workers=4, min_parallel_pages=16).extract(path)
+
+    assert extraction.workers == 1
+    assert extraction.text == "".join(
+        "\n".join(page_line(page, line) for line in range(1, 4)) + "\n\n\f" for page in (1, 2)
+    )
+
+@pytest.mark.asyncio
+async def test_repeat_upload_served_from_document_store(tmp_path):
+    """Test the same file is extracted and structured once, keyed by content"""
+    def messages(request):
+        return 200, anthropic_message(json.dumps({"document_type": "meeting_minutes", "summary": "Stored."})), {}
+
+    first = tmp_path / "minutes_1.txt"
+    second = tmp_path / "minutes_2.txt"
+    first.write_text("Board approved the budget.")
+    second.write_text("Board approved the budget.")
+
+    with FakeAPIServer({("POST", "/v1/messages"): messages}) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        store = TieredCache("documents", ttl_seconds=60, max_entries=10, directory=str(tmp_path / "store"))
+        processor = DocumentProcessor(client=client, store=store)
+
+        fresh = await processor.process_document(str(first), "text/plain")
+        repeat = await processor.process_document(str(second), "text/plain")
+        refreshed = await processor.process_document(str(second), "text/plain", bypass_cache=True)
+        await client.close()
+
+    assert len(server.requests) == 2
+    assert fresh["extraction"]["cached"] is False
+    assert repeat["extraction"]["cached"] is True
+    assert refreshed["extraction"]["cached"] is False
+    assert repeat["summary"] == "Stored."
+    assert repeat["full_text"] == "Board approved the budget."
+    assert repeat["extraction"]["sha256"] == fresh["extraction"]["sha256"]
+    assert [entry["metadata"]["sha256"] for entry in store.entries()] == [fresh["extraction"]["sha256"]]
@@ -1,10 +1,13 @@
 # tests/test_generation.py
 import pytest
+import json
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
 
 from app.services.newsletter_generator import NewsletterGenerator
+from app.services.prompt_budget import fit_structured, truncate_text
+from app.services.document_chunker import estimate_tokens
 from app.models import ContentType
 
 @pytest.mark.asyncio
@@ -32,4 +35,173 @@ async def test_generate_research_newsletter():
     
     assert result is not None
     assert result.title is not None
-    assert result.body is not None
\ No newline at end of file
+    assert result.body is not None
+
+ARTICLE = {
+    "title": "County Budget Update",
+    "subtitle": None,
+    "excerpt": "What the new budget means for residents.",
+    "suggested_images": ["Goochland courthouse at dawn"],
+    "body": "<p>The Board of Supervisors approved the budget.</p>" * 20,
+    "sources": [{"title": "Goochland County", "url": "", "accessed": ""}],
+    "tags": ["Budget"],
+    "category": "Policy"
+}
+
+def test_incremental_parser_emits_fields_in_order():
+    """Test the streaming parser reports members as they complete"""
+    from app.utils.json_stream import IncrementalJSONParser
+
+    text = "Here is the article:\n" + json.dumps(ARTICLE, indent=2)
+    parser = IncrementalJSONParser(stream_fields={"body"})
+    events = []
+    for start in range(0, len(text), 7):
+        events += parser.feed(text[start:start + 7])
+
+    assert parser.close() == ARTICLE
+    assert [name for kind, name, _ in events if kind == "field"] == list(ARTICLE)
+    assert "".join(value for kind, _, value in events if kind == "chunk") == ARTICLE["body"]
+
+    first_chunk = next(i for i, event in enumerate(events) if event[0] == "chunk")
+    assert events.index(("field", "suggested_images", ARTICLE["suggested_images"])) < first_chunk
+
+@pytest.mark.asyncio
+async def test_stream_newsletter_yields_fields_before_completion():
+    """Test streaming generation surfaces the title before the body finishes"""
+    from anthropic import AsyncAnthropic
+    from fake_servers import FakeAPIServer, anthropic_stream
+
+    routes = {("POST", "/v1/messages"): lambda request: (200, *anthropic_stream(json.dumps(ARTICLE)))}
+
+    with FakeAPIServer(routes) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        generator = NewsletterGenerator(client=client)
+
+        events = [
+            event async for event in generator.stream_newsletter(
+                content_type=ContentType.RESEARCH,
+                input_data={'topic': 'Budget', 'raw_content': 'Findings'},
+                word_count=500
+            )
+        ]
+        await client.close()
+
+    assert server.requests[0]["body"]["stream"] is True
+    assert events[0] == {"type": "field", "name": "title", "value": ARTICLE["title"]}
+    assert "".join(e["text"] for e in events if e["type"] == "body") == ARTICLE["body"]
+    assert events[-1]["type"] == "complete"
+    assert events[-1]["content"]["title"] == ARTICLE["title"]
+
+@pytest.mark.asyncio
+async def test_system_prompt_is_marked_for_prompt_caching():
+    """Test the static system prompt carries a cache breakpoint and cache usage is recorded"""
+    from anthropic import AsyncAnthropic
+    from fake_servers import FakeAPIServer, anthropic_message
+
+    def messages(request):
+        system = request["body"]["system"]
+        assert system[-1]["cache_control"] == {"type": "ephemeral"}
+        first_call = len(server.requests) == 1
+        usage = {
+            "input_tokens": 200,
+            "output_tokens": 900,
+            "cache_creation_input_tokens": 1500 if first_call else 0,
+            "cache_read_input_tokens": 0 if first_call else 1500
+        }
+        return 200, anthropic_message(json.dumps(ARTICLE), usage=usage), {}
+
+    with FakeAPIServer({("POST", "/v1/messages"): messages}) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        generator = NewsletterGenerator(client=client)
+
+        for _ in range(2):
+            result = await generator.generate_newsletter(
+                content_type=ContentType.RESEARCH,
+                input_data={'topic': 'Budget', 'raw_content': 'Findings'},
+                word_count=500
+            )
+        await client.close()
+
+    systems = [request["body"]["system"] for request in server.requests]
+    assert systems[0] == systems[1]
+    assert result.metadata["usage"]["cache_read_input_tokens"] == 1500
+    assert generator.usage["cache_creation_input_tokens"] == 1500
+    assert generator.usage["cache_read_input_tokens"] == 1500
+    assert generator.usage["requests"] == 2
+
+def _meeting(**overrides):
+    return {
+        "document_type": "meeting_minutes", "date": "2025-03-04", "title": "Board Meeting",
+        "attendees": [f"Member {i}" for i in range(12)],
+        "key_decisions": [f"Decision {i} approved unanimously" for i in range(10)],
+        "action_items": [{"item": f"Action {i}", "owner": "Clerk", "deadline": None} for i in range(8)],
+        "discussions": [f"Topic {i}" for i in range(10)],
+        "upcoming_events": [{"event": "Town Hall", "date": "2025-04-01", "details": "Library"}],
+        "important_announcements": [], "summary": "The board met.",
+        "full_text": "\n".join(f"Item {i}: the board discussed the road budget." for i in range(400)),
+        **overrides
+    }
+
+def test_minutes_prompt_sends_structure_once_and_compactly():
+    """Test the raw document is not resent next to its structured summary"""
+    meeting = _meeting()
+    naive_tokens = estimate_tokens(json.dumps(meeting, indent=2))
+
+    prompt, report = NewsletterGenerator()._build_prompt(ContentType.MINUTES, {"structured_data": meeting}, 800)
+
+    assert "Item 399" not in prompt
+    assert all(decision in prompt for decision in meeting["key_decisions"])
+    assert '"owner":"Clerk"' in prompt
+    assert report["sections"]["meeting"]["trimmed"] == []
+    assert report["estimated_tokens"] < naive_tokens / 5
+
+def test_minutes_prompt_falls_back_to_source_excerpt():
+    """Test unstructured minutes still reach the model, cut to their budget"""
+    meeting = {"document_type": "general", "summary": "Unparsed", "full_text": "Budget vote. " * 5000}
+
+    prompt, report = NewsletterGenerator()._build_prompt(ContentType.MINUTES, {"structured_data": meeting}, 800)
+
+    source = report["sections"]["source"]
+    assert "SOURCE DOCUMENT EXCERPT" in prompt
+    assert source["trimmed"] == ["text"] and source["tokens"] <= source["budget"]
+    assert len(report["warnings"]) == 1 and "'source'" in report["warnings"][0]
+
+def test_large_structured_summary_keeps_every_item():
+    """Test a merged multi-chunk summary reaches the prompt without losing list items"""
+    meeting = _meeting(
+        attendees=[f"Member {i}" for i in range(300)],
+        key_decisions=[f"Decision {i} approved after a lengthy public hearing" for i in range(200)],
+        action_items=[{"item": f"Action {i}", "owner": f"Owner {i}", "deadline": "2025-05-01"} for i in range(200)],
+        discussions=[f"Discussion of agenda topic {i}" for i in range(200)]
+    )
+
+    for content_type, data in (
+        (ContentType.MINUTES, {"structured_data": meeting}),
+        (ContentType.HYBRID, {"meeting_data": meeting, "research_data": {"raw_content": "Findings"}})
+    ):
+        prompt, report = NewsletterGenerator()._build_prompt(content_type, data, 800)
+        for field in ("attendees", "key_decisions", "discussions"):
+            assert all(f'"{item}"' in prompt for item in meeting[field])
+        assert all(f'"owner":"Owner {i}"' in prompt for i in range(200))
+        assert report["sections"]["meeting"]["trimmed"] == [] and report["warnings"] == []
+
+def test_structured_budget_trims_lowest_priority_first():
+    """Test over-budget summaries lose attendees and discussions before decisions"""
+    meeting = {k: v for k, v in _meeting().items() if k != "full_text"}
+
+    serialized, trimmed = fit_structured(meeting, 120, ["title", "key_decisions", "discussions", "attendees"])
+
+    assert estimate_tokens(serialized) <= 120
+    assert trimmed[0] == "summary"
+    assert json.loads(serialized)["key_decisions"] == meeting["key_decisions"]
+    assert "attendees" not in json.loads(serialized)
+
+def test_truncate_text_prefers_sentence_boundaries():
+    """Test long findings are cut at a sentence end with a marker"""
+    text = " ".join(f"Finding number {i} is documented." for i in range(200))
+
+    truncated, cut = truncate_text(text, 100)
+
+    assert cut and truncated.endswith("documented. [...]")
+    assert estimate_tokens(truncated) <= 100
+
@@ -0,0 +1,69 @@
+# tests/test_jobs.py
+import pytest
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from app.services.job_manager import JobManager, JobQueueFullError
+from app.models import ContentType, JobStatus
+
+@pytest.mark.asyncio
+async def test_job_reports_stages_and_result():
+    """Test a job runs in the background and records its stages"""
+    manager = JobManager(workers=1, queue_size=5)
+
+    async def runner(progress):
+        progress("research", "started")
+        await asyncio.sleep(0.01)
+        progress("research", "completed")
+        return {"success": True}
+
+    job = manager.submit(ContentType.RESEARCH, runner)
+    assert job.status == JobStatus.QUEUED
+
+    events = [event async for event in manager.stream_events(job.job_id)]
+    await manager.stop()
+
+    info = manager.get(job.job_id)
+    assert info.status == JobStatus.SUCCEEDED
+    assert info.result == {"success": True}
+    assert [stage.name for stage in info.stages] == ["research"]
+    assert info.stages[0].status == "completed"
+    assert events[-1]["status"] == "succeeded"
+
+@pytest.mark.asyncio
+async def test_job_failure_is_recorded():
+    """Test a failing pipeline marks the job failed instead of crashing the worker"""
+    manager = JobManager(workers=1, queue_size=5)
+
+    async def runner(progress):
+        raise RuntimeError("upstream down")
+
+    job = manager.submit(ContentType.RESEARCH, runner)
+    [event async for event in manager.stream_events(job.job_id)]
+    await manager.stop()
+
+    info = manager.get(job.job_id)
+    assert info.status == JobStatus.FAILED
+    assert info.error == "upstream down"
+
+@pytest.mark.asyncio
+async def test_job_queue_is_bounded():
+    """Test submissions beyond the queue size are rejected"""
+    manager = JobManager(workers=1, queue_size=1)
+    release = asyncio.Event()
+
+    async def runner(progress):
+        await release.wait()
+        return {}
+
+    manager.submit(ContentType.RESEARCH, runner)
+    await asyncio.sleep(0)  # let the worker take the first job
+    manager.submit(ContentType.RESEARCH, runner)
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit(ContentType.RESEARCH, runner)
+
+    release.set()
+    await manager.stop()
@@ -0,0 +1,109 @@
+# tests/test_metrics.py
+import pytest
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.utils.metrics import (
+    LLM_TOKENS, SPAN_ERRORS, SPAN_SECONDS, MetricsRegistry, collect_spans, span
+)
+from fake_servers import FakeAPIServer, anthropic_message
+
+
+def test_registry_renders_prometheus_text():
+    """Test counters, gauges and histograms render in the text exposition format"""
+    registry = MetricsRegistry()
+    errors = registry.counter("test_errors_total", "Errors", ["upstream"])
+    errors.inc(upstream='say "hi"')
+    errors.inc(2, upstream="wordpress")
+    registry.gauge("test_in_flight", "Running").set(3)
+    latency = registry.histogram("test_seconds", "Latency", ["span"], buckets=(0.1, 1.0))
+    latency.observe(0.05, span="parse")
+    latency.observe(0.5, span="parse")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_errors_total counter" in lines
+    assert 'test_errors_total{upstream="say \\"hi\\""} 1' in lines
+    assert 'test_errors_total{upstream="wordpress"} 2' in lines
+    assert "test_in_flight 3" in lines
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{span="parse",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{span="parse",le="1"} 2' in lines
+    assert 'test_seconds_bucket{span="parse",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{span="parse"} 2' in lines
+
+    with pytest.raises(ValueError):
+        errors.inc(kind="missing label")
+
+
+@pytest.mark.asyncio
+async def test_spans_collected_across_tasks():
+    """Test spans from tasks started inside a trace land in it, with errors counted"""
+    failures = SPAN_ERRORS.value(span="test_broken", error="RuntimeError")
+
+    async def child(name):
+        async with span(name):
+            await asyncio.sleep(0.01)
+
+    async def broken():
+        async with span("test_broken"):
+            raise RuntimeError("boom")
+
+    with collect_spans() as spans:
+        async with span("test_outer", kind="demo"):
+            await asyncio.gather(asyncio.create_task(child("test_a")), child("test_b"))
+        with pytest.raises(RuntimeError):
+            await broken()
+
+    # Spans outside a trace still feed the metrics
+    async with span("test_untraced"):
+        pass
+
+    assert sorted(record["name"] for record in spans) == ["test_a", "test_b", "test_broken", "test_outer"]
+    outer = next(record for record in spans if record["name"] == "test_outer")
+    assert outer["kind"] == "demo" and outer["duration"] >= 0.01
+    assert next(record for record in spans if record["name"] == "test_broken")["error"] == "RuntimeError"
+    assert SPAN_ERRORS.value(span="test_broken", error="RuntimeError") == failures + 1
+    assert SPAN_SECONDS.count(span="test_untraced") == 1
+
+
+@pytest.mark.asyncio
+async def test_research_records_span_and_tokens(tmp_path):
+    """Test research is traced and its message.usage is counted per model"""
+    from anthropic import AsyncAnthropic
+    from app.services.research_engine import ResearchEngine
+    from app.utils.cache import TieredCache
+
+    routes = {("POST", "/v1/messages"): lambda request: (
+        200, anthropic_message("Findings", usage={"input_tokens": 120, "output_tokens": 30}), {}
+    )}
+    input_tokens = LLM_TOKENS.value(model=settings.default_model, kind="input_tokens")
+
+    with FakeAPIServer(routes) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        cache = TieredCache("research", ttl_seconds=60, max_entries=10, directory=str(tmp_path))
+        engine = ResearchEngine(client=client, cache=cache)
+        with collect_spans() as spans:
+            await engine.research_topic(topic="Water rates")
+            await engine.research_topic(topic="Water rates")
+        await client.close()
+
+    assert [record["name"] for record in spans] == ["research", "research"]
+    assert "cached" not in spans[0] and spans[1]["cached"] is True
+    assert LLM_TOKENS.value(model=settings.default_model, kind="input_tokens") == input_tokens + 120
+
+
+def test_metrics_endpoint():
+    """Test /metrics serves the registry with the Prometheus content type"""
+    client = TestClient(app)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE newsletter_span_seconds histogram" in response.text
+    assert "# TYPE newsletter_upstream_errors_total counter" in response.text
+    assert 'newsletter_outbox_entries{status="pending"}' in response.text
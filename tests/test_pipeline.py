@@ -0,0 +1,317 @@
+# tests/test_pipeline.py
+import pytest
+import asyncio
+import io
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from PIL import Image
+
+from app.config import settings
+from app.services.stage_graph import StageGraph
+from app.services.image_generator import ImageGenerator
+from app.services.image_library import ImageLibrary
+from app.services.image_processor import ImageProcessor
+from app.services.newsletter_pipeline import IncompleteGenerationError, NewsletterPipeline
+from app.services.speculative_image import SpeculativeImage
+from app.services.wordpress_publisher import WordPressPublisher
+from app.models import NewsletterContent, ResearchRequest
+from app.utils.database import Database
+from app.utils.metrics import collect_spans
+from fake_servers import FakeAPIServer, FakeWordPress
+
+def _sleeper(seconds, value=None):
+    async def stage(inputs):
+        await asyncio.sleep(seconds)
+        return value
+    return stage
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap():
+    """Test stages without dependencies between them run concurrently"""
+    graph = StageGraph()
+    graph.add("structure", _sleeper(0.2, "minutes"))
+    graph.add("research", _sleeper(0.3, "findings"))
+    graph.add("generate", lambda inputs: _sleeper(0.05, sorted(inputs))(inputs), depends_on=["structure", "research"])
+
+    start = time.perf_counter()
+    results = await graph.run()
+    elapsed = time.perf_counter() - start
+
+    assert results["generate"] == ["research", "structure"]
+    assert elapsed < 0.5
+    assert graph.critical_path() == ["research", "generate"]
+
+@pytest.mark.asyncio
+async def test_stage_failure_cancels_graph():
+    """Test a failing stage stops the run and reports progress"""
+    events = []
+    graph = StageGraph(progress=lambda stage, status: events.append((stage, status)))
+
+    async def broken(inputs):
+        raise RuntimeError("research failed")
+
+    graph.add("research", broken)
+    graph.add("slow", _sleeper(5))
+    graph.add("generate", _sleeper(0), depends_on=["research"])
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(graph.run(), timeout=1)
+
+    assert ("research", "failed") in events
+    assert not any(stage == "generate" for stage, _ in events)
+
+def test_unknown_dependency_rejected():
+    """Test stages must be registered after their dependencies"""
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("generate", _sleeper(0), depends_on=["research"])
+
+
+class _StubGenerator:
+    """Streams an article whose final suggested image may differ from the first"""
+
+    def __init__(self, first_image, final_image, delay):
+        self.first_image = first_image
+        self.final_image = final_image
+        self.delay = delay
+
+    async def stream_newsletter(self, content_type, input_data, word_count):
+        yield {"type": "item", "name": "suggested_images", "value": self.first_image}
+        await asyncio.sleep(self.delay)
+        yield {"type": "complete", "content": {
+            "title": "Title", "body": "<p>Body</p>", "excerpt": "Excerpt",
+            "suggested_images": [self.final_image], "sources": [],
+            "tags": [], "category": "Newsletter"
+        }}
+
+
+class _StubImages:
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = []
+        self.cancelled = []
+
+    async def generate_image(self, description):
+        self.started.append(description)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(description)
+            raise
+        return f"http://images.test/{len(self.started)}.png"
+
+
+async def _featured_image(generator, images):
+    pipeline = NewsletterPipeline(
+        research_engine=object(), document_processor=object(),
+        newsletter_generator=generator, image_generator=images,
+        wordpress_publisher=object()
+    )
+    speculative = SpeculativeImage(images)
+    content = await pipeline._generate("research", {}, 500, None, speculative)
+    url = await speculative.result(content.suggested_images[0])
+    return speculative, url
+
+@pytest.mark.asyncio
+async def test_speculative_image_overlaps_generation():
+    """Test the featured image starts from partial output and is reused"""
+    images = _StubImages(delay=0.3)
+    generator = _StubGenerator("Courthouse", "Courthouse", delay=0.3)
+
+    start = time.perf_counter()
+    speculative, url = await _featured_image(generator, images)
+    elapsed = time.perf_counter() - start
+
+    assert speculative.outcome == "hit"
+    assert url == "http://images.test/1.png"
+    assert images.started == ["Courthouse"]
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_speculative_image_replaced_when_output_changes():
+    """Test a stale guess is cancelled and the final description generated"""
+    images = _StubImages(delay=0.3)
+    generator = _StubGenerator("Courthouse", "School board meeting", delay=0.05)
+
+    speculative, url = await _featured_image(generator, images)
+    await asyncio.sleep(0)
+
+    assert speculative.outcome == "miss"
+    assert images.started == ["Courthouse", "School board meeting"]
+    assert images.cancelled == ["Courthouse"]
+    assert url == "http://images.test/2.png"
+
+
+class _TruncatedGenerator:
+    """Streams part of an article, then ends as a dropped connection would"""
+
+    async def stream_newsletter(self, content_type, input_data, word_count):
+        yield {"type": "field", "name": "title", "value": "Title"}
+        yield {"type": "body", "text": "<p>Half a para"}
+
+@pytest.mark.asyncio
+async def test_truncated_stream_fails_generation_clearly():
+    """Test a stream without its complete event fails in generate, not in a later stage"""
+    pipeline = NewsletterPipeline(
+        research_engine=object(), document_processor=object(), newsletter_generator=_TruncatedGenerator(),
+        image_generator=object(), wordpress_publisher=object()
+    )
+    events = []
+
+    with pytest.raises(IncompleteGenerationError, match="before the article was complete"):
+        await pipeline._generate("research", {}, 500, events.append)
+    assert [event["type"] for event in events] == ["field", "body"]
+
+
+class _ServedImages(ImageGenerator):
+    """Image generator whose "DALL-E" output is served by a fake server"""
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.generated = []
+
+    async def generate_image(self, description, style="professional"):
+        self.generated.append(description)
+        return self.url
+
+
+def _image_pipeline(tmp_path, server):
+    database = Database(f"sqlite:///{tmp_path / 'state.db'}")
+    publisher = WordPressPublisher(database=database)
+    publisher.wp_url = server.url
+    return NewsletterPipeline(
+        research_engine=object(), document_processor=object(), newsletter_generator=object(),
+        image_generator=_ServedImages(f"{server.url}/generated.png"), wordpress_publisher=publisher,
+        publish_outbox=object(), image_library=ImageLibrary(database=database)
+    )
+
+def _png(width=1792, height=1024):
+    """Photo-like PNG: smooth gradients with sensor-style noise"""
+    image = Image.merge("RGB", [
+        Image.linear_gradient("L").resize((width, height)),
+        Image.effect_noise((width, height), 24),
+        Image.radial_gradient("L").resize((width, height)),
+    ])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.mark.asyncio
+async def test_featured_image_compressed_in_memory(tmp_path, monkeypatch):
+    """Test the generated PNG is re-encoded and uploaded from memory, not via upload_dir"""
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    source = _png()
+    wordpress = FakeWordPress()
+    routes = {**wordpress.routes(), ("GET", "/generated.png"): lambda request: (200, source, {"Content-Type": "image/png"})}
+
+    with FakeAPIServer(routes) as server:
+        pipeline = _image_pipeline(tmp_path, server)
+        content = NewsletterContent(title="T", body="B", excerpt="E", suggested_images=["Courthouse"],
+                                    sources=[], tags=[], category="Newsletter")
+        with collect_spans() as spans:
+            image = await pipeline._create_featured_image(content, "Courthouse")
+
+    assert [record["name"] for record in spans] == ["image_download", "image_encode", "wp_media"]
+    assert spans[0]["bytes"] == len(source)
+    upload = next(r for r in server.requests if r["path"].endswith("/media"))
+    processed = image["processed"]
+    assert image["media_id"] == wordpress.media[0]["id"]
+    assert processed.content_type == "image/webp" and image["filename"].endswith(".webp")
+    assert processed.width == settings.image_max_width and len(processed.data) < len(source) / 4
+    assert Image.open(io.BytesIO(processed.thumbnail)).width == settings.image_thumbnail_width
+    assert b"image/webp" in upload["body"] and len(upload["body"]) < len(processed.data) + 1024
+    assert not os.path.exists(settings.upload_dir) or os.listdir(settings.upload_dir) == []
+
+
+def _article(image, tags):
+    return NewsletterContent(title="T", body="B", excerpt="E", suggested_images=[image],
+                             sources=[], tags=tags, category="Newsletter")
+
+@pytest.mark.asyncio
+async def test_similar_theme_reuses_library_image(tmp_path):
+    """Test a near-duplicate description reuses the uploaded media instead of calling DALL-E"""
+    wordpress = FakeWordPress()
+    routes = {**wordpress.routes(), ("GET", "/generated.png"): lambda request: (200, _png(320, 180), {})}
+
+    with FakeAPIServer(routes) as server:
+        pipeline = _image_pipeline(tmp_path, server)
+        first = await pipeline._create_featured_image(_article("Goochland courthouse at dawn", ["Courthouse"]), "")
+        await pipeline._create_featured_image(_article("School board meeting in session", ["Schools"]), "")
+        reused = await pipeline._create_featured_image(_article("The Goochland courthouse", ["Courthouse"]), "")
+        fresh = await pipeline._create_featured_image(_article("County budget spreadsheet", ["Budget"]), "")
+        uploads = len(wordpress.media)
+        restarted = ImageLibrary(database=pipeline.image_library.database)
+
+    assert reused["media_id"] == first["media_id"] and reused["library"]["reused"]
+    assert reused["url"] == wordpress.media[0]["source_url"] and reused["data"] is None
+    assert pipeline.image_generator.generated == [
+        "Goochland courthouse at dawn", "School board meeting in session", "County budget spreadsheet"
+    ]
+    assert fresh["library"] is None and uploads == 3
+    assert pipeline.image_library.stats()["hits"] == 1
+    assert restarted.match("Goochland courthouse", wp_url=server.url).image.uses == 1
+    assert restarted.match("Goochland courthouse", wp_url="http://other.test") is None
+
+@pytest.mark.asyncio
+async def test_library_keeps_theme_words_that_appear_in_the_template(tmp_path):
+    """Test only the literal prompt boilerplate is ignored, not its words in real themes"""
+    library = ImageLibrary(database=Database(f"sqlite:///{tmp_path / 'state.db'}"), threshold=0.3)
+    generator = ImageGenerator()
+    for media_id, description in enumerate(["Virginia community center opening", "Goochland courthouse at dawn"]):
+        await library.add(description, generator._refine_prompt(description, "professional"),
+                          media_id=media_id, wp_url="http://wp.test")
+
+    [match] = library.search("Virginia community center", wp_url="http://wp.test")
+    assert match.image.description == "Virginia community center opening" and match.score > 0.5
+    assert library.search("Professional clean illustration avoid partisan symbols", wp_url="http://wp.test") == []
+
+@pytest.mark.asyncio
+async def test_jpeg_output_drops_alpha():
+    """Test transparent PNGs can be re-encoded as JPEG"""
+    buffer = io.BytesIO()
+    Image.new("RGBA", (800, 600), (10, 20, 30, 128)).save(buffer, format="PNG")
+
+    processed = await ImageProcessor(image_format="jpeg", max_width=400, thumbnail_width=100).process(buffer.getvalue())
+
+    assert processed.content_type == "image/jpeg" and (processed.width, processed.height) == (400, 300)
+    assert Image.open(io.BytesIO(processed.data)).mode == "RGB"
+    assert Image.open(io.BytesIO(processed.thumbnail)).size == (100, 75)
+
+
+class _BatchPipeline(NewsletterPipeline):
+    def __init__(self):
+        super().__init__(object(), object(), object(), object(), object())
+        self.running = 0
+        self.peak = 0
+
+    async def run_research(self, request, progress=None, on_event=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(float(request.context))
+            if request.topic == "broken":
+                raise RuntimeError("generation failed")
+            return {"success": True, "topic": request.topic}
+        finally:
+            self.running -= 1
+
+@pytest.mark.asyncio
+async def test_batch_reports_items_as_they_finish():
+    """Test batch items stream back in completion order and failures stay isolated"""
+    pipeline = _BatchPipeline()
+    requests = [
+        ResearchRequest(topic="slow", context="0.3"),
+        ResearchRequest(topic="broken", context="0.1"),
+        ResearchRequest(topic="fast", context="0.05"),
+    ]
+
+    outcomes = [outcome async for outcome in pipeline.run_batch(requests, max_concurrency=2)]
+
+    assert [o["topic"] for o in outcomes] == ["broken", "fast", "slow"]
+    assert [o["success"] for o in outcomes] == [False, True, True]
+    assert outcomes[0]["error"] == "generation failed"
+    assert pipeline.peak == 2
@@ -1,11 +1,19 @@
 # tests/test_research.py
 import pytest
+import asyncio
+import time
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
 
+from anthropic import AsyncAnthropic
+
 from app.services.research_engine import ResearchEngine
-from app.config import settings
+from app.utils.cache import TieredCache
+from fake_servers import FakeAPIServer, anthropic_message
+
+# Engines built with default settings cache under tmp_path, not the shared ./temp
+pytestmark = pytest.mark.usefixtures("isolated_state")
 
 @pytest.mark.asyncio
 async def test_research_engine_initialization():
@@ -39,4 +47,74 @@ async def test_research_with_sources():
     )
     
     assert result is not None
-    assert 'citations' in result
\ No newline at end of file
+    assert 'citations' in result
+
+@pytest.mark.asyncio
+async def test_research_cache_skips_repeat_calls(tmp_path):
+    """Test regenerating the same topic is served from the research cache"""
+    routes = {("POST", "/v1/messages"): lambda request: (200, anthropic_message("Findings"), {})}
+
+    with FakeAPIServer(routes) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        cache = TieredCache("research", ttl_seconds=60, max_entries=10, directory=str(tmp_path))
+        engine = ResearchEngine(client=client, cache=cache)
+
+        first = await engine.research_topic(topic="County Budget", sources=["https://virginia.gov/"])
+        again = await engine.research_topic(topic="  county   budget ", sources=["https://virginia.gov"])
+        assert len(server.requests) == 1
+        assert again == first
+
+        # A fresh engine only has the disk tier to go on
+        restarted = ResearchEngine(
+            client=client,
+            cache=TieredCache("research", ttl_seconds=60, max_entries=10, directory=str(tmp_path))
+        )
+        await restarted.research_topic(topic="County Budget", sources=["https://virginia.gov"])
+        assert len(server.requests) == 1
+        assert restarted.cache.stats()["disk_hits"] == 1
+
+        await engine.research_topic(topic="County Budget", sources=["https://virginia.gov"], bypass_cache=True)
+        assert len(server.requests) == 2
+        await client.close()
+
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_cache_disk_tier_is_capped_oldest_first(tmp_path):
+    """Test the disk tier evicts its oldest files past the cap and sweeps expired ones on start"""
+    cache = TieredCache("research", ttl_seconds=60, max_entries=2, directory=str(tmp_path), max_disk_entries=10)
+    for index in range(11):
+        cache.set(f"key-{index}", index)
+        os.utime(tmp_path / f"key-{index}.json", (1000 + index, time.time() - 30 + index))
+
+    assert cache.stats()["disk_entries"] == 9 and cache.stats()["disk_evictions"] == 2
+    assert not os.path.exists(tmp_path / "key-0.json") and not os.path.exists(tmp_path / "key-1.json")
+    assert cache.get("key-10") == 10
+
+    os.utime(tmp_path / "key-2.json", (1000, time.time() - 120))
+    restarted = TieredCache("research", ttl_seconds=60, max_entries=2, directory=str(tmp_path), max_disk_entries=10)
+    assert restarted.stats()["disk_entries"] == 8 and restarted.get("key-2") is None
+
+
+@pytest.mark.asyncio
+async def test_identical_inflight_research_is_coalesced(tmp_path):
+    """Test simultaneous submissions of one topic share a single upstream call"""
+    routes = {("POST", "/v1/messages"): lambda request: (200, anthropic_message("Findings"), {})}
+
+    with FakeAPIServer(routes, delay=0.3) as server:
+        client = AsyncAnthropic(api_key="test", base_url=server.url, max_retries=0)
+        engine = ResearchEngine(
+            client=client,
+            cache=TieredCache("research", ttl_seconds=60, max_entries=10, directory=str(tmp_path))
+        )
+
+        results = await asyncio.gather(*[
+            engine.research_topic(topic="School board meeting") for _ in range(3)
+        ])
+        await client.close()
+
+    assert len(server.requests) == 1
+    assert all(result['raw_content'] == "Findings" for result in results)
+    results[0]['topic'] = "mutated"
+    assert 'topic' not in results[1]
+    assert engine.inflight.stats() == {"leaders": 1, "coalesced": 2, "in_flight": 0}
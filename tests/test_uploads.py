@@ -0,0 +1,241 @@
+# tests/test_uploads.py
+import pytest
+import asyncio
+import hashlib
+import io
+import json
+import time
+import zipfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routes import newsletter as newsletter_routes
+from app.services.scratch_storage import ScratchQuotaExceededError, ScratchStorage
+from app.utils.uploads import (
+    UPLOAD_CHUNK_SIZE, UnsupportedFileTypeError, UploadTooLargeError,
+    save_upload, sniff_file_type
+)
+
+
+class _RecordingFile(io.BytesIO):
+    """Records the largest read so tests can check uploads are not slurped"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.largest_read = max(self.largest_read, len(chunk))
+        return chunk
+
+
+def _docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<document/>")
+    return buffer.getvalue()
+
+def test_sniff_uses_magic_bytes():
+    """Test the real type comes from file content, not the declared type"""
+    assert sniff_file_type(b"%PDF-1.7\n...") == "pdf"
+    assert sniff_file_type(_docx_bytes()[:4096]) == "docx"
+    assert sniff_file_type("Minutes of the March meeting — approved".encode("utf-8")) == "txt"
+    assert sniff_file_type(b"\x89PNG\r\n\x1a\n\x00\x00") is None
+    assert sniff_file_type(b"\xff\xfe\xfa binary \xc3 data" * 10) is None
+
+@pytest.mark.asyncio
+async def test_upload_streamed_and_hashed_in_chunks(tmp_path):
+    """Test large uploads are copied chunk by chunk with an on-the-fly hash"""
+    data = b"%PDF-1.4\n" + os.urandom(3 * UPLOAD_CHUNK_SIZE + 123)
+    source = _RecordingFile(data)
+
+    upload = await save_upload(UploadFile(source, filename="minutes.txt"), str(tmp_path), max_bytes=len(data))
+
+    assert upload.file_type == "application/pdf"
+    assert upload.path.endswith(".pdf")
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert source.largest_read == UPLOAD_CHUNK_SIZE
+    with open(upload.path, "rb") as f:
+        assert f.read() == data
+
+@pytest.mark.asyncio
+async def test_oversized_upload_rejected_without_leftovers(tmp_path):
+    """Test the size limit stops the copy early and removes the partial file"""
+    source = _RecordingFile(b"a" * (5 * UPLOAD_CHUNK_SIZE))
+
+    with pytest.raises(UploadTooLargeError):
+        await save_upload(UploadFile(source), str(tmp_path), max_bytes=UPLOAD_CHUNK_SIZE + 1)
+
+    assert source.tell() == 2 * UPLOAD_CHUNK_SIZE
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_zip_that_is_not_docx_rejected(tmp_path):
+    """Test zip archives must contain a Word document"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("payload.exe", "MZ")
+    buffer.seek(0)
+
+    with pytest.raises(UnsupportedFileTypeError):
+        await save_upload(UploadFile(buffer), str(tmp_path), max_bytes=1024 * 1024)
+
+    assert os.listdir(tmp_path) == []
+
+def test_minutes_route_rejects_by_size_and_content():
+    """Test the minutes endpoint answers 413 and 400 before any generation"""
+    client = TestClient(app)
+
+    oversized = client.post(
+        "/api/newsletter/generate/minutes",
+        headers={"content-length": str(50 * 1024 * 1024), "content-type": "multipart/form-data; boundary=x"},
+        content=b"--x--"
+    )
+    disguised = client.post(
+        "/api/newsletter/generate/minutes",
+        files={"file": ("minutes.pdf", b"\x89PNG\r\n\x1a\n\x00\x00", "application/pdf")}
+    )
+
+    assert oversized.status_code == 413
+    assert disguised.status_code == 400
+    assert newsletter_routes.scratch_storage.active == {}
+
+def test_upload_routes_cut_off_chunked_bodies(monkeypatch):
+    """Test a body without Content-Length is stopped with 413 once it passes the limit"""
+    monkeypatch.setattr(settings, "max_upload_size", 1024)
+    body = b"--x\r\nContent-Disposition: form-data; name=\"file\"; filename=\"minutes.txt\"\r\n\r\n"
+
+    def chunks():
+        yield body
+        for _ in range(200):
+            yield b"a" * 1024
+
+    client = TestClient(app)
+    response = client.post(
+        "/api/newsletter/stream/hybrid",
+        headers={"content-type": "multipart/form-data; boundary=x"},
+        content=chunks()
+    )
+
+    # Rejected by the guard while reading, not by save_upload after parsing
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Request exceeds the 1024 byte upload limit"
+    assert newsletter_routes.scratch_storage.active == {}
+
+def test_minutes_route_releases_workspace_after_run(monkeypatch, tmp_path):
+    """Test each request gets its own workspace, deleted once the pipeline finishes"""
+    storage = ScratchStorage(root=str(tmp_path))
+    monkeypatch.setattr(newsletter_routes, "scratch_storage", storage)
+    seen = []
+
+    async def run_minutes(file_path, **kwargs):
+        seen.append(file_path)
+        assert os.path.exists(file_path)
+        return {"success": True}
+    monkeypatch.setattr(newsletter_routes.pipeline, "run_minutes", run_minutes)
+
+    client = TestClient(app)
+    responses = [
+        client.post("/api/newsletter/generate/minutes", files={"file": ("minutes.txt", b"Minutes", "text/plain")})
+        for _ in range(2)
+    ]
+
+    assert all(response.json() == {"success": True} for response in responses)
+    assert len({os.path.dirname(path) for path in seen}) == 2
+    assert os.listdir(tmp_path) == [] and storage.stats()["released"] == 2
+
+def _sse_events(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        data = "\n".join(line[len("data: "):] for line in message.splitlines() if line.startswith("data: "))
+        events.append(json.loads(data))
+    return events
+
+@pytest.mark.parametrize("kind, form, expected", [
+    ("minutes", {"highlight_items": "budget,roads"}, {"highlight_items": ["budget", "roads"]}),
+    ("hybrid", {"research_topic": "County budget"}, {"research_topic": "County budget"})
+])
+def test_upload_routes_stream_events_and_release_workspace(monkeypatch, tmp_path, kind, form, expected):
+    """Test minutes and hybrid stream stages, article fields and the result as SSE"""
+    storage = ScratchStorage(root=str(tmp_path))
+    monkeypatch.setattr(newsletter_routes, "scratch_storage", storage)
+    calls = []
+
+    async def run(file_path, progress=None, on_event=None, **kwargs):
+        assert os.path.exists(file_path)
+        calls.append(kwargs)
+        progress("generate", "started")
+        on_event({"type": "field", "field": "title", "value": "Budget passes"})
+        progress("generate", "completed")
+        return {"success": True}
+    monkeypatch.setattr(newsletter_routes.pipeline, f"run_{kind}", run)
+
+    client = TestClient(app)
+    response = client.post(
+        f"/api/newsletter/stream/{kind}",
+        files={"file": ("minutes.txt", b"Minutes", "text/plain")},
+        data=form
+    )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [event["type"] for event in events] == ["stage", "field", "stage", "result"]
+    assert events[1]["value"] == "Budget passes" and events[-1]["result"] == {"success": True}
+    assert expected.items() <= calls[0].items()
+    assert os.listdir(tmp_path) == [] and storage.stats()["released"] == 1
+
+@pytest.mark.asyncio
+async def test_scratch_workspaces_are_unique_and_quota_enforced(tmp_path):
+    """Test concurrent workspaces never collide and a full root refuses new jobs"""
+    storage = ScratchStorage(root=str(tmp_path), quota_bytes=1000, reserve_bytes=0)
+    workspaces = await asyncio.gather(*[storage.create("minutes") for _ in range(20)])
+    with open(workspaces[0].file("minutes.pdf"), "wb") as f:
+        f.write(b"x" * 1500)
+    storage.track(workspaces[0], 1500)
+
+    with pytest.raises(ScratchQuotaExceededError):
+        await storage.create("minutes")
+    await storage.release(workspaces[0])
+    replacement = await storage.create("minutes")
+
+    assert len({workspace.path for workspace in workspaces}) == 20
+    assert replacement.path not in {workspace.path for workspace in workspaces}
+    assert storage.stats()["rejected"] == 1 and storage.stats()["used_bytes"] == 0
+
+@pytest.mark.asyncio
+async def test_scratch_collector_removes_only_leftover_workspaces(tmp_path):
+    """Test GC frees stale workspaces of earlier runs but never live ones or foreign files"""
+    def age(path):
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    storage = ScratchStorage(root=str(tmp_path), max_age_seconds=3600)
+    running = await storage.create("minutes")
+    age(running.path)
+    leftover = tmp_path / f"hybrid-{'a' * 32}"
+    leftover.mkdir()
+    (leftover / "minutes.pdf").write_bytes(b"%PDF" * 100)
+    age(leftover)
+    recent = tmp_path / f"minutes-{'b' * 32}"
+    recent.mkdir()
+    foreign = tmp_path / "newsletter_20240101_120000.png"
+    foreign.write_bytes(b"\x89PNG" * 100)
+    age(foreign)
+
+    await storage.start()
+    used_at_start = storage.used_bytes
+    removed = await storage.collect()
+    await storage.stop()
+
+    assert used_at_start == 400 and removed == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([running.id, recent.name, foreign.name])
+    assert list(storage.active) == [running.id]
+    assert storage.stats()["freed_bytes"] == 400 and storage.used_bytes == 0
@@ -0,0 +1,144 @@
+# tests/test_usage.py
+import pytest
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import ContentType
+from app.routes import newsletter
+from app.services.newsletter_pipeline import NewsletterPipeline
+from app.services.stage_graph import StageGraph
+from app.services.usage_ledger import UsageLedger, usage_cost
+from app.utils.database import Database
+from app.utils.metrics import collect_usage, record_image_usage, record_token_usage, span
+
+PRICES = {
+    "claude-test": {"input_tokens": 3.0, "output_tokens": 15.0, "cache_read_input_tokens": 0.3},
+    "dall-e-3": {"images": 0.08}
+}
+
+
+def _ledger(tmp_path):
+    return UsageLedger(database=Database(f"sqlite:///{tmp_path / 'state.db'}"), prices=PRICES)
+
+
+def _usage(input_tokens=0, output_tokens=0, cache_read_input_tokens=0):
+    return SimpleNamespace(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cache_creation_input_tokens=None,
+        cache_read_input_tokens=cache_read_input_tokens
+    )
+
+
+def test_usage_cost_uses_price_table():
+    """Test tokens are priced per million and images per image"""
+    assert usage_cost("claude-test", {"input_tokens": 1_000_000, "output_tokens": 100_000}, PRICES) == 4.5
+    assert usage_cost("dall-e-3", {"images": 2}, PRICES) == 0.16
+    assert usage_cost("unknown-model", {"input_tokens": 10}, PRICES) is None
+
+
+@pytest.mark.asyncio
+async def test_usage_attributed_to_enclosing_span():
+    """Test recorded usage is logged under the innermost span's stage"""
+    with collect_usage() as events:
+        async with span("generate") as record:
+            record_token_usage("claude-test", _usage(100, 50))
+            async with span("image_generate"):
+                record_image_usage("dall-e-3")
+        record_token_usage("claude-test", _usage(1))
+
+    assert events == [
+        {"stage": "generate", "model": "claude-test", "input_tokens": 100, "output_tokens": 50,
+         "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+        {"stage": "image_generate", "model": "dall-e-3", "images": 1},
+        {"stage": None, "model": "claude-test", "input_tokens": 1, "output_tokens": 0,
+         "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    ]
+    assert record["usage"]["input_tokens"] == 100
+
+
+@pytest.mark.asyncio
+async def test_ledger_aggregates_by_day_content_type_and_model(tmp_path):
+    """Test generations are recorded per stage and summed by each grouping"""
+    ledger = _ledger(tmp_path)
+    summary = await ledger.record("gen-1", "research", [
+        {"stage": "research", "model": "claude-test", "input_tokens": 1000, "output_tokens": 500},
+        {"stage": "generate", "model": "claude-test", "input_tokens": 2000, "output_tokens": 1000,
+         "cache_read_input_tokens": 2000},
+        {"stage": "image_generate", "model": "dall-e-3", "images": 1}
+    ])
+    await ledger.record("gen-2", "minutes", [
+        {"stage": "structure", "model": "other-model", "input_tokens": 400, "output_tokens": 100}
+    ])
+
+    assert summary["calls"] == 3 and summary["images"] == 1
+    assert summary["cost_usd"] == pytest.approx(0.0105 + 0.0216 + 0.08)
+    assert summary["by_stage"]["generate"]["cache_read_share"] == 0.5
+    assert summary["unpriced_calls"] == 0
+
+    by_model = {row["model"]: row for row in await ledger.aggregate("model")}
+    assert by_model["claude-test"]["input_tokens"] == 3000 and by_model["claude-test"]["calls"] == 2
+    assert by_model["other-model"]["unpriced_calls"] == 1 and by_model["other-model"]["cost_usd"] == 0.0
+
+    by_type = {row["content_type"]: row for row in await ledger.aggregate("content_type", days=7)}
+    assert by_type["research"]["generations"] == 1 and by_type["minutes"]["output_tokens"] == 100
+
+    [today] = await ledger.aggregate("day")
+    assert today["generations"] == 2 and today["cost_usd"] == pytest.approx(summary["cost_usd"])
+    assert [row["generation"] for row in await ledger.aggregate("generation")] == ["gen-2", "gen-1"]
+
+    totals = await ledger.totals()
+    assert totals["calls"] == 4 and totals["generations"] == 2
+
+    with pytest.raises(ValueError):
+        await ledger.aggregate("prompt")
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_usage_is_recorded(tmp_path):
+    """Test tokens spent by a run that fails still reach the ledger"""
+    ledger = _ledger(tmp_path)
+    pipeline = NewsletterPipeline(
+        research_engine=object(), document_processor=object(), newsletter_generator=object(),
+        image_generator=object(), wordpress_publisher=object(), publish_outbox=object(),
+        image_library=None, usage_ledger=ledger
+    )
+
+    async def generate(inputs):
+        async with span("generate"):
+            record_token_usage("claude-test", _usage(700, 300))
+            raise RuntimeError("model output truncated")
+
+    graph = StageGraph()
+    graph.add("generate", generate)
+    with pytest.raises(RuntimeError):
+        await pipeline._run(graph, ContentType.RESEARCH, "Header")
+
+    [row] = await ledger.aggregate("stage")
+    assert row["stage"] == "generate" and row["input_tokens"] == 700
+
+
+def test_usage_endpoint(tmp_path, monkeypatch):
+    """Test /api/usage reports the ledger grouped by day, content type and model"""
+    ledger = _ledger(tmp_path)
+    monkeypatch.setattr(newsletter.pipeline, "usage_ledger", ledger)
+    asyncio.run(ledger.record("gen-1", "hybrid", [
+        {"stage": "generate", "model": "claude-test", "input_tokens": 10, "output_tokens": 5}
+    ]))
+
+    client = TestClient(app)
+    body = client.get("/api/usage", params={"days": 1}).json()
+    assert body["totals"]["calls"] == 1
+    assert body["by_content_type"][0]["content_type"] == "hybrid"
+    assert body["by_model"][0]["model"] == "claude-test"
+    assert len(body["by_day"]) == 1 and body["by_stage"][0]["stage"] == "generate"
+    assert "prices" in body
+
+    generations = client.get("/api/usage/generations").json()["generations"]
+    assert generations[0]["generation"] == "gen-1"
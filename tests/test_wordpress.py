@@ -1,10 +1,22 @@
 # tests/test_wordpress.py
 import pytest
+import asyncio
 import sys
+import time
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
 
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import newsletter as newsletter_routes
+from app.routes import wordpress as wordpress_routes
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.clients import close_clients
+from app.services.wordpress_listings import etag_matches
 from app.services.wordpress_publisher import WordPressPublisher
+from app.utils.database import Database
+from fake_servers import FakeAPIServer, FakeWordPress
 
 def test_wordpress_publisher_initialization():
     """Test WordPress publisher initializes"""
@@ -12,10 +24,344 @@ def test_wordpress_publisher_initialization():
     assert publisher.wp_url is not None
     assert publisher.auth is not None
 
-def test_wordpress_connection():
+def test_routes_and_pipeline_share_one_publisher():
+    """Test the WordPress routes and the pipeline's drafts use the same publisher"""
+    assert wordpress_routes.wordpress_publisher is newsletter_routes.pipeline.wordpress_publisher
+    assert newsletter_routes.pipeline.publish_outbox.publisher is wordpress_routes.wordpress_publisher
+
+@pytest.mark.asyncio
+async def test_wordpress_connection():
     """Test WordPress connection"""
     publisher = WordPressPublisher()
-    result = publisher.test_connection()
+    result = await publisher.test_connection()
     
     # This may fail if WordPress isn't configured
-    assert 'success' in result
\ No newline at end of file
+    assert 'success' in result
+
+def _publisher(server, tmp_path=None):
+    database = Database(f"sqlite:///{tmp_path / 'state.db'}") if tmp_path else None
+    publisher = WordPressPublisher(database=database)
+    publisher.wp_url = server.url
+    return publisher
+
+def _calls(server, method, taxonomy):
+    return [r for r in server.requests if r["method"] == method and r["path"].endswith(f"/{taxonomy}")]
+
+@pytest.mark.asyncio
+async def test_taxonomy_bulk_loaded_and_matched_locally():
+    """Test all terms load in per_page=100 pages and later lookups hit no network"""
+    wordpress = FakeWordPress(categories=["Newsletter", "Policy"], tags=[f"Tag {i}" for i in range(250)])
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server)
+        await publisher.taxonomy.prefetch()
+        loads = len(server.requests)
+
+        taxonomy = await publisher.resolve_taxonomy({"category": "policy", "tags": ["TAG 7", "tag  42", "Tag 7"]})
+
+    assert loads == 4  # one category page, three tag pages
+    assert all(r["query"]["per_page"] == "100" for r in server.requests)
+    assert len(server.requests) == loads
+    assert taxonomy == {"categories": [2], "tags": [10, 45]}
+
+@pytest.mark.asyncio
+async def test_new_terms_created_in_one_parallel_round_trip():
+    """Test unknown tags are created concurrently and cached for the next draft"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+
+    with FakeAPIServer(wordpress.routes(), delay=0.2) as server:
+        publisher = _publisher(server)
+        await publisher.taxonomy.prefetch()
+        # Created by someone else after the cache loaded
+        wordpress.add_term("tags", "Budget")
+
+        start = asyncio.get_running_loop().time()
+        first = await publisher.resolve_taxonomy({"category": "Newsletter", "tags": ["Schools", "Budget", "Roads", "Taxes"]})
+        elapsed = asyncio.get_running_loop().time() - start
+        creates = len(_calls(server, "POST", "tags"))
+
+        second = await publisher.resolve_taxonomy({"category": "Newsletter", "tags": ["roads", "budget"]})
+
+    assert elapsed < 0.2 * 2
+    assert creates == 3
+    assert first["tags"][0] == 2 and len(first["tags"]) == 4
+    assert second["tags"] == [first["tags"][2], first["tags"][1]]
+    assert len(_calls(server, "POST", "tags")) == creates
+    assert publisher.taxonomy.stats()["created"] == 2
+
+@pytest.mark.asyncio
+async def test_stale_taxonomy_refreshed_incrementally():
+    """Test a stale cache fetches only terms newer than the ones it holds"""
+    wordpress = FakeWordPress(tags=[f"Tag {i}" for i in range(150)])
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server)
+        publisher.taxonomy.refresh_seconds = 0
+        await publisher.taxonomy.prefetch()
+        added = wordpress.add_term("tags", "Fresh")
+        server.requests.clear()
+
+        await publisher.taxonomy.resolve("tags", ["Tag 1"])
+        await asyncio.gather(*publisher.taxonomy._background)
+
+    refresh = _calls(server, "GET", "tags")
+    assert len(refresh) == 1 and refresh[0]["query"]["order"] == "desc"
+    assert publisher.taxonomy._indexes["tags"].find("fresh") == added["id"]
+
+@pytest.mark.asyncio
+async def test_publishing_reuses_one_keep_alive_connection(tmp_path):
+    """Test media upload, taxonomy and draft creation share pooled connections"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+    image = tmp_path / "featured.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server, tmp_path)
+        connection = await publisher.test_connection()
+        media_id = await publisher.upload_image(str(image), alt_text="Courthouse")
+        result = await publisher.create_draft_post(
+            {"title": "Title", "body": "<p>Body</p>", "excerpt": "Excerpt",
+             "category": "Newsletter", "tags": ["Schools"]},
+            featured_image_id=media_id
+        )
+        await close_clients()
+
+    assert connection["success"] and result["success"]
+    assert wordpress.posts[0]["featured_media"] == media_id
+    assert wordpress.posts[0]["tags"] == [2] and wordpress.posts[0]["categories"] == [1]
+    # Categories and tags load concurrently; everything else rides those connections
+    assert len({request["client"] for request in server.requests}) <= 2 < len(server.requests)
+
+def _article(**overrides):
+    return {"title": "Title", "body": "<p>Body</p>", "excerpt": "Excerpt",
+            "category": "Newsletter", "tags": ["Schools"], **overrides}
+
+@pytest.mark.asyncio
+async def test_repeated_publish_returns_existing_draft(tmp_path):
+    """Test republishing the same article costs no request and creates no second post"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server, tmp_path)
+        first = await publisher.create_draft_post(_article())
+        server.requests.clear()
+        again = await publisher.create_draft_post(_article())
+        changed = await publisher.create_draft_post(_article(body="<p>Edited</p>"))
+
+    assert again["deduplicated"] and again["post_id"] == first["post_id"]
+    assert [r["path"] for r in server.requests] == [f"{FakeWordPress.PREFIX}/posts"]
+    assert changed["post_id"] != first["post_id"] and len(wordpress.posts) == 2
+
+@pytest.mark.asyncio
+async def test_republish_with_new_image_updates_draft(tmp_path):
+    """Test a new featured image updates the existing post, and a deleted post is recreated"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server, tmp_path)
+        first = await publisher.create_draft_post(_article(), featured_image_id=7)
+        updated = await publisher.create_draft_post(_article(), featured_image_id=8)
+        update_request = server.requests[-1]
+        wordpress.posts.clear()
+        recreated = await publisher.create_draft_post(_article(), featured_image_id=9)
+
+    assert updated["post_id"] == first["post_id"]
+    assert update_request["method"] == "POST" and update_request["body"] == {"featured_media": 8}
+    assert not recreated.get("deduplicated") and recreated["post_id"] == wordpress.posts[0]["id"]
+    assert wordpress.posts[0]["featured_media"] == 9
+
+@pytest.mark.asyncio
+async def test_retried_publish_looks_up_before_resolving_terms(tmp_path):
+    """Test a retry after a restart finds the draft without calling the taxonomy endpoints"""
+    wordpress = FakeWordPress()
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        first = await _publisher(server, tmp_path).create_draft_post(_article(), featured_image_id=7)
+        server.requests.clear()
+        restarted = _publisher(server, tmp_path)
+        again = await restarted.create_draft_post(_article(), featured_image_id=7)
+        lookups = len(server.requests)
+        updated = await restarted.create_draft_post(_article(), featured_image_id=8)
+
+    assert again["deduplicated"] and again["post_id"] == first["post_id"] and lookups == 0
+    assert updated["deduplicated"]
+    assert [(r["method"], r["path"]) for r in server.requests] == [
+        ("POST", f"{FakeWordPress.PREFIX}/posts/{first['post_id']}")
+    ]
+    assert len(wordpress.terms["tags"]) == 1 and restarted.taxonomy.stats()["created"] == 0
+
+@pytest.mark.asyncio
+async def test_media_deleted_in_wordpress_is_uploaded_again(tmp_path):
+    """Test a stored media id that WordPress answers 404 for is forgotten and re-uploaded"""
+    wordpress = FakeWordPress()
+    image = b"\x89PNG\r\n\x1a\nbytes"
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server, tmp_path)
+        first = await publisher.upload_media(image, "a.png")
+        reused = await publisher.upload_media(image, "a.png")
+        wordpress.media.clear()
+        wordpress.media.append({"id": 4999, "source_url": "http://wp.test/media/other.png"})
+        uploaded = await publisher.upload_media(image, "a.png")
+
+    assert reused == first
+    assert uploaded["media_id"] != first["media_id"]
+    assert uploaded["media_id"] == wordpress.media[-1]["id"]
+    assert [r["method"] for r in server.requests if "/media" in r["path"]] == ["POST", "GET", "GET", "POST"]
+
+@pytest.mark.asyncio
+async def test_concurrent_publishes_share_one_draft_and_upload(tmp_path):
+    """Test simultaneous identical publishes and identical images reach WordPress once"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+    first_image, second_image = tmp_path / "a.png", tmp_path / "b.png"
+    first_image.write_bytes(b"\x89PNG\r\n\x1a\nsame")
+    second_image.write_bytes(b"\x89PNG\r\n\x1a\nsame")
+
+    with FakeAPIServer(wordpress.routes(), delay=0.1) as server:
+        publisher = _publisher(server, tmp_path)
+        media_ids = await asyncio.gather(
+            publisher.upload_image(str(first_image)), publisher.upload_image(str(second_image))
+        )
+        reused = await publisher.upload_image(str(second_image))
+        results = await asyncio.gather(*[
+            publisher.create_draft_post(_article(), featured_image_id=media_ids[0]) for _ in range(3)
+        ])
+
+    assert len(wordpress.media) == 1 and media_ids == [reused, reused]
+    assert len(wordpress.posts) == 1
+    assert {result["post_id"] for result in results} == {wordpress.posts[0]["id"]}
+
+def test_proxy_routes_use_wordpress_client(monkeypatch):
+    """Test the listing proxies relay WordPress responses and errors"""
+    wordpress = FakeWordPress(categories=["Newsletter", "Policy"])
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        monkeypatch.setattr(wordpress_routes.wordpress_publisher, "wp_url", server.url)
+        client = TestClient(app)
+        categories = client.get("/api/wordpress/categories")
+        drafts = client.get("/api/wordpress/posts/drafts")
+        connection = client.get("/api/wordpress/test-connection")
+
+    assert [term["name"] for term in categories.json()] == ["Newsletter", "Policy"]
+    assert drafts.status_code == 200 and drafts.json() == []
+    assert connection.json()["success"]
+
+def test_circuit_breaker_opens_then_probes_half_open():
+    """Test failures open the circuit and one trial call after the reset closes it"""
+    circuit = CircuitBreaker("test", failure_threshold=2, reset_seconds=0.05)
+    for _ in range(2):
+        circuit.check()
+        circuit.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        circuit.check()
+    time.sleep(0.06)
+    circuit.check()  # the half-open trial
+    with pytest.raises(CircuitOpenError):
+        circuit.check()
+    circuit.record_success()
+
+    assert circuit.state == "closed" and circuit.available()
+    assert circuit.stats()["rejected"] == 2 and circuit.stats()["times_opened"] == 1
+
+@pytest.mark.asyncio
+async def test_open_circuit_stops_calling_wordpress(tmp_path):
+    """Test an outage trips the breaker so later calls fail without a request"""
+    wordpress = FakeWordPress(categories=["Newsletter"])
+    wordpress.outage = 503
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        publisher = _publisher(server, tmp_path)
+        for _ in range(publisher.circuit.failure_threshold):
+            await publisher.test_connection()
+        failed_requests = len(server.requests)
+
+        result = await publisher.create_draft_post(_article())
+        status = await publisher.health.check()
+
+    assert failed_requests == publisher.circuit.failure_threshold
+    assert len(server.requests) == failed_requests
+    assert not result["success"] and "circuit open" in result["error"]
+    assert not status["success"] and status["circuit"]["state"] == "open"
+
+def test_connection_route_serves_cached_health(monkeypatch):
+    """Test app loads read the probed state instead of calling WordPress each time"""
+    wordpress = FakeWordPress()
+    monkeypatch.setattr(wordpress_routes.wordpress_publisher.health, "status", None)
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        monkeypatch.setattr(wordpress_routes.wordpress_publisher, "wp_url", server.url)
+        client = TestClient(app)
+        responses = [client.get("/api/wordpress/test-connection") for _ in range(3)]
+
+    assert all(response.json()["success"] for response in responses)
+    assert responses[0].json()["circuit"]["state"] == "closed"
+    assert len(server.requests) == 1
+
+def test_listing_proxy_caches_and_revalidates(monkeypatch):
+    """Test polling is served from cache, revalidated with a 304 upstream and ETagged to clients"""
+    wordpress = FakeWordPress()
+    wordpress.posts = [{"id": 1000 + i, "title": f"Draft {i}", "status": "draft"} for i in range(3)]
+    monkeypatch.setattr(wordpress_routes.wordpress_listings, "ttl_seconds", 60)
+    wordpress_routes.wordpress_listings.invalidate()
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        monkeypatch.setattr(wordpress_routes.wordpress_publisher, "wp_url", server.url)
+        client = TestClient(app)
+        first = client.get("/api/wordpress/posts/drafts", params={"per_page": 2, "_fields": "id,title"})
+        polled = client.get("/api/wordpress/posts/drafts", params={"per_page": 2, "_fields": "id,title"},
+                            headers={"If-None-Match": first.headers["etag"]})
+        upstream_after_poll = len(server.requests)
+
+        monkeypatch.setattr(wordpress_routes.wordpress_listings, "ttl_seconds", 0)
+        revalidated = client.get("/api/wordpress/posts/drafts", params={"per_page": 2, "_fields": "id,title"})
+        second_page = client.get("/api/wordpress/posts/drafts", params={"page": 2, "per_page": 2})
+    wordpress_routes.wordpress_listings.invalidate()
+
+    assert [post["id"] for post in first.json()] == [1000, 1001]
+    assert first.headers["x-wp-totalpages"] == "2" and first.headers["x-cache"] == "upstream"
+    assert polled.status_code == 304 and upstream_after_poll == 1
+    assert server.requests[0]["query"] == {"status": "draft", "page": "1", "per_page": "2", "_fields": "id,title"}
+    assert server.requests[1]["headers"]["If-None-Match"]
+    assert revalidated.headers["x-cache"] == "revalidated" and revalidated.json() == first.json()
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert [post["id"] for post in second_page.json()] == [1002]
+
+def test_new_draft_invalidates_cached_drafts_listing(monkeypatch):
+    """Test a draft created by the publisher shows up in the next cached drafts poll"""
+    wordpress = FakeWordPress(categories=["Newsletter"], tags=["Schools"])
+    publisher = wordpress_routes.wordpress_publisher
+    monkeypatch.setattr(wordpress_routes.wordpress_listings, "ttl_seconds", 60)
+    wordpress_routes.wordpress_listings.invalidate()
+
+    with FakeAPIServer(wordpress.routes()) as server:
+        monkeypatch.setattr(publisher, "wp_url", server.url)
+        client = TestClient(app)
+        before = client.get("/api/wordpress/posts/drafts")
+        cached = client.get("/api/wordpress/posts/drafts")
+
+        async def publish():
+            try:
+                return await publisher.create_draft_post(_article(title="Fresh draft"))
+            finally:
+                await close_clients()
+
+        result = asyncio.run(publish())
+        after = client.get("/api/wordpress/posts/drafts", headers={"If-None-Match": before.headers["etag"]})
+    wordpress_routes.wordpress_listings.invalidate()
+
+    assert before.json() == [] and cached.headers["x-cache"] == "cache"
+    assert result["success"]
+    assert after.status_code == 200 and after.headers["x-cache"] == "upstream"
+    assert [post["id"] for post in after.json()] == [result["post_id"]]
+
+def test_if_none_match_compares_whole_etags():
+    """Test If-None-Match is split into tags, ignoring W/, with * matching anything"""
+    etag = '"abc123"'
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"zzz", W/"abc123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abc1234"', etag)
+    assert not etag_matches('"xabc123"', etag)
+    assert not etag_matches('"abc123"-gzip', etag)
+    assert not etag_matches("", etag)